@@ -0,0 +1,49 @@
+import random
+
+
+def numero_de_grupos(total, num_grupos=None, tamanho=None):
+    """Quantos grupos formar: num_grupos, ou os necessários para que nenhum
+    passe de tamanho itens, se tamanho for dado.
+    """
+    if tamanho is not None:
+        if not 1 <= tamanho <= total:
+            raise ValueError(f"Tamanho do grupo deve estar entre 1 e {total}")
+        return -(-total // tamanho)
+
+    if num_grupos is None or not 1 <= num_grupos <= total:
+        raise ValueError(f"Número de grupos deve estar entre 1 e {total}")
+    return num_grupos
+
+
+def dividir_em_grupos(total, num_grupos, rng=random, codigos=None, num_categorias=0):
+    """Posições de range(total) divididas em num_grupos listas.
+
+    As posições são embaralhadas e distribuídas uma a uma entre os grupos,
+    então os tamanhos diferem em no máximo 1. Com codigos (o código da
+    classificação de cada posição, como em TabelaParticipantes), cada
+    categoria é distribuída em sequência antes da seguinte: todo grupo
+    recebe a sua parte de cada classificação, arredondada para baixo ou
+    para cima.
+    """
+    if codigos is None:
+        posicoes = list(range(total))
+        rng.shuffle(posicoes)
+        return [posicoes[i::num_grupos] for i in range(num_grupos)]
+
+    import numpy as np
+
+    gerador = np.random.default_rng(rng.getrandbits(64))
+    embaralhadas = gerador.permutation(total)
+
+    # A ordem das categorias também é sorteada, para que as sobras de cada
+    # uma não caiam sempre nos mesmos grupos. Com até 65536 categorias, a
+    # ordenação estável de uint16 é um radix sort: O(n), como o resto.
+    ordem_categorias = gerador.permutation(max(num_categorias, 1))
+    chaves = ordem_categorias[np.asarray(codigos)[embaralhadas]]
+    if num_categorias <= 1 << 16:
+        chaves = chaves.astype(np.uint16)
+    ordem = embaralhadas[np.argsort(chaves, kind='stable')]
+
+    grupos = [ordem[i::num_grupos].tolist() for i in range(num_grupos)]
+    rng.shuffle(grupos)
+    return grupos
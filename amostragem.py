@@ -0,0 +1,169 @@
+import heapq
+import math
+import random
+from itertools import islice
+
+_FIM = object()
+
+
+def _validar_quantidade(quantidade, disponiveis):
+    if not 0 <= quantidade <= disponiveis:
+        raise ValueError(f"Quantidade deve estar entre 0 e {disponiveis}")
+
+
+def amostrar_indices(total, quantidade, rng=random, indices=None, excluido=None):
+    """quantidade posições distintas de range(total), ou de indices se dado.
+
+    random.sample sobre um range não copia nada: o custo é O(quantidade).
+    excluido(posição) -> bool deixa posições de fora do sorteio.
+    """
+    populacao = range(total) if indices is None else indices
+    _validar_quantidade(quantidade, len(populacao))
+    if excluido is None:
+        return rng.sample(populacao, quantidade)
+    return _amostrar_exceto(populacao, quantidade, rng, excluido)
+
+
+def _amostrar_exceto(populacao, quantidade, rng, excluido):
+    # Rejeição: sorteia posições ainda não vistas e descarta as excluídas,
+    # então só as posições sorteadas são testadas. Se os descartes passarem
+    # de um limite (quase todos excluídos), recomeça sobre a lista das
+    # disponíveis, montada uma vez; recomeçar do zero mantém a amostra
+    # uniforme.
+    limite = 4 * quantidade + 64
+    vistas = set()
+    sorteados = []
+    descartes = 0
+    while len(sorteados) < quantidade and descartes < limite and len(vistas) < len(populacao):
+        i = rng.randrange(len(populacao))
+        if i in vistas:
+            continue
+        vistas.add(i)
+        if excluido(populacao[i]):
+            descartes += 1
+        else:
+            sorteados.append(populacao[i])
+    if len(sorteados) == quantidade:
+        return sorteados
+
+    disponiveis = [posicao for posicao in populacao if not excluido(posicao)]
+    _validar_quantidade(quantidade, len(disponiveis))
+    return rng.sample(disponiveis, quantidade)
+
+
+def amostrar_reservatorio(itens, quantidade, rng=random):
+    """Amostra uniforme sem reposição de um iterável de tamanho desconhecido.
+
+    Algoritmo L (Li, 1994): só guarda quantidade itens e sorteia quantos
+    pular até a próxima troca, então a maior parte dos itens é apenas
+    percorrida. O resultado sai embaralhado, pronto para uso como colocação.
+    """
+    itens = iter(itens)
+    reservatorio = list(islice(itens, quantidade))
+    if len(reservatorio) < quantidade:
+        raise ValueError(f"Quantidade deve estar entre 0 e {len(reservatorio)}")
+
+    if quantidade:
+        w = math.exp(math.log(rng.random() or 1e-300) / quantidade)
+        while True:
+            pulo = int(math.log(rng.random() or 1e-300) / math.log1p(-w))
+            proximo = next(islice(itens, pulo, None), _FIM)
+            if proximo is _FIM:
+                break
+            reservatorio[rng.randrange(quantidade)] = proximo
+            w *= math.exp(math.log(rng.random() or 1e-300) / quantidade)
+
+    rng.shuffle(reservatorio)
+    return reservatorio
+
+
+def _validar_peso(peso):
+    if not peso >= 0 or math.isinf(peso):
+        raise ValueError(f"Peso inválido: {peso!r}")
+
+
+def amostrar_ponderado(pesos, quantidade, rng=random, indices=None, excluido=None):
+    """Posições sorteadas sem reposição com probabilidade proporcional ao peso.
+
+    Efraimidis–Spirakis: cada posição recebe a chave log(u) / peso e ficam as
+    quantidade maiores, em ordem decrescente de chave, que equivale a sortear
+    uma por vez entre as restantes (serve para colocação). As chaves são
+    calculadas em bloco pelo NumPy, com um gerador semeado por rng, de modo
+    que a mesma semente repete o sorteio. Peso zero nunca é sorteado.
+
+    Com excluido, ficam as quantidade maiores chaves entre as posições não
+    excluídas, o que equivale ao mesmo sorteio feito só sobre elas.
+    """
+    import numpy as np
+
+    todos = np.asarray(pesos, dtype=np.float64)
+    posicoes = None if indices is None else np.asarray(indices, dtype=np.int64)
+    valores = todos if posicoes is None else todos[posicoes]
+
+    if valores.size and (not np.all(valores >= 0) or np.isinf(valores).any()):
+        raise ValueError("Os pesos devem ser números finitos e não negativos")
+    _validar_quantidade(quantidade, int(np.count_nonzero(valores)))
+    if not quantidade:
+        return []
+
+    gerador = np.random.default_rng(rng.getrandbits(64))
+    with np.errstate(divide='ignore'):
+        chaves = np.log(gerador.random(valores.size)) / valores
+    if excluido is not None:
+        return _maiores_exceto(chaves, quantidade, posicoes, excluido)
+
+    maiores = np.argpartition(chaves, -quantidade)[-quantidade:]
+    maiores = maiores[np.argsort(chaves[maiores])[::-1]]
+    if posicoes is not None:
+        maiores = posicoes[maiores]
+    return maiores.tolist()
+
+
+def _maiores_exceto(chaves, quantidade, posicoes, excluido):
+    # Percorre as chaves da maior para a menor, numa janela que dobra até
+    # achar quantidade posições não excluídas. Peso zero tem chave -inf e
+    # nunca entra.
+    import numpy as np
+
+    janela = quantidade
+    while True:
+        janela = min(2 * janela + 64, chaves.size)
+        candidatas = np.argpartition(chaves, -janela)[-janela:]
+        candidatas = candidatas[np.argsort(chaves[candidatas])[::-1]]
+        candidatas = candidatas[chaves[candidatas] > -np.inf]
+        if posicoes is not None:
+            candidatas = posicoes[candidatas]
+
+        sorteados = []
+        for posicao in candidatas.tolist():
+            if not excluido(posicao):
+                sorteados.append(posicao)
+                if len(sorteados) == quantidade:
+                    return sorteados
+        if janela == chaves.size:
+            raise ValueError(f"Quantidade deve estar entre 0 e {len(sorteados)}")
+
+
+def amostrar_reservatorio_ponderado(pares, quantidade, rng=random):
+    """Versão em fluxo de amostrar_ponderado, sobre pares (item, peso).
+
+    Mantém um heap com as quantidade maiores chaves vistas (A-Res), então a
+    memória é O(quantidade) qualquer que seja o tamanho da entrada.
+    """
+    if not quantidade:
+        return []
+
+    heap = []
+    for contador, (item, peso) in enumerate(pares):
+        _validar_peso(peso)
+        if not peso:
+            continue
+        chave = math.log(rng.random() or 1e-300) / peso
+        if len(heap) < quantidade:
+            heapq.heappush(heap, (chave, contador, item))
+        elif chave > heap[0][0]:
+            heapq.heapreplace(heap, (chave, contador, item))
+
+    if len(heap) < quantidade:
+        raise ValueError(f"Quantidade deve estar entre 0 e {len(heap)}")
+    return [item for _, _, item in sorted(heap, reverse=True)]
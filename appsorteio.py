@@ -1,18 +1,38 @@
 import sys
 import os
-import random
 import json
-from datetime import datetime
+import tracemalloc
+from datetime import datetime, timedelta
+from itertools import islice
 from pathlib import Path
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QVBoxLayout, QWidget, QTabWidget,
     QPushButton, QLabel, QTextEdit, QFileDialog, QInputDialog,
-    QHBoxLayout, QComboBox, QGroupBox, QMessageBox
+    QHBoxLayout, QComboBox, QGroupBox, QMessageBox, QProgressBar,
+    QTableView, QHeaderView, QAbstractItemView, QCheckBox, QDateEdit, QLineEdit
 )
-from PyQt6.QtCore import Qt
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg
-from matplotlib.figure import Figure
-from openpyxl import load_workbook, Workbook
+from PyQt6.QtCore import Qt, QThread, QTimer, QDate
+from PyQt6.QtGui import QFontDatabase
+from cache_disco import CacheDisco
+from cache_planilhas import CachePlanilhas
+from conjunto import contagem_por_fonte, eh_excel, fontes_dos_arquivos
+from consulta_historico import IndiceHistorico
+from desempenho import medidor
+from exclusao import escopo_exclusao, exclusao_do_historico, exclusao_por_classificacao
+from exportacao import EXPORTADORES, exportar
+from graficos import GraficoDistribuicao, agregado_das_vitorias, agregado_do_grafico
+from historico import HistoricoSorteios
+from leitura import validar_arquivo
+from modelo_historico import FiltroHistorico, ModeloHistorico
+from normalizacao import DEDUP_PRIMEIRO, POLITICAS_DEDUP
+import motor_sorteio
+from participantes import TabelaParticipantes
+from tarefas import CarregamentoPlanilha
+from verificacao import VERIFICADO, exclusao_do_registro, indice_legado, precisa_indice_legado, verificar_registro
+
+LOTE_HISTORICO = 5000
+DIAS_EXCLUSAO = {"Todo o histórico": 0, "Últimos 7 dias": 7, "Últimos 30 dias": 30, "Últimos 365 dias": 365}
+ESCOPO_QUALQUER, ESCOPO_MESMO_TIPO, ESCOPO_MESMA_CLASSIFICACAO = range(3)
 
 class SorteadorApp(QMainWindow):
     def __init__(self):
@@ -21,20 +41,37 @@ class SorteadorApp(QMainWindow):
         self.setGeometry(100, 100, 900, 700)
         
         self.historico = []
-        self.dados_planilha = []
+        self.arquivo_historico = HistoricoSorteios()
+        self.indice_historico = IndiceHistorico()
+        self.dados_planilha = TabelaParticipantes()
         self.colunas_disponiveis = []
         self.coluna_atual = 'A'
+        self.coluna_peso = None
+        self.politica_dedup = None
         self.arquivo_excel = None
+        self.fontes_conjunto = None
         self.resultados = None
+        self.resultados_sessao = []
+        self.cache_planilhas = CachePlanilhas(disco=CacheDisco())
+        self.carregamento = None
+        self.threads_carregamento = {}
+        self.figure = None
+        self.canvas = None
+        self.grafico = None
         
         self.configurar_ui()
-        self.carregar_historico()
+        QTimer.singleShot(0, self.carregar_historico)
 
     def configurar_ui(self):
         tabs = QTabWidget()
         tabs.addTab(self.criar_aba_sorteio(), "🎲 Sorteio")
         tabs.addTab(self.criar_aba_historico(), "📜 Histórico")
-        tabs.addTab(self.criar_aba_graficos(), "📊 Gráficos")
+        self.aba_graficos = self.criar_aba_graficos()
+        tabs.addTab(self.aba_graficos, "📊 Gráficos")
+        self.aba_desempenho = self.criar_aba_desempenho()
+        tabs.addTab(self.aba_desempenho, "⏱️ Desempenho")
+        tabs.currentChanged.connect(self.mudar_aba)
+        self.tabs = tabs
         self.setCentralWidget(tabs)
 
     def criar_aba_sorteio(self):
@@ -48,6 +85,19 @@ class SorteadorApp(QMainWindow):
         self.btn_carregar.clicked.connect(self.carregar_excel)
         layout_excel.addWidget(self.btn_carregar)
         
+        self.btn_combinar = QPushButton("📚 Combinar Várias Planilhas")
+        self.btn_combinar.clicked.connect(self.combinar_planilhas)
+        layout_excel.addWidget(self.btn_combinar)
+        
+        self.barra_progresso = QProgressBar()
+        self.barra_progresso.hide()
+        layout_excel.addWidget(self.barra_progresso)
+        
+        self.btn_cancelar = QPushButton("⏹ Cancelar Carregamento")
+        self.btn_cancelar.clicked.connect(self.cancelar_carregamento)
+        self.btn_cancelar.hide()
+        layout_excel.addWidget(self.btn_cancelar)
+        
         self.label_coluna = QLabel("Coluna para sorteio:")
         self.combo_coluna = QComboBox()
         self.combo_coluna.currentTextChanged.connect(self.mudar_coluna)
@@ -59,6 +109,22 @@ class SorteadorApp(QMainWindow):
         layout_excel.addWidget(self.label_classificacao)
         layout_excel.addWidget(self.combo_classificacao)
         
+        self.label_peso = QLabel("Coluna de peso (opcional, ex.: bilhetes):")
+        self.combo_peso = QComboBox()
+        self.combo_peso.addItem("(Sem peso)")
+        self.combo_peso.currentIndexChanged.connect(self.mudar_coluna_peso)
+        layout_excel.addWidget(self.label_peso)
+        layout_excel.addWidget(self.combo_peso)
+        
+        self.label_duplicados = QLabel("Nomes repetidos (compara sem acentos, maiúsculas e espaços extras):")
+        self.combo_duplicados = QComboBox()
+        self.combo_duplicados.addItem("Manter todos", None)
+        for politica, descricao in POLITICAS_DEDUP.items():
+            self.combo_duplicados.addItem(descricao, politica)
+        self.combo_duplicados.currentIndexChanged.connect(self.mudar_politica_dedup)
+        layout_excel.addWidget(self.label_duplicados)
+        layout_excel.addWidget(self.combo_duplicados)
+        
         grupo_excel.setLayout(layout_excel)
         layout.addWidget(grupo_excel)
         
@@ -87,11 +153,28 @@ class SorteadorApp(QMainWindow):
         self.btn_classificar.clicked.connect(self.sortear_por_classificacao)
         botoes_layout2.addWidget(self.btn_classificar)
         
+        self.btn_cotas = QPushButton("🎯 Sortear por Cotas")
+        self.btn_cotas.clicked.connect(self.sortear_por_cotas)
+        botoes_layout2.addWidget(self.btn_cotas)
+        
         self.btn_exportar = QPushButton("💾 Exportar Resultados")
         self.btn_exportar.clicked.connect(self.exportar_resultados)
         botoes_layout2.addWidget(self.btn_exportar)
         
         layout_operacoes.addLayout(botoes_layout2)
+        
+        layout_exclusao = QHBoxLayout()
+        self.check_exclusao = QCheckBox("Excluir vencedores anteriores")
+        layout_exclusao.addWidget(self.check_exclusao)
+        self.combo_exclusao_periodo = QComboBox()
+        self.combo_exclusao_periodo.addItems(DIAS_EXCLUSAO)
+        layout_exclusao.addWidget(self.combo_exclusao_periodo)
+        self.combo_exclusao_escopo = QComboBox()
+        self.combo_exclusao_escopo.addItems(
+            ["Qualquer sorteio", "Só do mesmo tipo", "Só da classificação sorteada"]
+        )
+        layout_exclusao.addWidget(self.combo_exclusao_escopo)
+        layout_operacoes.addLayout(layout_exclusao)
         grupo_operacoes.setLayout(layout_operacoes)
         layout.addWidget(grupo_operacoes)
         
@@ -105,26 +188,154 @@ class SorteadorApp(QMainWindow):
     def criar_aba_historico(self):
         tab = QWidget()
         layout = QVBoxLayout()
-        self.label_historico = QTextEdit()
-        self.label_historico.setReadOnly(True)
+        
+        filtros = QHBoxLayout()
+        self.combo_filtro_tipo = QComboBox()
+        self.combo_filtro_tipo.addItem("Todos os tipos")
+        self.combo_filtro_tipo.currentIndexChanged.connect(self.aplicar_filtro_historico)
+        filtros.addWidget(self.combo_filtro_tipo)
+        
+        self.combo_filtro_coluna = QComboBox()
+        self.combo_filtro_coluna.addItem("Todas as colunas")
+        self.combo_filtro_coluna.currentIndexChanged.connect(self.aplicar_filtro_historico)
+        filtros.addWidget(self.combo_filtro_coluna)
+        
+        self.check_filtro_data = QCheckBox("Período:")
+        self.check_filtro_data.toggled.connect(self.aplicar_filtro_historico)
+        filtros.addWidget(self.check_filtro_data)
+        
+        self.data_filtro_inicial = QDateEdit(QDate.currentDate().addMonths(-1))
+        self.data_filtro_final = QDateEdit(QDate.currentDate())
+        for campo in (self.data_filtro_inicial, self.data_filtro_final):
+            campo.setCalendarPopup(True)
+            campo.setDisplayFormat("dd/MM/yyyy")
+            campo.dateChanged.connect(self.aplicar_filtro_historico)
+            filtros.addWidget(campo)
+        layout.addLayout(filtros)
+        
+        busca = QHBoxLayout()
+        self.busca_historico = QLineEdit()
+        self.busca_historico.setPlaceholderText("Buscar participante sorteado...")
+        self.busca_historico.returnPressed.connect(self.aplicar_filtro_historico)
+        self.busca_historico.textChanged.connect(
+            lambda texto: texto.strip() or self.aplicar_filtro_historico()
+        )
+        busca.addWidget(self.busca_historico)
+        
+        self.btn_buscar = QPushButton("🔍 Buscar")
+        self.btn_buscar.clicked.connect(self.aplicar_filtro_historico)
+        busca.addWidget(self.btn_buscar)
+        
+        self.btn_estatisticas = QPushButton("📈 Estatísticas")
+        self.btn_estatisticas.clicked.connect(self.mostrar_estatisticas)
+        busca.addWidget(self.btn_estatisticas)
+        layout.addLayout(busca)
+        
+        self.label_historico = QLabel("📅 Histórico de Sorteios:")
         layout.addWidget(self.label_historico)
         
+        self.modelo_historico = ModeloHistorico(self.historico, self)
+        self.filtro_historico = FiltroHistorico(self)
+        self.filtro_historico.setSourceModel(self.modelo_historico)
+        
+        self.tabela_historico = QTableView()
+        self.tabela_historico.setModel(self.filtro_historico)
+        self.tabela_historico.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.tabela_historico.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.tabela_historico.setAlternatingRowColors(True)
+        self.tabela_historico.setWordWrap(False)
+        self.tabela_historico.verticalHeader().hide()
+        self.tabela_historico.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        self.tabela_historico.horizontalHeader().setStretchLastSection(True)
+        layout.addWidget(self.tabela_historico)
+        
+        botoes_historico = QHBoxLayout()
+        self.btn_verificar = QPushButton("🔎 Verificar Selecionado")
+        self.btn_verificar.clicked.connect(self.verificar_sorteio)
+        botoes_historico.addWidget(self.btn_verificar)
+        
+        self.btn_exportar_historico = QPushButton("💾 Exportar Filtrados")
+        self.btn_exportar_historico.clicked.connect(self.exportar_historico_filtrado)
+        botoes_historico.addWidget(self.btn_exportar_historico)
+        
         self.btn_limpar = QPushButton("🧹 Limpar Histórico")
         self.btn_limpar.clicked.connect(self.limpar_historico)
-        layout.addWidget(self.btn_limpar)
+        botoes_historico.addWidget(self.btn_limpar)
+        layout.addLayout(botoes_historico)
         
         tab.setLayout(layout)
         return tab
 
     def criar_aba_graficos(self):
+        tab = QWidget()
+        self.layout_graficos = QVBoxLayout()
+        
+        self.combo_grafico = QComboBox()
+        self.combo_grafico.addItems(["Planilha atual", "Frequência de vitórias (histórico)"])
+        self.combo_grafico.currentIndexChanged.connect(self.gerar_grafico)
+        self.layout_graficos.addWidget(self.combo_grafico)
+        
+        tab.setLayout(self.layout_graficos)
+        return tab
+
+    def criar_aba_desempenho(self):
         tab = QWidget()
         layout = QVBoxLayout()
-        self.figure = Figure(figsize=(8, 5))
-        self.canvas = FigureCanvasQTAgg(self.figure)
-        layout.addWidget(self.canvas)
+        
+        botoes = QHBoxLayout()
+        self.check_captura = QCheckBox("Capturar perfil e memória (cProfile + tracemalloc, mais lento)")
+        self.check_captura.toggled.connect(self.alternar_captura)
+        botoes.addWidget(self.check_captura)
+        
+        self.btn_atualizar_desempenho = QPushButton("🔄 Atualizar")
+        self.btn_atualizar_desempenho.clicked.connect(self.atualizar_desempenho)
+        botoes.addWidget(self.btn_atualizar_desempenho)
+        
+        self.btn_exportar_trace = QPushButton("💾 Exportar Trace")
+        self.btn_exportar_trace.clicked.connect(self.exportar_trace)
+        botoes.addWidget(self.btn_exportar_trace)
+        
+        self.btn_limpar_medicoes = QPushButton("🧹 Limpar Medições")
+        self.btn_limpar_medicoes.clicked.connect(self.limpar_medicoes)
+        botoes.addWidget(self.btn_limpar_medicoes)
+        layout.addLayout(botoes)
+        
+        self.label_memoria = QLabel()
+        layout.addWidget(self.label_memoria)
+        
+        self.texto_desempenho = QTextEdit()
+        self.texto_desempenho.setReadOnly(True)
+        self.texto_desempenho.setLineWrapMode(QTextEdit.LineWrapMode.NoWrap)
+        self.texto_desempenho.setFont(QFontDatabase.systemFont(QFontDatabase.SystemFont.FixedFont))
+        layout.addWidget(self.texto_desempenho)
+        
+        # Atualiza sozinho só enquanto a aba está visível.
+        self.timer_desempenho = QTimer(self)
+        self.timer_desempenho.setInterval(1000)
+        self.timer_desempenho.timeout.connect(self.atualizar_desempenho)
+        
         tab.setLayout(layout)
         return tab
 
+    def mudar_aba(self, indice):
+        if self.tabs.widget(indice) is self.aba_desempenho:
+            self.atualizar_desempenho()
+            self.timer_desempenho.start()
+        else:
+            self.timer_desempenho.stop()
+        if self.tabs.widget(indice) is not self.aba_graficos:
+            return
+        if self.canvas is None:
+            # O matplotlib só é importado quando a aba de gráficos aparece.
+            from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg
+            from matplotlib.figure import Figure
+            
+            self.figure = Figure(figsize=(8, 5))
+            self.canvas = FigureCanvasQTAgg(self.figure)
+            self.grafico = GraficoDistribuicao(self.figure)
+            self.layout_graficos.addWidget(self.canvas)
+        self.gerar_grafico()
+
     def carregar_excel(self):
         try:
             diretorio_inicial = str(Path.home() / "Documents")
@@ -133,7 +344,7 @@ class SorteadorApp(QMainWindow):
                 self, 
                 "Abrir Excel", 
                 diretorio_inicial,
-                "Planilhas (*.xlsx *.xls);;Todos os arquivos (*)"
+                "Planilhas (*.xlsx *.xls *.csv *.tsv *.txt *.parquet);;Todos os arquivos (*)"
             )
             
             if not arquivo:
@@ -147,74 +358,256 @@ class SorteadorApp(QMainWindow):
             if not os.access(arquivo, os.R_OK):
                 raise PermissionError(f"Sem permissão para ler o arquivo: {arquivo}")
             
-            self.btn_carregar.setText("Carregando...")
-            QApplication.processEvents()
-            
-            with open(arquivo, 'rb') as f:
-                if f.read(4) != b'\x50\x4B\x03\x04':
-                    raise ValueError("O arquivo selecionado não é um Excel válido")
-            
-            wb = load_workbook(arquivo)
-            planilha = wb.active
-            self.colunas_disponiveis = []
-            
-            for col in planilha.iter_cols():
-                if any(cell.value for cell in col[1:]):
-                    self.colunas_disponiveis.append(col[0].column_letter)
-            
-            if not self.colunas_disponiveis:
-                raise ValueError("Nenhuma coluna com dados encontrada")
-            
-            self.combo_coluna.clear()
-            self.combo_coluna.addItems(self.colunas_disponiveis)
-            self.arquivo_excel = arquivo
-            self.processar_dados_excel()
-            self.gerar_grafico()
-            
-            self.label_resultado.setText(f"✅ Planilha carregada com sucesso!\n"
-                                      f"Local: {arquivo}\n"
-                                      f"{len(self.dados_planilha)} itens encontrados.")
+            validar_arquivo(arquivo)
+            self.iniciar_carregamento(arquivo, coluna_peso=None, politica=self.combo_duplicados.currentData())
             
         except Exception as e:
             QMessageBox.critical(self, "Erro", f"Não foi possível carregar o arquivo:\n{str(e)}")
             self.label_resultado.setText(f"❌ Erro ao carregar arquivo:\n{str(e)}")
+
+    def combinar_planilhas(self):
+        arquivos, _ = QFileDialog.getOpenFileNames(
+            self,
+            "Combinar Planilhas",
+            str(Path.home() / "Documents"),
+            "Planilhas (*.xlsx *.xls *.csv *.tsv *.txt *.parquet);;Todos os arquivos (*)"
+        )
+        if not arquivos:
+            return
+        
+        todas_as_abas = False
+        if any(map(eh_excel, arquivos)):
+            abas, ok = QInputDialog.getItem(
+                self, "Combinar Planilhas", "Quais abas dos arquivos Excel?",
+                ["Todas as abas", "Só a aba ativa"], 0, False
+            )
+            if not ok:
+                return
+            todas_as_abas = abas == "Todas as abas"
+        
+        try:
+            arquivos = [os.path.normpath(arquivo) for arquivo in arquivos]
+            for arquivo in arquivos:
+                validar_arquivo(arquivo)
+            fontes = fontes_dos_arquivos(arquivos, todas_as_abas)
+        except Exception as e:
+            QMessageBox.critical(self, "Erro", f"Não foi possível combinar as planilhas:\n{str(e)}")
+            return
+        
+        # Juntar planilhas sem tirar os repetidos contaria duas vezes quem se
+        # inscreveu em mais de uma; "Manter todos" ainda pode ser escolhido depois.
+        politica = self.combo_duplicados.currentData() or DEDUP_PRIMEIRO
+        self.iniciar_carregamento(None, politica=politica, fontes=fontes)
+
+    def iniciar_carregamento(self, arquivo, coluna=None, coluna_peso=None, politica=None, fontes=None):
+        if self.carregamento:
+            self.carregamento.cancelar()
+        
+        thread = QThread(self)
+        carregamento = CarregamentoPlanilha(self.cache_planilhas, arquivo, coluna, coluna_peso, politica, fontes)
+        carregamento.moveToThread(thread)
+        thread.started.connect(carregamento.executar)
+        carregamento.progresso.connect(self.mostrar_progresso)
+        carregamento.concluido.connect(self.carregamento_concluido)
+        carregamento.falhou.connect(self.carregamento_falhou)
+        carregamento.finalizado.connect(thread.quit)
+        thread.finished.connect(self.descartar_thread_carregamento)
+        thread.finished.connect(thread.deleteLater)
+        
+        self.threads_carregamento[thread] = carregamento
+        self.carregamento = carregamento
+        
+        self.btn_carregar.setText("Carregando...")
+        self.combo_coluna.setEnabled(not carregamento.completo)
+        self.combo_peso.setEnabled(not carregamento.completo)
+        self.combo_duplicados.setEnabled(not carregamento.completo)
+        self.barra_progresso.setRange(0, 0)
+        self.barra_progresso.show()
+        self.btn_cancelar.show()
+        thread.start()
+
+    def mostrar_progresso(self, linhas, total):
+        if self.sender() is not self.carregamento:
+            return
+        if total:
+            self.barra_progresso.setRange(0, total)
+            self.barra_progresso.setValue(min(linhas, total))
+        if self.carregamento.fontes:
+            self.btn_carregar.setText(f"Carregando... {linhas} de {total} planilhas")
+        else:
+            self.btn_carregar.setText(f"Carregando... {linhas} linhas")
+
+    def carregamento_concluido(self, resultado):
+        carregamento = self.sender()
+        if carregamento is not self.carregamento:
+            return
+        
+        # Aplica o resultado antes de finalizar: os combos voltam para a
+        # coluna, o peso e a política que foram de fato carregados.
+        arquivo, colunas, coluna, dados = resultado
+        try:
+            if not carregamento.completo:
+                self.aplicar_coluna(coluna, dados, carregamento.coluna_peso, carregamento.politica)
+            else:
+                with medidor.medir('exibir_planilha', linhas=len(dados)):
+                    self.exibir_planilha(arquivo, colunas, coluna, dados, carregamento)
         finally:
-            self.btn_carregar.setText("📂 Carregar Excel")
+            self.finalizar_carregamento()
+
+    def exibir_planilha(self, arquivo, colunas, coluna, dados, carregamento):
+        self.colunas_disponiveis = colunas
+        self.arquivo_excel = arquivo
+        self.fontes_conjunto = carregamento.fontes
+        self.coluna_atual = coluna
+        self.coluna_peso = carregamento.coluna_peso
+        self.politica_dedup = carregamento.politica
+        self.dados_planilha = dados
+        
+        self.combo_coluna.blockSignals(True)
+        self.combo_coluna.clear()
+        self.combo_coluna.addItems(self.colunas_disponiveis)
+        self.combo_coluna.setCurrentText(coluna)
+        self.combo_coluna.blockSignals(False)
+        
+        self.combo_peso.blockSignals(True)
+        self.combo_peso.clear()
+        self.combo_peso.addItem("(Sem peso)")
+        self.combo_peso.addItems(self.colunas_disponiveis)
+        self.combo_peso.blockSignals(False)
+        
+        # Planilhas combinadas já saem sem repetidos, mesmo com "Manter todos" escolhido.
+        self.combo_duplicados.blockSignals(True)
+        self.combo_duplicados.setCurrentIndex(max(self.combo_duplicados.findData(self.politica_dedup), 0))
+        self.combo_duplicados.blockSignals(False)
+        
+        self.atualizar_classificacoes()
+        self.gerar_grafico()
+        
+        origem = f"Local: {arquivo}" if arquivo else f"{len(carregamento.fontes)} planilhas combinadas"
+        self.label_resultado.setText(f"✅ Planilha carregada com sucesso!\n"
+                                  f"{origem}\n"
+                                  f"{len(self.dados_planilha)} itens encontrados."
+                                  + self.texto_fontes(dados)
+                                  + self.texto_deduplicacao(dados))
+
+    def carregamento_falhou(self, mensagem):
+        carregamento = self.sender()
+        if carregamento is not self.carregamento:
+            return
+        self.finalizar_carregamento()
+        
+        if carregamento.completo:
+            QMessageBox.critical(self, "Erro", f"Não foi possível carregar o arquivo:\n{mensagem}")
+            self.label_resultado.setText(f"❌ Erro ao carregar arquivo:\n{mensagem}")
+        else:
+            self.label_resultado.setText(f"❌ Erro ao processar coluna {carregamento.coluna}:\n{mensagem}")
+
+    def cancelar_carregamento(self):
+        if not self.carregamento:
+            return
+        self.carregamento.cancelar()
+        self.finalizar_carregamento()
+        self.label_resultado.setText("⏹ Carregamento cancelado.")
 
-    def processar_dados_excel(self):
+    def finalizar_carregamento(self):
+        self.carregamento = None
+        self.barra_progresso.hide()
+        self.btn_cancelar.hide()
+        self.btn_carregar.setText("📂 Carregar Excel")
+        self.sincronizar_combos()
+        self.combo_coluna.setEnabled(True)
+        self.combo_peso.setEnabled(True)
+        self.combo_duplicados.setEnabled(True)
+
+    def sincronizar_combos(self):
+        # Os combos mostram o que está carregado, não o último pedido.
+        self.combo_coluna.blockSignals(True)
+        self.combo_coluna.setCurrentText(self.coluna_atual)
+        self.combo_coluna.blockSignals(False)
+        
+        self.combo_peso.blockSignals(True)
+        self.combo_peso.setCurrentIndex(max(self.combo_peso.findText(self.coluna_peso or ''), 0))
+        self.combo_peso.blockSignals(False)
+        
+        self.combo_duplicados.blockSignals(True)
+        self.combo_duplicados.setCurrentIndex(max(self.combo_duplicados.findData(self.politica_dedup), 0))
+        self.combo_duplicados.blockSignals(False)
+
+    def descartar_thread_carregamento(self):
+        self.threads_carregamento.pop(self.sender(), None)
+
+    def processar_dados_excel(self, coluna, coluna_peso, politica=None):
+        if self.fontes_conjunto:
+            # O conjunto é lido (ou achado no cache) na thread de carregamento.
+            self.iniciar_carregamento(None, coluna, coluna_peso, politica, self.fontes_conjunto)
+            return
+        
         try:
-            wb = load_workbook(self.arquivo_excel)
-            planilha = wb.active
-            self.dados_planilha = []
-            classificacoes = set()
-            
-            for cell in planilha[self.coluna_atual][1:]:
-                if cell.value:
-                    item = {
-                        'nome': str(cell.value).strip(),
-                        'classificacao': str(planilha['B'][cell.row-1].value).strip() 
-                            if 'B' in self.colunas_disponiveis and planilha['B'][cell.row-1].value 
-                            else ''
-                    }
-                    self.dados_planilha.append(item)
-                    if item['classificacao']:
-                        classificacoes.add(item['classificacao'])
-            
-            self.combo_classificacao.clear()
-            self.combo_classificacao.addItem("(Sem classificação)")
-            self.combo_classificacao.addItems(sorted(classificacoes))
-            
+            resultado = self.cache_planilhas.em_cache(self.arquivo_excel, coluna, coluna_peso, politica)
         except Exception as e:
-            raise ValueError(f"Erro ao processar coluna {self.coluna_atual}:\n{str(e)}")
+            self.label_resultado.setText(f"❌ Erro ao processar coluna {coluna}:\n{str(e)}")
+            return
+        
+        if resultado is None:
+            self.iniciar_carregamento(self.arquivo_excel, coluna, coluna_peso, politica)
+            return
+        
+        if self.carregamento:
+            self.carregamento.cancelar()
+        self.aplicar_coluna(coluna, resultado[2], coluna_peso, politica)
+        if self.carregamento:
+            self.finalizar_carregamento()
+        else:
+            self.sincronizar_combos()
+
+    def aplicar_coluna(self, coluna, dados, coluna_peso=None, politica=None):
+        with medidor.medir('exibir_planilha', linhas=len(dados)):
+            self.coluna_atual = coluna
+            self.coluna_peso = coluna_peso
+            self.politica_dedup = politica
+            self.dados_planilha = dados
+            self.atualizar_classificacoes()
+            self.gerar_grafico()
+        texto = f"✅ Coluna {coluna} carregada com sucesso!"
+        if coluna_peso:
+            texto += f"\nSorteios ponderados pela coluna {coluna_peso}."
+        self.label_resultado.setText(texto + self.texto_fontes(dados) + self.texto_deduplicacao(dados))
+
+    def texto_fontes(self, dados, limite=20):
+        if dados.fontes is None:
+            return ""
+        contagem = contagem_por_fonte(dados)
+        linhas = [f"  {rotulo}: {itens}" for rotulo, itens in contagem[:limite]]
+        if len(contagem) > limite:
+            linhas.append(f"  ... e mais {len(contagem) - limite}")
+        return "\n\n📚 Itens por planilha:\n" + "\n".join(linhas)
+
+    def texto_deduplicacao(self, dados):
+        if dados.deduplicacao is None:
+            return ""
+        return f"\n\n🧹 {dados.deduplicacao.texto()}"
+
+    def atualizar_classificacoes(self):
+        self.combo_classificacao.clear()
+        self.combo_classificacao.addItem("(Sem classificação)")
+        self.combo_classificacao.addItems(self.dados_planilha.classificacoes_unicas())
 
     def mudar_coluna(self, coluna):
-        self.coluna_atual = coluna
-        if self.arquivo_excel:
-            try:
-                self.processar_dados_excel()
-                self.label_resultado.setText(f"✅ Coluna {coluna} carregada com sucesso!")
-            except Exception as e:
-                self.label_resultado.setText(f"❌ {str(e)}")
+        if not self.arquivo_excel and not self.fontes_conjunto:
+            self.coluna_atual = coluna
+            return
+        self.processar_dados_excel(coluna, self.coluna_peso, self.politica_dedup)
+
+    def mudar_coluna_peso(self, indice):
+        if not self.arquivo_excel and not self.fontes_conjunto:
+            return
+        coluna_peso = self.combo_peso.itemText(indice) if indice > 0 else None
+        self.processar_dados_excel(self.coluna_atual, coluna_peso, self.politica_dedup)
+
+    def mudar_politica_dedup(self, indice):
+        if not self.arquivo_excel and not self.fontes_conjunto:
+            return
+        self.processar_dados_excel(self.coluna_atual, self.coluna_peso, self.combo_duplicados.itemData(indice))
 
     def executar_sorteio(self):
         if not self.dados_planilha:
@@ -228,27 +621,12 @@ class SorteadorApp(QMainWindow):
             
         if ok:
             try:
-                nomes = [item['nome'] for item in self.dados_planilha]
-                sorteados = random.sample(nomes, quantidade)
-                resultado = "🎉 ITENS SORTEADOS:\n\n• " + "\n• ".join(sorteados)
-                self.label_resultado.setText(resultado)
-                
-                self.resultados = {
-                    'tipo': 'Sorteio', 
-                    'coluna': self.coluna_atual, 
-                    'itens': sorteados,
-                    'data': datetime.now().strftime("%d/%m/%Y %H:%M")
-                }
-                
-                self.historico.append({
-                    "data": datetime.now().strftime("%d/%m/%Y %H:%M"),
-                    "tipo": "Sorteio",
-                    "quantidade": quantidade,
-                    "coluna": self.coluna_atual,
-                    "itens": sorteados
-                })
-                self.atualizar_historico()
-                self.gerar_grafico()
+                with medidor.medir('sortear', linhas=len(self.dados_planilha), quantidade=quantidade):
+                    resultados, registro = motor_sorteio.sortear(
+                        self.dados_planilha, quantidade, self.coluna_atual,
+                        exclusao=self.exclusao_atual(motor_sorteio.TIPO_SORTEIO)
+                    )
+                self.registrar_resultado(resultados, registro)
                 
             except Exception as e:
                 QMessageBox.critical(self, "Erro", f"Falha ao sortear itens:\n{str(e)}")
@@ -271,100 +649,70 @@ class SorteadorApp(QMainWindow):
             ["Não", "Sim - Prêmios padrão", "Sim - Definir prêmios"], 0, False
         )
         
-        if ok:
-            try:
-                nomes = [item['nome'] for item in self.dados_planilha]
-                sorteados = random.sample(nomes, quantidade)
-                
-                premios = []
-                if premiar == "Sim - Prêmios padrão":
-                    premios = ["Ouro", "Prata", "Bronze"] + [f"Menção {i}" for i in range(4, quantidade+1)]
-                elif premiar == "Sim - Definir prêmios":
-                    premios = []
-                    for i in range(quantidade):
-                        premio, ok = QInputDialog.getText(
-                            self, f"Prêmio {i+1}º lugar", 
-                            f"Digite o prêmio para o {i+1}º lugar:"
-                        )
-                        if ok and premio:
-                            premios.append(premio)
-                
-                resultado = "🏆 RESULTADO COM COLOCAÇÃO:\n\n"
-                for posicao, item in enumerate(sorteados, 1):
-                    linha = f"{posicao}º lugar: {item}"
-                    if premios and posicao <= len(premios):
-                        linha += f" - Prêmio: {premios[posicao-1]}"
-                    resultado += linha + "\n"
-                
-                self.label_resultado.setText(resultado)
-                
-                self.resultados = {
-                    'tipo': 'Sorteio com Colocação', 
-                    'coluna': self.coluna_atual, 
-                    'itens': sorteados,
-                    'premios': premios if premios else None,
-                    'data': datetime.now().strftime("%d/%m/%Y %H:%M")
-                }
-                
-                self.historico.append({
-                    "data": datetime.now().strftime("%d/%m/%Y %H:%M"),
-                    "tipo": "Sorteio com Colocação",
-                    "quantidade": quantidade,
-                    "coluna": self.coluna_atual,
-                    "premiados": bool(premios),
-                    "itens": sorteados
-                })
-                
-                self.atualizar_historico()
-                self.gerar_grafico()
-                
-            except Exception as e:
-                QMessageBox.critical(self, "Erro", f"Falha ao sortear itens:\n{str(e)}")
+        try:
+            premios = []
+            if premiar == "Sim - Prêmios padrão":
+                premios = motor_sorteio.premios_padrao(quantidade)
+            elif premiar == "Sim - Definir prêmios":
+                for i in range(quantidade):
+                    premio, ok = QInputDialog.getText(
+                        self, f"Prêmio {i+1}º lugar", 
+                        f"Digite o prêmio para o {i+1}º lugar:"
+                    )
+                    if ok and premio:
+                        premios.append(premio)
+            
+            with medidor.medir('sortear_com_colocacao', linhas=len(self.dados_planilha), quantidade=quantidade):
+                resultados, registro = motor_sorteio.sortear_com_colocacao(
+                    self.dados_planilha, quantidade, self.coluna_atual, premios,
+                    exclusao=self.exclusao_atual(motor_sorteio.TIPO_COLOCACAO)
+                )
+            self.registrar_resultado(resultados, registro)
+            
+        except Exception as e:
+            QMessageBox.critical(self, "Erro", f"Falha ao sortear itens:\n{str(e)}")
 
     def criar_grupos(self):
         if not self.dados_planilha:
             QMessageBox.warning(self, "Aviso", "Carregue um Excel primeiro!")
             return
         
-        num_grupos, ok = QInputDialog.getInt(
-            self, "Formar Grupos", "Em quantos grupos dividir?",
+        divisao, ok = QInputDialog.getItem(
+            self, "Formar Grupos", "Como dividir?",
+            ["Número de grupos", "Tamanho de cada grupo"], 0, False
+        )
+        if not ok:
+            return
+
+        por_tamanho = divisao == "Tamanho de cada grupo"
+        valor, ok = QInputDialog.getInt(
+            self, "Formar Grupos",
+            "Máximo de itens por grupo?" if por_tamanho else "Em quantos grupos dividir?",
             min=1, max=len(self.dados_planilha), value=2
         )
-        
-        if ok:
-            try:
-                nomes = [item['nome'] for item in self.dados_planilha]
-                random.shuffle(nomes)
-                grupos = [[] for _ in range(num_grupos)]
-                
-                for i, item in enumerate(nomes):
-                    grupos[i % num_grupos].append(item)
-                
-                resultado = "🏆 GRUPOS CRIADOS:\n\n"
-                for i, grupo in enumerate(grupos, 1):
-                    resultado += f"Grupo {i} ({len(grupo)} itens):\n• " + "\n• ".join(grupo) + "\n\n"
-                
-                self.label_resultado.setText(resultado)
-                
-                self.resultados = {
-                    'tipo': 'Grupos', 
-                    'coluna': self.coluna_atual, 
-                    'grupos': grupos,
-                    'data': datetime.now().strftime("%d/%m/%Y %H:%M")
-                }
-                
-                self.historico.append({
-                    "data": datetime.now().strftime("%d/%m/%Y %H:%M"),
-                    "tipo": "Grupos",
-                    "num_grupos": num_grupos,
-                    "coluna": self.coluna_atual,
-                    "itens_por_grupo": [len(g) for g in grupos]
-                })
-                self.atualizar_historico()
-                self.gerar_grafico()
-                
-            except Exception as e:
-                QMessageBox.critical(self, "Erro", f"Falha ao criar grupos:\n{str(e)}")
+        if not ok:
+            return
+
+        estratificado = False
+        if self.dados_planilha.classificacoes_unicas():
+            equilibrar, ok = QInputDialog.getItem(
+                self, "Formar Grupos", "Equilibrar as classificações entre os grupos?",
+                ["Sim", "Não"], 0, False
+            )
+            if not ok:
+                return
+            estratificado = equilibrar == "Sim"
+
+        try:
+            with medidor.medir('criar_grupos', linhas=len(self.dados_planilha), estratificado=estratificado):
+                resultados, registro = motor_sorteio.formar_grupos(
+                    self.dados_planilha, None if por_tamanho else valor, self.coluna_atual,
+                    tamanho=valor if por_tamanho else None, estratificado=estratificado
+                )
+            self.registrar_resultado(resultados, registro)
+
+        except Exception as e:
+            QMessageBox.critical(self, "Erro", f"Falha ao criar grupos:\n{str(e)}")
 
     def sortear_por_classificacao(self):
         if not self.dados_planilha:
@@ -376,8 +724,7 @@ class SorteadorApp(QMainWindow):
             self.executar_sorteio()
             return
             
-        itens_classificacao = [item['nome'] for item in self.dados_planilha 
-                             if item.get('classificacao') == classificacao]
+        itens_classificacao = self.dados_planilha.indices_da_classificacao(classificacao)
         
         if not itens_classificacao:
             QMessageBox.warning(self, "Aviso", f"Nenhum item com classificação '{classificacao}'")
@@ -390,94 +737,217 @@ class SorteadorApp(QMainWindow):
             
         if ok:
             try:
-                sorteados = random.sample(itens_classificacao, quantidade)
-                resultado = f"🏷️ Itens da classificação '{classificacao}':\n\n• " + "\n• ".join(sorteados)
-                self.label_resultado.setText(resultado)
-                
-                self.resultados = {
-                    'tipo': 'Sorteio por Classificação', 
-                    'classificacao': classificacao, 
-                    'itens': sorteados,
-                    'data': datetime.now().strftime("%d/%m/%Y %H:%M")
-                }
-                
-                self.historico.append({
-                    "data": datetime.now().strftime("%d/%m/%Y %H:%M"),
-                    "tipo": "Sorteio por Classificação",
-                    "classificacao": classificacao,
-                    "quantidade": quantidade,
-                    "itens": sorteados
-                })
-                self.atualizar_historico()
+                with medidor.medir('sortear_por_classificacao', linhas=len(itens_classificacao), quantidade=quantidade):
+                    resultados, registro = motor_sorteio.sortear_por_classificacao(
+                        self.dados_planilha, classificacao, quantidade,
+                        exclusao=self.exclusao_atual(motor_sorteio.TIPO_CLASSIFICACAO, classificacao)
+                    )
+                self.registrar_resultado(resultados, registro)
                 
             except Exception as e:
                 QMessageBox.critical(self, "Erro", f"Falha ao sortear por classificação:\n{str(e)}")
 
+    def sortear_por_cotas(self):
+        if not self.dados_planilha:
+            QMessageBox.warning(self, "Aviso", "Carregue um Excel primeiro!")
+            return
+        
+        classificacoes = self.dados_planilha.classificacoes_unicas()
+        if not classificacoes:
+            QMessageBox.warning(self, "Aviso", "A coluna B não tem classificações!")
+            return
+        
+        texto, ok = QInputDialog.getMultiLineText(
+            self, "Sorteio por Cotas",
+            "Uma classificação por linha, no formato 'classificação: quantidade'.\n"
+            "Para premiar, acrescente '| prêmio 1, prêmio 2' ou '| padrao'.",
+            "\n".join(f"{classificacao}: 1" for classificacao in classificacoes)
+        )
+        if not ok:
+            return
+        
+        try:
+            cotas, premios = motor_sorteio.ler_cotas(texto.splitlines())
+            if not cotas:
+                return
+            with medidor.medir('sortear_por_cotas', linhas=len(self.dados_planilha), cotas=len(cotas)):
+                resultados, registro = motor_sorteio.sortear_por_cotas(
+                    self.dados_planilha, cotas, self.coluna_atual, premios,
+                    exclusao=self.exclusao_atual(motor_sorteio.TIPO_COTAS, cotas=cotas)
+                )
+            self.registrar_resultado(resultados, registro)
+            
+        except Exception as e:
+            QMessageBox.critical(self, "Erro", f"Falha ao sortear por cotas:\n{str(e)}")
+
+    def exclusao_atual(self, tipo, classificacao='', cotas=None):
+        """Vencedores a excluir do sorteio do tipo dado, conforme as opções.
+
+        Com o escopo da classificação, um sorteio por cotas exclui em cada
+        cota os vencedores daquela classificação; os sorteios sem
+        classificação avisam que excluirão os vencedores de qualquer uma.
+        """
+        if not self.check_exclusao.isChecked():
+            return None
+        # O servidor (servidor.py) pode ter sorteado desde a última leitura.
+        self.sincronizar_historico()
+        
+        dias = DIAS_EXCLUSAO[self.combo_exclusao_periodo.currentText()]
+        data_inicial = (datetime.now() - timedelta(days=dias)).strftime("%Y%m%d") if dias else ''
+        escopo = self.combo_exclusao_escopo.currentIndex()
+        if escopo == ESCOPO_MESMA_CLASSIFICACAO and cotas is not None:
+            return exclusao_por_classificacao(
+                self.indice_historico, escopo_exclusao(data_inicial, por_classificacao=True), cotas
+            )
+        if escopo == ESCOPO_MESMA_CLASSIFICACAO and not classificacao:
+            QMessageBox.warning(
+                self, "Aviso",
+                "Este sorteio não separa classificações: serão excluídos os vencedores de qualquer classificação."
+            )
+        return exclusao_do_historico(self.indice_historico, escopo_exclusao(
+            data_inicial,
+            tipo=tipo if escopo == ESCOPO_MESMO_TIPO else '',
+            classificacao=classificacao if escopo == ESCOPO_MESMA_CLASSIFICACAO else ''
+        ))
+
+    def registrar_resultado(self, resultados, registro):
+        with medidor.medir('exibir_resultado'):
+            self.anotar_origem(registro)
+            self.label_resultado.setText(motor_sorteio.formatar_resultado(resultados))
+            self.resultados = resultados
+            self.resultados_sessao.append(resultados)
+        
+        try:
+            with medidor.medir('salvar_historico'):
+                novas = self.arquivo_historico.registrar(registro)
+        except Exception as e:
+            novas = []
+            QMessageBox.warning(
+                self, 
+                "Aviso", 
+                f"Não foi possível salvar o histórico:\n{str(e)}"
+            )
+        
+        # O histórico em memória segue a ordem do arquivo: primeiro o que
+        # outro processo gravou antes, depois este registro.
+        if novas is None:
+            self.carregar_historico()
+            return
+        self.adicionar_ao_historico(*novas, registro)
+
+    def sincronizar_historico(self):
+        try:
+            novas = self.arquivo_historico.novas_entradas()
+        except OSError:
+            return
+        if novas is None:
+            self.carregar_historico()
+        else:
+            self.incorporar_historico(novas)
+
+    def incorporar_historico(self, registros):
+        if registros:
+            self.adicionar_ao_historico(*registros)
+
+    def anotar_origem(self, registro):
+        # Com a semente, estes campos permitem refazer o sorteio na auditoria.
+        if 'semente' not in registro or not (self.arquivo_excel or self.fontes_conjunto):
+            return
+        registro.setdefault('coluna', self.coluna_atual)
+        if self.coluna_peso:
+            registro['coluna_peso'] = self.coluna_peso
+        if self.politica_dedup:
+            registro['deduplicacao'] = self.politica_dedup
+        try:
+            if self.fontes_conjunto:
+                registro['fontes'] = [
+                    {'arquivo': arquivo, 'aba': aba, 'hash_arquivo': self.cache_planilhas.hash_do_arquivo(arquivo)}
+                    for arquivo, aba in self.fontes_conjunto
+                ]
+            else:
+                registro['arquivo'] = self.arquivo_excel
+                registro['hash_arquivo'] = self.cache_planilhas.hash_do_arquivo(self.arquivo_excel)
+        except OSError:
+            pass
+
+    def verificar_sorteio(self):
+        selecionadas = self.tabela_historico.selectionModel().selectedRows()
+        if not selecionadas:
+            QMessageBox.warning(self, "Aviso", "Selecione um sorteio no histórico!")
+            return
+        
+        linha = self.filtro_historico.mapToSource(selecionadas[0]).row()
+        registro = self.modelo_historico.registro(linha)
+        id_registro = len(self.historico) - 1 - linha
+        indice = indice_legado(self.historico[:id_registro]) if precisa_indice_legado(registro) else None
+        exclusao = exclusao_do_registro(registro, indice, id_registro)
+        situacao, detalhe = verificar_registro(registro, self.cache_planilhas, exclusao)
+        
+        texto = f"Sorteio de {registro.get('data', '?')}: {situacao}"
+        if detalhe:
+            texto += f"\n{detalhe}"
+        if situacao == VERIFICADO:
+            texto += f"\nSemente: {registro['semente']}"
+            QMessageBox.information(self, "Verificação", texto)
+        else:
+            QMessageBox.warning(self, "Verificação", texto)
+
     def exportar_resultados(self):
         if not self.resultados:
             QMessageBox.warning(self, "Aviso", "Nenhum resultado para exportar!")
             return
         
+        lista_resultados = [self.resultados]
+        if len(self.resultados_sessao) > 1:
+            opcao_sessao = f"Sessão inteira ({len(self.resultados_sessao)} sorteios)"
+            escopo, ok = QInputDialog.getItem(
+                self, "Exportar", "O que deseja exportar?",
+                ["Resultado atual", opcao_sessao], 0, False
+            )
+            if not ok:
+                return
+            if escopo == opcao_sessao:
+                lista_resultados = self.resultados_sessao
+        
+        self.salvar_exportacao(lista_resultados, "Resultados_Sorteio")
+
+    def exportar_historico_filtrado(self):
+        total = self.filtro_historico.rowCount()
+        if not total:
+            QMessageBox.warning(self, "Aviso", "Nenhum registro do histórico para exportar!")
+            return
+        
+        # Do mais antigo para o mais recente, um registro por vez.
+        registros = (
+            self.modelo_historico.registro(
+                self.filtro_historico.mapToSource(self.filtro_historico.index(linha, 0)).row()
+            )
+            for linha in reversed(range(total))
+        )
+        self.salvar_exportacao(registros, "Historico_Sorteios")
+
+    def salvar_exportacao(self, lista_resultados, prefixo):
         try:
             diretorio_padrao = str(Path.home() / "Documents")
-            nome_padrao = f"Resultados_Sorteio_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
+            nome_padrao = f"{prefixo}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
             caminho_padrao = os.path.join(diretorio_padrao, nome_padrao)
             
-            arquivo, _ = QFileDialog.getSaveFileName(
+            arquivo, filtro = QFileDialog.getSaveFileName(
                 self, 
                 "Salvar Resultados", 
                 caminho_padrao,
-                "Excel (*.xlsx);;Todos os arquivos (*)"
+                "Excel (*.xlsx);;CSV (*.csv);;JSON Lines (*.jsonl);;JSON (*.json)"
             )
             
             if not arquivo:
                 return
             
-            if not arquivo.lower().endswith('.xlsx'):
-                arquivo += '.xlsx'
+            if os.path.splitext(arquivo)[1].lower() not in EXPORTADORES:
+                arquivo += filtro[filtro.find('*') + 1:-1] if '*.' in filtro else '.xlsx'
             
             os.makedirs(os.path.dirname(arquivo), exist_ok=True)
             
-            wb = Workbook()
-            planilha = wb.active
-            
-            planilha.append(["RESULTADOS DO SORTEIO"])
-            planilha.append(["Data:", self.resultados.get('data', datetime.now().strftime("%d/%m/%Y %H:%M"))])
-            
-            if 'coluna' in self.resultados:
-                planilha.append(["Coluna:", self.resultados['coluna']])
-            if 'classificacao' in self.resultados:
-                planilha.append(["Classificação:", self.resultados['classificacao']])
-            
-            planilha.append([])
-            
-            if self.resultados['tipo'] == 'Sorteio':
-                planilha.append(["Itens Sorteados"])
-                for item in self.resultados['itens']:
-                    planilha.append([item])
-            
-            elif self.resultados['tipo'] == 'Sorteio com Colocação':
-                planilha.append(["Itens Sorteados com Colocação"])
-                for posicao, item in enumerate(self.resultados['itens'], 1):
-                    linha = [f"{posicao}º lugar: {item}"]
-                    if self.resultados.get('premios') and posicao <= len(self.resultados['premios']):
-                        linha.append(f"Prêmio: {self.resultados['premios'][posicao-1]}")
-                    planilha.append(linha)
-            
-            elif self.resultados['tipo'] == 'Grupos':
-                planilha.append(["Grupos Criados"])
-                for i, grupo in enumerate(self.resultados['grupos'], 1):
-                    planilha.append([f"Grupo {i}"])
-                    for item in grupo:
-                        planilha.append([item])
-                    planilha.append([])
-            
-            elif self.resultados['tipo'] == 'Sorteio por Classificação':
-                planilha.append([f"Itens da Classificação: {self.resultados['classificacao']}"])
-                for item in self.resultados['itens']:
-                    planilha.append([item])
-            
-            wb.save(arquivo)
+            exportar(lista_resultados, arquivo)
             QMessageBox.information(
                 self, 
                 "Sucesso", 
@@ -498,18 +968,35 @@ class SorteadorApp(QMainWindow):
             )
 
     def carregar_historico(self):
+        # Todos os registros ficam na memória, porque o modelo, o índice e a
+        # verificação usam o histórico inteiro; a compactação arquiva o que
+        # passa de LIMITE_ENTRADAS (100 mil registros), o que limita o custo.
+        # Os lotes do gerador já entram no índice e no modelo, sem uma
+        # segunda passada sobre a lista pronta.
         try:
-            caminho_historico = Path.home() / "Documents" / "Sorteador_historico.json"
+            with medidor.medir('carregar_historico') as detalhes:
+                self.historico = []
+                self.indice_historico.reconstruir(self.historico)
+                self.modelo_historico.definir(self.historico)
+                entradas = self.arquivo_historico.entradas()
+                while lote := list(islice(entradas, LOTE_HISTORICO)):
+                    for registro in lote:
+                        self.indice_historico.adicionar(registro)
+                    self.modelo_historico.acrescentar(lote)
+                detalhes['registros'] = len(self.historico)
             
-            if caminho_historico.exists():
-                with open(caminho_historico, "r", encoding='utf-8') as f:
-                    dados = json.load(f)
-                    if isinstance(dados, list):
-                        self.historico = dados
-                    else:
-                        self.historico = []
+            if self.arquivo_historico.linhas_invalidas:
+                QMessageBox.warning(
+                    self, 
+                    "Aviso", 
+                    f"{self.arquivo_historico.linhas_invalidas} registro(s) corrompido(s) "
+                    "do histórico foram ignorados e serão removidos."
+                )
+            if self.arquivo_historico.precisa_compactar():
+                with medidor.medir('compactar_historico'):
+                    self.arquivo_historico.compactar()
             
-            self.atualizar_historico()
+            self.exibir_historico()
             
         except json.JSONDecodeError:
             QMessageBox.warning(
@@ -518,6 +1005,7 @@ class SorteadorApp(QMainWindow):
                 "O arquivo de histórico está corrompido. Um novo será criado."
             )
             self.historico = []
+            self.atualizar_historico()
         except Exception as e:
             QMessageBox.warning(
                 self, 
@@ -525,46 +1013,103 @@ class SorteadorApp(QMainWindow):
                 f"Não foi possível carregar o histórico:\n{str(e)}"
             )
             self.historico = []
+            self.atualizar_historico()
 
     def atualizar_historico(self):
-        try:
-            texto = "📅 Histórico de Sorteios:\n\n"
-            
-            if not self.historico:
-                texto += "Nenhum registro no histórico."
-            else:
-                for i, item in enumerate(reversed(self.historico), 1):
-                    texto += f"{i}. {item.get('data', 'Data desconhecida')} - "
-                    
-                    if item.get("tipo") == "Grupos":
-                        texto += (
-                            f"{item.get('num_grupos', '?')} grupos "
-                            f"(Coluna: {item.get('coluna', '?')}, "
-                            f"Itens por grupo: {item.get('itens_por_grupo', [])})\n"
-                        )
-                    elif item.get("tipo") == "Sorteio por Classificação":
-                        texto += (
-                            f"{item.get('quantidade', '?')} itens da classificação "
-                            f"'{item.get('classificacao', 'Desconhecida')}'\n"
-                        )
-                    elif item.get("tipo") == "Sorteio com Colocação":
-                        texto += (
-                            f"{item.get('quantidade', '?')} itens sorteados com colocação "
-                            f"(Coluna: {item.get('coluna', '?')})"
-                        )
-                        if item.get("premiados"):
-                            texto += " [COM PRÊMIOS]"
-                        texto += "\n"
-                    else:
-                        texto += (
-                            f"{item.get('quantidade', '?')} itens sorteados "
-                            f"(Coluna: {item.get('coluna', '?')})\n"
-                        )
-            
-            self.label_historico.setText(texto)
-            
-        except Exception as e:
-            self.label_historico.setText(f"Erro ao carregar histórico: {str(e)}")
+        with medidor.medir('atualizar_historico', registros=len(self.historico)):
+            self.indice_historico.reconstruir(self.historico)
+            self.modelo_historico.definir(self.historico)
+            self.exibir_historico()
+
+    def exibir_historico(self):
+        self.atualizar_filtros_historico()
+        self.atualizar_resumo_historico()
+        self.gerar_grafico()
+
+    def adicionar_ao_historico(self, *registros):
+        # Os registros entram no índice e no modelo (que os acrescenta a
+        # self.historico); os filtros, o resumo e o gráfico são refeitos uma
+        # vez para o lote.
+        for registro in registros:
+            self.indice_historico.adicionar(registro)
+        self.modelo_historico.acrescentar(list(registros))
+        if self.busca_historico.text().strip():
+            self.aplicar_filtro_historico()
+        if any(registro.get('tipo', '') not in self.opcoes_filtro_tipo
+               or registro.get('coluna', '') not in self.opcoes_filtro_coluna for registro in registros):
+            self.atualizar_filtros_historico()
+        self.atualizar_resumo_historico()
+        self.gerar_grafico()
+
+    def atualizar_filtros_historico(self):
+        self.opcoes_filtro_tipo = set(self.modelo_historico.tipos)
+        self.opcoes_filtro_coluna = set(self.modelo_historico.colunas) | {''}
+        
+        for combo, valores in ((self.combo_filtro_tipo, self.modelo_historico.tipos),
+                               (self.combo_filtro_coluna, self.modelo_historico.colunas)):
+            selecionado = combo.currentText() if combo.currentIndex() > 0 else None
+            combo.blockSignals(True)
+            while combo.count() > 1:
+                combo.removeItem(1)
+            combo.addItems(sorted(v for v in valores if v))
+            if selecionado:
+                combo.setCurrentText(selecionado)
+            combo.blockSignals(False)
+
+    def aplicar_filtro_historico(self):
+        tipo = self.combo_filtro_tipo.currentText() if self.combo_filtro_tipo.currentIndex() > 0 else None
+        coluna = self.combo_filtro_coluna.currentText() if self.combo_filtro_coluna.currentIndex() > 0 else None
+        data_inicial = data_final = ''
+        if self.check_filtro_data.isChecked():
+            data_inicial = self.data_filtro_inicial.date().toString("yyyyMMdd")
+            data_final = self.data_filtro_final.date().toString("yyyyMMdd")
+        
+        nome = self.busca_historico.text().strip()
+        ids = set(self.indice_historico.sorteios_de(nome)) if nome else None
+        
+        self.filtro_historico.filtrar(tipo, coluna, data_inicial, data_final, ids)
+        self.atualizar_resumo_historico()
+        
+        if nome:
+            ano = QDate.currentDate().toString("yyyy")
+            no_ano = self.indice_historico.vezes_sorteado(nome, ano + "0101", ano + "1231")
+            self.label_historico.setText(
+                self.label_historico.text() +
+                f"\n🔍 '{nome}' foi sorteado em {len(ids)} sorteio(s), {no_ano} em {ano}."
+            )
+
+    def mostrar_estatisticas(self):
+        indice = self.indice_historico
+        if not indice.total:
+            QMessageBox.information(self, "Estatísticas", "Nenhum registro no histórico.")
+            return
+        
+        texto = f"📈 {indice.total} sorteios registrados\n\n🏅 Mais sorteados:\n"
+        texto += "\n".join(f"  {nome}: {total}" for nome, total in indice.mais_sorteados(10))
+        
+        classificacoes = indice.classificacoes_mais_vencedoras(10)
+        if classificacoes:
+            texto += "\n\n🏷️ Classificações que mais vencem:\n"
+            texto += "\n".join(f"  {cls}: {total}" for cls, total in classificacoes)
+        
+        texto += "\n\n📅 Sorteios por mês:\n"
+        texto += "\n".join(
+            f"  {mes[4:6]}/{mes[:4]}: {total}"
+            for mes, total in list(indice.contagem_por_mes().items())[-12:] if mes
+        )
+        QMessageBox.information(self, "Estatísticas", texto)
+
+    def atualizar_resumo_historico(self):
+        total = len(self.historico)
+        if not total:
+            self.label_historico.setText("📅 Histórico de Sorteios: Nenhum registro no histórico.")
+            return
+        
+        exibidos = self.filtro_historico.rowCount()
+        texto = f"📅 Histórico de Sorteios: {total} registros"
+        if exibidos != total:
+            texto += f" ({exibidos} exibidos)"
+        self.label_historico.setText(texto)
 
     def limpar_historico(self):
         resposta = QMessageBox.question(
@@ -579,9 +1124,7 @@ class SorteadorApp(QMainWindow):
             self.atualizar_historico()
             
             try:
-                caminho_historico = Path.home() / "Documents" / "Sorteador_historico.json"
-                if caminho_historico.exists():
-                    caminho_historico.unlink()
+                self.arquivo_historico.limpar()
             except Exception as e:
                 QMessageBox.warning(
                     self, 
@@ -590,67 +1133,80 @@ class SorteadorApp(QMainWindow):
                 )
 
     def gerar_grafico(self):
-        self.figure.clear()
-        ax = self.figure.add_subplot(111)
-        
-        if not self.dados_planilha:
-            ax.text(0.5, 0.5, "Sem dados para exibir", ha='center', va='center')
-            ax.set_title("Nenhum dado carregado")
-        else:
-            classificacoes = [item.get('classificacao', '') 
-                            for item in self.dados_planilha 
-                            if item.get('classificacao', '')]
-            
-            if classificacoes:
-                contagem_class = {}
-                for cls in classificacoes:
-                    contagem_class[cls] = contagem_class.get(cls, 0) + 1
-                
-                if len(contagem_class) > 1:
-                    ax.pie(
-                        contagem_class.values(),
-                        labels=contagem_class.keys(),
-                        autopct=lambda p: f'{p:.1f}%\n({int(p*sum(contagem_class.values()))/100})',
-                        startangle=90,
-                        textprops={'fontsize': 8}
-                    )
-                    ax.set_title(f"Distribuição por Classificação\nColuna {self.coluna_atual}")
-                else:
-                    self.plotar_distribuicao_letras(ax)
+        # Fora da aba de gráficos não há o que desenhar; ao aparecer, a aba
+        # chama de novo. Sem mudança nos dados, o canvas não é redesenhado.
+        if self.canvas is None or self.tabs.currentWidget() is not self.aba_graficos:
+            return
+        with medidor.medir('gerar_grafico', grafico=self.combo_grafico.currentText()) as detalhes:
+            if self.combo_grafico.currentIndex() == 1:
+                agregado = agregado_das_vitorias(self.indice_historico)
             else:
-                self.plotar_distribuicao_letras(ax)
-        
-        self.canvas.draw()
+                agregado = agregado_do_grafico(self.dados_planilha, self.coluna_atual)
+            detalhes['redesenhado'] = self.grafico.atualizar(agregado)
+            if detalhes['redesenhado']:
+                self.canvas.draw_idle()
 
-    def plotar_distribuicao_letras(self, ax):
-        letras = [nome[0].upper() for nome in 
-                 [item['nome'] for item in self.dados_planilha if item['nome']]]
-        contagem_letras = {}
-        
-        for letra in letras:
-            contagem_letras[letra] = contagem_letras.get(letra, 0) + 1
-        
-        ax.bar(contagem_letras.keys(), contagem_letras.values())
-        ax.set_xlabel("Letra Inicial")
-        ax.set_ylabel("Quantidade")
-        ax.set_title(f"Distribuição por Letra Inicial\nColuna {self.coluna_atual}")
+    def atualizar_desempenho(self):
+        texto = f"Planilha atual: {self.dados_planilha.tamanho_em_bytes() / 2**20:.1f} MB  |  " \
+                f"Cache de planilhas: {self.cache_planilhas.bytes_usados / 2**20:.1f} MB"
+        if medidor.capturando:
+            texto += f"  |  Memória rastreada (tracemalloc): {tracemalloc.get_traced_memory()[0] / 2**20:.1f} MB"
+        self.label_memoria.setText(texto)
         
-        for i, v in enumerate(contagem_letras.values()):
-            ax.text(i, v + 0.5, str(v), ha='center')
+        barra = self.texto_desempenho.verticalScrollBar()
+        posicao = barra.value()
+        self.texto_desempenho.setPlainText(medidor.texto())
+        barra.setValue(posicao)
 
-    def closeEvent(self, event):
+    def alternar_captura(self, ligar):
+        if ligar:
+            medidor.iniciar_captura()
+        else:
+            medidor.parar_captura()
+        self.atualizar_desempenho()
+
+    def limpar_medicoes(self):
+        medidor.limpar()
+        self.atualizar_desempenho()
+
+    def exportar_trace(self):
+        nome_padrao = f"Sorteador_trace_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        arquivo, _ = QFileDialog.getSaveFileName(
+            self,
+            "Exportar Trace",
+            os.path.join(str(Path.home() / "Documents"), nome_padrao),
+            "Trace JSON (*.json)"
+        )
+        if not arquivo:
+            return
+        
         try:
-            caminho_historico = Path.home() / "Documents" / "Sorteador_historico.json"
-            
-            with open(caminho_historico, "w", encoding='utf-8') as f:
-                json.dump(self.historico, f, indent=4, ensure_ascii=False)
-                
-        except Exception as e:
-            QMessageBox.warning(
-                self, 
-                "Aviso", 
-                f"Não foi possível salvar o histórico:\n{str(e)}"
+            # O perfil da captura em andamento só é gravado depois de parada.
+            self.check_captura.setChecked(False)
+            gravados = medidor.exportar(arquivo)
+            QMessageBox.information(
+                self,
+                "Sucesso",
+                "Trace exportado (abre no chrome://tracing ou em ui.perfetto.dev):\n" + "\n".join(gravados)
             )
+        except Exception as e:
+            QMessageBox.critical(self, "Erro", f"Falha ao exportar o trace:\n{str(e)}")
+
+    def closeEvent(self, event):
+        with medidor.medir('closeEvent', threads=len(self.threads_carregamento)):
+            for thread, carregamento in list(self.threads_carregamento.items()):
+                carregamento.cancelar()
+                thread.wait()
+        
+        # Com a captura ligada (investigando uma lentidão), o trace da sessão
+        # é gravado ao fechar, sem depender de exportar antes.
+        if medidor.capturando:
+            medidor.parar_captura()
+            try:
+                medidor.exportar(str(Path.home() / "Documents" /
+                                     f"Sorteador_trace_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"))
+            except OSError:
+                pass
         
         event.accept()
 
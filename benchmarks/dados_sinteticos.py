@@ -0,0 +1,157 @@
+"""Gera planilhas de participantes e históricos sintéticos para os benchmarks.
+
+Uso:
+    python -m benchmarks.dados_sinteticos planilha participantes.xlsx --linhas 100000 --classificacoes 20
+    python -m benchmarks.dados_sinteticos planilha participantes.csv --linhas 1000000 --duplicados 0.1
+    python -m benchmarks.dados_sinteticos historico pasta/ --registros 50000
+
+Roda como módulo, a partir da raiz do projeto, para importar os módulos do
+aplicativo.
+
+As planilhas têm o formato lido pelo aplicativo: nome na coluna A,
+classificação na B e peso (bilhetes) na C, com cabeçalho na linha 1. O
+histórico é gravado como Sorteador_historico.jsonl dentro da pasta. Com a
+mesma semente, os arquivos gerados são idênticos.
+"""
+import argparse
+import csv
+import json
+import os
+import random
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from historico import NOME_ARQUIVO
+from motor_sorteio import TIPO_CLASSIFICACAO, TIPO_COLOCACAO, TIPO_GRUPOS, TIPO_SORTEIO
+
+CABECALHO = ["Nome", "Classificação", "Peso"]
+SEM_CLASSIFICACAO = 0.1
+ACENTOS = str.maketrans("aeiou", "áéíóú")
+
+
+def nome_participante(numero):
+    return f"Participante {numero:07d}"
+
+
+def linhas_sinteticas(linhas, classificacoes=10, duplicados=0.0, semente=0):
+    """Gera (nome, classificação, peso) de linhas participantes.
+
+    As classificações seguem uma distribuição de Zipf (umas muito maiores
+    que outras, como em listas reais) e 10% das linhas vêm sem. Uma fração
+    duplicados das linhas repete um nome anterior, às vezes com outra
+    grafia, para exercitar a deduplicação.
+    """
+    rng = random.Random(semente)
+    rotulos = [f"Classe {k:04d}" for k in range(1, classificacoes + 1)]
+    pesos_zipf = [1 / k for k in range(1, classificacoes + 1)]
+
+    for numero in range(linhas):
+        if numero and rng.random() < duplicados:
+            nome = nome_participante(rng.randrange(numero))
+            if rng.random() < 0.5:
+                nome = f"  {nome.upper().translate(ACENTOS)}."
+        else:
+            nome = nome_participante(numero)
+
+        classificacao = ''
+        if rotulos and rng.random() >= SEM_CLASSIFICACAO:
+            classificacao = rng.choices(rotulos, pesos_zipf)[0]
+        yield nome, classificacao, rng.randint(1, 10)
+
+
+def gerar_planilha(caminho, linhas, classificacoes=10, duplicados=0.0, semente=0):
+    """Grava a planilha em .xlsx (openpyxl em modo write_only), .csv (';') ou .tsv."""
+    caminho = Path(caminho)
+    dados = linhas_sinteticas(linhas, classificacoes, duplicados, semente)
+    extensao = caminho.suffix.lower()
+
+    if extensao in ('.xlsx', '.xlsm'):
+        from openpyxl import Workbook
+
+        wb = Workbook(write_only=True)
+        planilha = wb.create_sheet("Participantes")
+        planilha.append(CABECALHO)
+        for linha in dados:
+            planilha.append(linha)
+        wb.save(caminho)
+    elif extensao in ('.csv', '.tsv', '.txt'):
+        with open(caminho, 'w', encoding='utf-8', newline='') as f:
+            escritor = csv.writer(f, delimiter='\t' if extensao == '.tsv' else ';')
+            escritor.writerow(CABECALHO)
+            escritor.writerows(dados)
+    else:
+        raise ValueError(f"Formato não suportado: {extensao or caminho.name}")
+    return caminho
+
+
+def registros_sinteticos(registros, participantes=10000, classificacoes=10, semente=0):
+    """Registros no formato do histórico, em ordem cronológica a partir de 2020."""
+    rng = random.Random(semente)
+    rotulos = [f"Classe {k:04d}" for k in range(1, classificacoes + 1)] or ['']
+    data = datetime(2020, 1, 1, 8, 0)
+    passo = timedelta(minutes=max(1, 5 * 365 * 24 * 60 // max(registros, 1)))
+
+    for _ in range(registros):
+        data += passo
+        texto_data = data.strftime("%d/%m/%Y %H:%M")
+        tipo = rng.choice((TIPO_SORTEIO, TIPO_COLOCACAO, TIPO_GRUPOS, TIPO_CLASSIFICACAO))
+
+        if tipo == TIPO_GRUPOS:
+            num_grupos = rng.randint(2, 8)
+            por_grupo = participantes // num_grupos
+            yield {"data": texto_data, "tipo": tipo, "num_grupos": num_grupos, "coluna": "A",
+                   "itens_por_grupo": [por_grupo] * num_grupos}
+            continue
+
+        quantidade = rng.randint(1, 10)
+        itens = [nome_participante(i) for i in rng.sample(range(participantes), quantidade)]
+        registro = {"data": texto_data, "tipo": tipo, "quantidade": quantidade, "coluna": "A", "itens": itens}
+        if tipo == TIPO_CLASSIFICACAO:
+            registro["classificacao"] = rng.choice(rotulos)
+        else:
+            registro["classificacoes"] = [rng.choice(rotulos) for _ in itens]
+        if tipo == TIPO_COLOCACAO:
+            registro["premiados"] = rng.random() < 0.5
+        yield registro
+
+
+def gerar_historico(diretorio, registros, participantes=10000, classificacoes=10, semente=0):
+    """Grava o histórico direto em JSON Lines (sem o fsync por registro do aplicativo)."""
+    diretorio = Path(diretorio)
+    os.makedirs(diretorio, exist_ok=True)
+    caminho = diretorio / NOME_ARQUIVO
+    with open(caminho, 'w', encoding='utf-8') as f:
+        for registro in registros_sinteticos(registros, participantes, classificacoes, semente):
+            f.write(json.dumps(registro, ensure_ascii=False) + "\n")
+    return caminho
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    subparsers = parser.add_subparsers(dest='tipo', required=True)
+
+    p_planilha = subparsers.add_parser('planilha', help="Planilha de participantes (.xlsx, .csv, .tsv)")
+    p_planilha.add_argument('caminho')
+    p_planilha.add_argument('-l', '--linhas', type=int, default=10000)
+    p_planilha.add_argument('-c', '--classificacoes', type=int, default=10, help="Classificações distintas")
+    p_planilha.add_argument('-d', '--duplicados', type=float, default=0.0, help="Fração de nomes repetidos")
+    p_planilha.add_argument('-s', '--semente', type=int, default=0)
+
+    p_historico = subparsers.add_parser('historico', help="Histórico em JSON Lines")
+    p_historico.add_argument('diretorio')
+    p_historico.add_argument('-r', '--registros', type=int, default=10000)
+    p_historico.add_argument('-p', '--participantes', type=int, default=10000)
+    p_historico.add_argument('-c', '--classificacoes', type=int, default=10)
+    p_historico.add_argument('-s', '--semente', type=int, default=0)
+
+    args = parser.parse_args(argv)
+    if args.tipo == 'planilha':
+        caminho = gerar_planilha(args.caminho, args.linhas, args.classificacoes, args.duplicados, args.semente)
+    else:
+        caminho = gerar_historico(args.diretorio, args.registros, args.participantes,
+                                  args.classificacoes, args.semente)
+    print(caminho)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""Mede tempo e pico de memória das etapas do aplicativo com dados sintéticos.
+
+Uso:
+    python -m benchmarks.estagios [--linhas 1000 100000] [--formatos csv xlsx] [--classificacoes 20]
+        [--registros 10000] [--repeticoes 3] [--dados pasta] [--json resultado.json]
+        [--comparar anterior.json] [--tolerancia 0.1]
+
+Para cada formato e tamanho, gera uma planilha (em --dados, reaproveitada
+entre execuções, ou numa pasta temporária) e mede: leitura direta, leitura
+pelo cache em disco, troca para uma coluna de peso, deduplicação, sorteios,
+cotas, grupos e exportação. Com --registros, gera também um histórico e
+mede a carga dele na janela, com a plataforma Qt "offscreen".
+
+O tempo é a mediana das repetições. O pico de memória vem de uma execução a
+mais sob tracemalloc, que vê as alocações do Python e do NumPy. Com
+--comparar, cada etapa é comparada com a mesma etapa do JSON anterior e o
+código de saída é 1 se alguma ficar mais lenta que a tolerância.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from functools import partial
+from pathlib import Path
+
+import motor_sorteio
+from benchmarks.dados_sinteticos import gerar_historico, gerar_planilha
+from cache_disco import CacheDisco
+from cache_planilhas import CachePlanilhas
+from exportacao import exportar
+from historico import HistoricoSorteios
+from leitura import ler_planilha
+from normalizacao import DEDUP_PESO, deduplicar, linhas_da_tabela
+
+RESULTADOS_EXPORTADOS = 200
+ITENS_SORTEADOS = 10
+NUM_GRUPOS = 10
+# Abaixo disso, a variação entre execuções é ruído e não conta como regressão.
+MINIMO_COMPARAVEL_S = 0.001
+
+
+def medir(funcao, repeticoes, memoria=True):
+    # Uma chamada fora da conta: imports preguiçosos (numpy, openpyxl) e
+    # caches de primeira chamada não entram na mediana.
+    funcao()
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+
+    medicao = {'mediana_s': statistics.median(tempos), 'minimo_s': min(tempos), 'repeticoes': repeticoes}
+    if memoria:
+        gc.collect()
+        tracemalloc.start()
+        try:
+            funcao()
+            medicao['pico_memoria_bytes'] = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return medicao
+
+
+def planilha_sintetica(pasta, formato, linhas, classificacoes):
+    caminho = Path(pasta) / f"participantes_{linhas}_{classificacoes}.{formato}"
+    if not caminho.exists():
+        gerar_planilha(caminho, linhas, classificacoes, duplicados=0.05)
+    return caminho
+
+
+def etapas_da_planilha(arquivo, pasta):
+    """{etapa: função sem argumentos} sobre a planilha sintética."""
+    disco = CacheDisco(Path(pasta) / "cache")
+    CachePlanilhas(disco=disco).obter(arquivo)
+    _, _, tabela = ler_planilha(arquivo, 'A')
+    _, _, ponderada = ler_planilha(arquivo, 'A', coluna_peso='C')
+    cotas = {classificacao: 1 for classificacao in tabela.classificacoes_unicas()}
+    sessao = [motor_sorteio.sortear(tabela, ITENS_SORTEADOS, 'A', semente=i)[0]
+              for i in range(RESULTADOS_EXPORTADOS)]
+
+    def carregar_cache_disco():
+        # Cache em memória vazio: o retrato sai do disco, como ao reabrir o aplicativo.
+        CachePlanilhas(disco=disco).obter(arquivo)
+
+    def deduplicar_tabela():
+        deduplicar(linhas_da_tabela(tabela), DEDUP_PESO)
+
+    etapas = {
+        'carregar_excel': partial(ler_planilha, arquivo),
+        'carregar_cache_disco': carregar_cache_disco,
+        'processar_dados_excel': partial(ler_planilha, arquivo, 'A', coluna_peso='C'),
+        'deduplicar': deduplicar_tabela,
+        'sortear': partial(motor_sorteio.sortear, tabela, ITENS_SORTEADOS, 'A'),
+        'sortear_ponderado': partial(motor_sorteio.sortear, ponderada, ITENS_SORTEADOS, 'A'),
+        'sortear_por_cotas': partial(motor_sorteio.sortear_por_cotas, tabela, cotas, 'A'),
+        'criar_grupos': partial(motor_sorteio.formar_grupos, tabela, NUM_GRUPOS, 'A'),
+        'criar_grupos_estratificados': partial(
+            motor_sorteio.formar_grupos, tabela, NUM_GRUPOS, 'A', estratificado=True
+        ),
+    }
+    for extensao in ('xlsx', 'csv', 'jsonl'):
+        etapas[f'exportar_resultados_{extensao}'] = partial(exportar, sessao, Path(pasta) / f"sessao.{extensao}")
+    return etapas
+
+
+def etapas_do_historico(pasta, registros):
+    """Carga do histórico na janela, com Qt offscreen."""
+    diretorio = Path(pasta) / f"historico_{registros}"
+    if not (diretorio / "Sorteador_historico.jsonl").exists():
+        gerar_historico(diretorio, registros)
+
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PyQt6.QtWidgets import QApplication
+
+    aplicacao = QApplication.instance() or QApplication(sys.argv[:1])
+    import appsorteio
+
+    janela = appsorteio.SorteadorApp()
+    janela.arquivo_historico = HistoricoSorteios(diretorio)
+    janela.aplicacao = aplicacao
+    return {'atualizar_historico': janela.carregar_historico}
+
+
+def comparar(atual, anterior, tolerancia):
+    """Imprime a variação de cada etapa e retorna as que ficaram mais lentas."""
+    regressoes = []
+    print(f"\nComparação com {anterior.get('data', 'o resultado anterior')}:")
+    for chave, medicao in atual['etapas'].items():
+        antes = anterior.get('etapas', {}).get(chave)
+        if not antes or not antes['mediana_s']:
+            continue
+        razao = medicao['mediana_s'] / antes['mediana_s']
+        lenta = razao > 1 + tolerancia and medicao['mediana_s'] >= MINIMO_COMPARAVEL_S
+        marca = "  <- mais lenta" if lenta else ""
+        print(f"  {chave:<50} {antes['mediana_s'] * 1000:10.1f} -> {medicao['mediana_s'] * 1000:10.1f} ms"
+              f"  {razao - 1:+7.1%}{marca}")
+        if marca:
+            regressoes.append(chave)
+    return regressoes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('-l', '--linhas', type=int, nargs='+', default=[1000, 100000])
+    parser.add_argument('-f', '--formatos', nargs='+', default=['csv', 'xlsx'], choices=['csv', 'tsv', 'xlsx'])
+    parser.add_argument('-c', '--classificacoes', type=int, default=20)
+    parser.add_argument('-r', '--registros', type=int, nargs='*', default=[10000],
+                        help="Tamanhos de histórico (nenhum para pular a etapa com Qt)")
+    parser.add_argument('-n', '--repeticoes', type=int, default=3)
+    parser.add_argument('--dados', help="Pasta para guardar e reaproveitar os dados gerados")
+    parser.add_argument('--sem-memoria', action='store_true', help="Não mede o pico de memória")
+    parser.add_argument('--json', help="Grava o resultado em JSON neste arquivo")
+    parser.add_argument('--comparar', help="JSON de uma execução anterior")
+    parser.add_argument('--tolerancia', type=float, default=0.10, help="Aumento aceito na comparação (0.10 = 10%%)")
+    args = parser.parse_args(argv)
+
+    resultado = {
+        'data': datetime.now().isoformat(timespec='seconds'),
+        'python': sys.version.split()[0],
+        'plataforma': platform.platform(),
+        'parametros': vars(args),
+        'etapas': {},
+    }
+
+    with tempfile.TemporaryDirectory() as temporaria:
+        pasta = Path(args.dados or temporaria)
+        pasta.mkdir(parents=True, exist_ok=True)
+
+        grupos = [(f"{formato}-{linhas}", partial(etapas_da_planilha, planilha_sintetica(
+                      pasta, formato, linhas, args.classificacoes), temporaria))
+                  for formato in args.formatos for linhas in args.linhas]
+        grupos += [(f"historico-{registros}", partial(etapas_do_historico, pasta, registros))
+                   for registros in args.registros]
+
+        for prefixo, preparar in grupos:
+            print(f"{prefixo}:")
+            for etapa, funcao in preparar().items():
+                medicao = medir(funcao, args.repeticoes, not args.sem_memoria)
+                resultado['etapas'][f"{prefixo}/{etapa}"] = medicao
+                memoria = medicao.get('pico_memoria_bytes')
+                print(f"  {etapa:<32} {medicao['mediana_s'] * 1000:10.1f} ms"
+                      + (f"  {memoria / 2**20:8.1f} MB" if memoria is not None else ""))
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(resultado, f, indent=4, ensure_ascii=False)
+
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as f:
+            anterior = json.load(f)
+        if comparar(resultado, anterior, args.tolerancia):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,129 @@
+"""Mede o tempo até a primeira janela e o custo de importação do appsorteio.
+
+Uso:
+    python benchmarks/tempo_inicializacao.py [--repeticoes 5] [--top 15] [--json saida.json]
+
+Cada medição roda num processo novo (início a frio do interpretador). Por
+padrão usa a plataforma Qt "offscreen", para rodar sem monitor.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+
+CODIGO_JANELA = """
+import json, sys, time
+inicio = time.time()
+from PyQt6.QtCore import QTimer
+from PyQt6.QtWidgets import QApplication
+app = QApplication(sys.argv)
+import appsorteio
+importado = time.time()
+janela = appsorteio.SorteadorApp()
+janela.show()
+
+def primeira_janela():
+    print(json.dumps({
+        'inicio_script': inicio,
+        'importado': importado,
+        'janela': time.time(),
+        'modulos': sorted(m for m in ('matplotlib', 'openpyxl', 'numpy') if m in sys.modules),
+    }))
+    app.quit()
+
+QTimer.singleShot(0, primeira_janela)
+app.exec()
+"""
+
+
+def ambiente(plataforma):
+    env = dict(os.environ)
+    if plataforma:
+        env['QT_QPA_PLATFORM'] = plataforma
+    return env
+
+
+def medir_primeira_janela(plataforma):
+    antes = time.time()
+    saida = subprocess.run(
+        [sys.executable, '-c', CODIGO_JANELA],
+        cwd=RAIZ, env=ambiente(plataforma), capture_output=True, text=True, check=True
+    ).stdout
+    marcas = json.loads(saida.strip().splitlines()[-1])
+    return {
+        'primeira_janela_s': marcas['janela'] - antes,
+        'interpretador_s': marcas['inicio_script'] - antes,
+        'importacoes_s': marcas['importado'] - marcas['inicio_script'],
+        'construcao_janela_s': marcas['janela'] - marcas['importado'],
+        'modulos_pesados_carregados': marcas['modulos'],
+    }
+
+
+def medir_importtime(plataforma, top):
+    erro = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import appsorteio'],
+        cwd=RAIZ, env=ambiente(plataforma), capture_output=True, text=True, check=True
+    ).stderr
+
+    modulos = []
+    for linha in erro.splitlines():
+        if not linha.startswith('import time:'):
+            continue
+        proprio, acumulado, nome = linha[len('import time:'):].split('|')
+        if not proprio.strip().isdigit():
+            continue
+        modulos.append({
+            'modulo': nome.strip(),
+            'nivel': (len(nome) - len(nome.lstrip()) - 1) // 2,
+            'proprio_us': int(proprio),
+            'acumulado_us': int(acumulado),
+        })
+
+    return {
+        'total_importacao_us': next((m['acumulado_us'] for m in modulos if m['modulo'] == 'appsorteio'), 0),
+        'mais_caros': sorted(modulos, key=lambda m: m['acumulado_us'], reverse=True)[:top],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('-n', '--repeticoes', type=int, default=5)
+    parser.add_argument('--top', type=int, default=15, help="Módulos mais caros a listar")
+    parser.add_argument('--plataforma', default='offscreen', help="QT_QPA_PLATFORM ('' para a padrão)")
+    parser.add_argument('--json', help="Grava o resultado em JSON neste arquivo")
+    args = parser.parse_args(argv)
+
+    medicoes = [medir_primeira_janela(args.plataforma) for _ in range(args.repeticoes)]
+    resultado = {
+        'python': sys.version.split()[0],
+        'repeticoes': args.repeticoes,
+        'mediana': {
+            chave: statistics.median(m[chave] for m in medicoes)
+            for chave in medicoes[0] if chave.endswith('_s')
+        },
+        'modulos_pesados_carregados': medicoes[-1]['modulos_pesados_carregados'],
+        'importtime': medir_importtime(args.plataforma, args.top),
+    }
+
+    print(f"Tempo até a primeira janela (mediana de {args.repeticoes}):")
+    for chave, valor in resultado['mediana'].items():
+        print(f"  {chave:<22} {valor * 1000:8.1f} ms")
+    print(f"Módulos pesados já carregados na primeira janela: "
+          f"{', '.join(resultado['modulos_pesados_carregados']) or 'nenhum'}")
+    print(f"\nImportação de appsorteio: {resultado['importtime']['total_importacao_us'] / 1000:.1f} ms")
+    for m in resultado['importtime']['mais_caros']:
+        print(f"  {m['acumulado_us'] / 1000:8.1f} ms  {'  ' * m['nivel']}{m['modulo']}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(resultado, f, indent=4, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from pathlib import Path
+
+from participantes import ColunaTexto, TabelaParticipantes, tipo_do_array, tipo_dos_codigos
+
+DIRETORIO_PADRAO = Path.home() / "Documents" / ".sorteador_cache"
+LIMITE_PADRAO_BYTES = 512 * 1024 * 1024
+
+MAGICO = b'SRTC'
+VERSAO = 4
+# magico, versao, linhas, classificacoes distintas, bytes dos nomes (cada um
+# seguido de NUL), bytes da
+# tabela de classificações, pesos (0 sem coluna de peso, senão um por linha)
+CABECALHO = struct.Struct('<4sIQQQQQ')
+SEPARADOR = '\x00'
+
+
+def hash_arquivo(arquivo, tamanho_bloco=1 << 20):
+    h = hashlib.blake2b(digest_size=20)
+    with open(arquivo, 'rb') as f:
+        for bloco in iter(lambda: f.read(tamanho_bloco), b''):
+            h.update(bloco)
+    return h.hexdigest()
+
+
+class CacheDisco:
+    """Retratos binários das colunas já lidas, indexados pelo hash do conteúdo.
+
+    Cada coluna vira um arquivo <hash>_<coluna>.bin (<hash>_<coluna>_<peso>.bin
+    com coluna de peso) com os nomes em UTF-8, cada um seguido de NUL, um código
+    de classificação por linha (uint8, uint16 ou uint32, conforme o número de
+    classificações distintas), a tabela de classificações e, se houver, um
+    float64 de peso por linha. A leitura mapeia o arquivo em memória e não
+    passa pelo openpyxl: nomes, códigos e pesos da tabela são vistas sobre o
+    mapa, sem cópia, e o mantêm aberto enquanto a tabela existir.
+    <hash>.json guarda as colunas com dados.
+    """
+
+    def __init__(self, diretorio=DIRETORIO_PADRAO, limite_bytes=LIMITE_PADRAO_BYTES):
+        self.diretorio = Path(diretorio)
+        self.limite_bytes = limite_bytes
+
+    @staticmethod
+    def _nome_retrato(conteudo, coluna, coluna_peso):
+        return f"{conteudo}_{coluna}_{coluna_peso}.bin" if coluna_peso else f"{conteudo}_{coluna}.bin"
+
+    def carregar(self, conteudo, coluna=None, coluna_peso=None):
+        try:
+            with open(self.diretorio / f"{conteudo}.json", encoding='utf-8') as f:
+                colunas = json.load(f)['colunas']
+            if coluna is None and colunas:
+                coluna = colunas[0]
+
+            tabela = self._ler_tabela(self.diretorio / self._nome_retrato(conteudo, coluna, coluna_peso))
+        except (OSError, ValueError, KeyError, IndexError, struct.error):
+            return None
+        return colunas, coluna, tabela
+
+    def salvar(self, conteudo, colunas, coluna, tabela, coluna_peso=None):
+        try:
+            self.diretorio.mkdir(parents=True, exist_ok=True)
+            self._gravar(self.diretorio / f"{conteudo}.json",
+                         json.dumps({'colunas': colunas}).encode('utf-8'))
+            self._gravar(self.diretorio / self._nome_retrato(conteudo, coluna, coluna_peso),
+                         self._serializar(tabela))
+            self._podar()
+        except OSError:
+            pass
+
+    @staticmethod
+    def _serializar(tabela):
+        codigos, categorias = tabela.codigos_classificacoes()
+        if sys.byteorder != 'little':
+            codigos = array(tipo_do_array(codigos), codigos)
+            codigos.byteswap()
+
+        pesos = tabela.pesos if tabela.pesos is not None else array('d')
+        if sys.byteorder != 'little' and pesos:
+            pesos = array('d', pesos)
+            pesos.byteswap()
+
+        if tabela.nomes.com_nul:
+            nomes = ''.join(nome.replace(SEPARADOR, '') + SEPARADOR for nome in tabela.nomes).encode('utf-8')
+        else:
+            nomes = memoryview(tabela.nomes.dados)
+        classes = SEPARADOR.join(cls.replace(SEPARADOR, '') for cls in categorias).encode('utf-8')
+        preenchimento = b'\x00' * (-(CABECALHO.size + len(nomes)) % codigos.itemsize)
+        fim_classes = CABECALHO.size + len(nomes) + len(preenchimento) + len(codigos) * codigos.itemsize + len(classes)
+        preenchimento_pesos = b'\x00' * (-fim_classes % pesos.itemsize)
+
+        try:
+            return b''.join([
+                CABECALHO.pack(MAGICO, VERSAO, len(tabela), len(categorias), len(nomes), len(classes), len(pesos)),
+                nomes, preenchimento, codigos.tobytes(), classes, preenchimento_pesos, pesos.tobytes()
+            ])
+        finally:
+            if isinstance(nomes, memoryview):
+                nomes.release()
+
+    @staticmethod
+    def _ler_tabela(caminho):
+        # O mapa não é fechado aqui: as fatias de nomes, códigos e pesos o
+        # referenciam, e ele é liberado junto com a última delas.
+        with open(caminho, 'rb') as f:
+            dados = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+        (magico, versao, linhas, num_classes,
+         bytes_nomes, bytes_classes, num_pesos) = CABECALHO.unpack_from(dados)
+        if magico != MAGICO or versao != VERSAO:
+            raise ValueError("Cache em formato desconhecido")
+
+        posicao = CABECALHO.size
+        nomes = ColunaTexto.sobre(dados[posicao:posicao + bytes_nomes], linhas)
+        posicao += bytes_nomes
+
+        tipo = tipo_dos_codigos(num_classes)
+        posicao += -posicao % struct.calcsize(tipo)
+        codigos = _vista(dados, posicao, linhas, tipo)
+        posicao += linhas * struct.calcsize(tipo)
+
+        classes = str(dados[posicao:posicao + bytes_classes], 'utf-8').split(SEPARADOR) if num_classes else []
+        posicao += bytes_classes
+
+        pesos = None
+        if num_pesos:
+            posicao += -posicao % struct.calcsize('d')
+            pesos = _vista(dados, posicao, num_pesos, 'd')
+
+        if len(classes) != num_classes or (pesos is not None and len(pesos) != linhas):
+            raise ValueError("Cache truncado")
+        return TabelaParticipantes(nomes, codigos=codigos, categorias=classes, pesos=pesos)
+
+    @staticmethod
+    def _gravar(caminho, conteudo):
+        temporario = caminho.with_suffix(caminho.suffix + '.tmp')
+        with open(temporario, 'wb') as f:
+            f.write(conteudo)
+        os.replace(temporario, caminho)
+
+    def _podar(self):
+        arquivos = sorted(
+            (entrada.stat().st_mtime, entrada.stat().st_size, entrada)
+            for entrada in self.diretorio.iterdir() if entrada.suffix == '.bin'
+        )
+        total = sum(tamanho for _, tamanho, _ in arquivos)
+        for _, tamanho, entrada in arquivos:
+            if total <= self.limite_bytes:
+                break
+            try:
+                entrada.unlink()
+            except OSError:
+                # No Windows, um retrato ainda mapeado por uma tabela viva
+                # não pode ser apagado; fica para a próxima poda.
+                continue
+            total -= tamanho
+
+
+def _vista(dados, posicao, quantidade, tipo):
+    """quantidade valores do tipo a partir de posicao, sem cópia; só as
+    máquinas big-endian recebem um array convertido."""
+    fatia = dados[posicao:posicao + quantidade * struct.calcsize(tipo)]
+    if len(fatia) != quantidade * struct.calcsize(tipo):
+        raise ValueError("Cache truncado")
+    if sys.byteorder != 'little':
+        valores = array(tipo, fatia.tobytes())
+        valores.byteswap()
+        return valores
+    return fatia.cast(tipo)
@@ -0,0 +1,172 @@
+import os
+import threading
+from collections import OrderedDict
+
+from cache_disco import hash_arquivo
+from conjunto import ler_conjunto
+from desempenho import medidor
+from leitura import ler_planilha
+from normalizacao import deduplicar, linhas_da_tabela
+
+LIMITE_PADRAO_BYTES = 256 * 1024 * 1024
+
+
+class CachePlanilhas:
+    """Tabelas já lidas, por (arquivo, mtime, tamanho, coluna, coluna de peso,
+    política de duplicados), com descarte LRU.
+
+    Uma mudança no arquivo em disco altera mtime/tamanho e invalida todas as
+    colunas guardadas daquele arquivo. Pode ser usado a partir de threads de
+    carregamento: a leitura em si acontece fora da trava.
+
+    Com um CacheDisco, uma coluna ausente da memória é procurada primeiro no
+    retrato em disco (pelo hash do conteúdo) e só então lida pelo openpyxl.
+    A versão deduplicada de uma coluna é derivada da tabela original, que
+    também fica guardada; o retrato em disco é sempre o da original.
+    """
+
+    def __init__(self, limite_bytes=LIMITE_PADRAO_BYTES, disco=None):
+        self.limite_bytes = limite_bytes
+        self.disco = disco
+        self.bytes_usados = 0
+        self._tabelas = OrderedDict()
+        self._colunas = {}
+        self._hashes = {}
+        self._trava = threading.Lock()
+
+    def em_cache(self, arquivo, coluna=None, coluna_peso=None, politica=None):
+        assinatura = self._assinatura(arquivo)
+        with self._trava:
+            self._invalidar_obsoletas(assinatura)
+            colunas = self._colunas.get(assinatura)
+            if colunas is None:
+                return None
+            if coluna is None and colunas:
+                coluna = colunas[0]
+
+            chave = assinatura + (coluna, coluna_peso, politica)
+            if chave not in self._tabelas:
+                return None
+            self._tabelas.move_to_end(chave)
+            return colunas, coluna, self._tabelas[chave][0]
+
+    def obter(self, arquivo, coluna=None, progresso=None, cancelar=None, coluna_peso=None, politica=None):
+        resultado = self.em_cache(arquivo, coluna, coluna_peso, politica)
+        if resultado is not None:
+            return resultado
+
+        if politica:
+            colunas, coluna, original = self.obter(arquivo, coluna, progresso, cancelar, coluna_peso)
+            with medidor.medir('deduplicar', politica=politica, linhas=len(original)):
+                tabela, _ = deduplicar(linhas_da_tabela(original), politica, original.pesos is not None)
+            with self._trava:
+                self._guardar(self._assinatura(arquivo) + (coluna, coluna_peso, politica), tabela)
+            return colunas, coluna, tabela
+
+        assinatura = self._assinatura(arquivo)
+        conteudo = resultado = None
+        if self.disco:
+            with medidor.medir('cache_disco'):
+                conteudo = self._hash_conteudo(assinatura)
+                resultado = self.disco.carregar(conteudo, coluna, coluna_peso)
+
+        if resultado is None:
+            with medidor.medir('ler_planilha', arquivo=os.path.basename(arquivo)):
+                resultado = ler_planilha(arquivo, coluna, progresso, cancelar, coluna_peso)
+            if self.disco:
+                with medidor.medir('salvar_cache_disco'):
+                    self.disco.salvar(conteudo, *resultado, coluna_peso=coluna_peso)
+
+        colunas, coluna, tabela = resultado
+        with self._trava:
+            self._colunas[assinatura] = colunas
+            self._guardar(assinatura + (coluna, coluna_peso, None), tabela)
+        return colunas, coluna, tabela
+
+    def obter_conjunto(self, fontes, coluna=None, progresso=None, cancelar=None, coluna_peso=None,
+                       politica=None, processos=None):
+        """Como obter, para a tabela que junta as fontes (arquivo, aba) com
+        conjunto.ler_conjunto. A chave tem o hash do conteúdo de cada arquivo:
+        se qualquer um mudar, o conjunto é lido de novo, e os conjuntos com o
+        conteúdo antigo saem do cache. Com CacheDisco, cada fonte tem o seu
+        retrato, e os processos de leitura o usam.
+        """
+        assinaturas = {arquivo: self._assinatura(arquivo) for arquivo, _ in fontes}
+        conteudos = {arquivo: self._hash_conteudo(assinatura) for arquivo, assinatura in assinaturas.items()}
+        assinatura = tuple((os.path.abspath(arquivo), conteudos[arquivo], aba) for arquivo, aba in fontes)
+        with self._trava:
+            for assinatura_arquivo in assinaturas.values():
+                self._invalidar_obsoletas(assinatura_arquivo)
+            colunas = self._colunas.get(assinatura)
+            if colunas is not None:
+                chave = (assinatura, coluna or (colunas[0] if colunas else None), coluna_peso, politica)
+                if chave in self._tabelas:
+                    self._tabelas.move_to_end(chave)
+                    return colunas, chave[1], self._tabelas[chave][0]
+
+        with medidor.medir('ler_conjunto', fontes=len(fontes)):
+            colunas, coluna, tabela = ler_conjunto(
+                fontes, coluna, coluna_peso, politica, processos, progresso, cancelar,
+                diretorio_cache=self.disco.diretorio if self.disco else None, hash_de=self.hash_do_arquivo
+            )
+        with self._trava:
+            self._colunas[assinatura] = colunas
+            self._guardar((assinatura, coluna, coluna_peso, politica), tabela)
+        return colunas, coluna, tabela
+
+    def hash_do_arquivo(self, arquivo):
+        """Hash do conteúdo (o mesmo usado pelo CacheDisco), memorizado por mtime/tamanho."""
+        return self._hash_conteudo(self._assinatura(arquivo))
+
+    def limpar(self):
+        with self._trava:
+            self._tabelas.clear()
+            self._colunas.clear()
+            self._hashes.clear()
+            self.bytes_usados = 0
+
+    @staticmethod
+    def _assinatura(arquivo):
+        info = os.stat(arquivo)
+        return (os.path.abspath(arquivo), info.st_mtime_ns, info.st_size)
+
+    def _hash_conteudo(self, assinatura):
+        # O hash lê o arquivo inteiro, então roda fora da trava; só a leitura
+        # e a escrita em _hashes, que _invalidar_obsoletas percorre, ficam nela.
+        with self._trava:
+            conteudo = self._hashes.get(assinatura)
+        if conteudo is None:
+            conteudo = hash_arquivo(assinatura[0])
+            with self._trava:
+                self._hashes[assinatura] = conteudo
+        return conteudo
+
+    def _invalidar_obsoletas(self, assinatura):
+        # As chaves de um arquivo começam pelo caminho; as de um conjunto, pela
+        # tupla de fontes (caminho, hash do conteúdo, aba), e saem quando
+        # alguma delas tem o hash de uma versão anterior, e diferente, do arquivo.
+        caminho = assinatura[0]
+        obsoletos = {(caminho, self._hashes.pop(c)) for c in [c for c in self._hashes
+                                                               if c[0] == caminho and c != assinatura]}
+        obsoletos.discard((caminho, self._hashes.get(assinatura)))
+
+        def obsoleta(chave):
+            if isinstance(chave[0], tuple):
+                return any(fonte[:2] in obsoletos for fonte in chave[0])
+            return chave[0] == caminho and chave[:3] != assinatura
+
+        for chave in [c for c in self._colunas if obsoleta((c,) if isinstance(c[0], tuple) else c)]:
+            del self._colunas[chave]
+        for chave in [c for c in self._tabelas if obsoleta(c)]:
+            self.bytes_usados -= self._tabelas.pop(chave)[1]
+
+    def _guardar(self, chave, tabela):
+        if chave in self._tabelas:
+            self.bytes_usados -= self._tabelas.pop(chave)[1]
+        tamanho = tabela.tamanho_em_bytes()
+        self._tabelas[chave] = (tabela, tamanho)
+        self.bytes_usados += tamanho
+
+        while self.bytes_usados > self.limite_bytes and len(self._tabelas) > 1:
+            _, (_, liberado) = self._tabelas.popitem(last=False)
+            self.bytes_usados -= liberado
@@ -0,0 +1,162 @@
+import hashlib
+import multiprocessing
+import os
+import zipfile
+from array import array
+from collections import Counter
+from itertools import chain, repeat
+from xml.etree import ElementTree
+
+from cache_disco import CacheDisco, hash_arquivo
+from leitura import OperacaoCancelada, abrir_excel, ler_planilha, leitor_para
+from normalizacao import deduplicar, linhas_da_tabela
+from participantes import TabelaParticipantes, tipo_dos_codigos
+
+_NS_PLANILHA = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+ESPERA_CANCELAMENTO = 0.2
+
+
+def eh_excel(arquivo):
+    return leitor_para(arquivo)[1] is abrir_excel
+
+
+def abas_da_planilha(arquivo):
+    """Nomes das abas visíveis de um .xlsx, na ordem da pasta de trabalho.
+
+    Lê só o xl/workbook.xml do pacote: o openpyxl, mesmo em read_only,
+    carregaria as strings compartilhadas da pasta inteira.
+    """
+    with zipfile.ZipFile(arquivo) as pacote:
+        raiz = ElementTree.fromstring(pacote.read('xl/workbook.xml'))
+    return [aba.get('name') for aba in raiz.iter(f'{_NS_PLANILHA}sheet')
+            if aba.get('state', 'visible') == 'visible']
+
+
+def fontes_dos_arquivos(arquivos, todas_as_abas=True):
+    """Fontes (arquivo, aba) de cada arquivo. aba None é a aba ativa, ou o
+    arquivo inteiro nos formatos sem abas."""
+    fontes = []
+    for arquivo in arquivos:
+        abas = abas_da_planilha(arquivo) if todas_as_abas and eh_excel(arquivo) else []
+        fontes.extend((arquivo, aba) for aba in abas or [None])
+    return fontes
+
+
+def rotulo_fonte(arquivo, aba=None):
+    nome = os.path.basename(arquivo)
+    return f"{nome} [{aba}]" if aba is not None else nome
+
+
+def _conteudo_da_fonte(conteudo, aba):
+    # Cada aba tem os seus retratos no CacheDisco, ao lado dos do arquivo.
+    if aba is None:
+        return conteudo
+    return f"{conteudo}-{hashlib.blake2b(aba.encode('utf-8'), digest_size=6).hexdigest()}"
+
+
+def _ler_fonte(arquivo, aba, coluna, coluna_peso, diretorio_cache=None, conteudo=None):
+    # Roda nos processos de leitura: só recebe e devolve objetos simples.
+    disco = CacheDisco(diretorio_cache) if diretorio_cache and conteudo else None
+    if disco:
+        conteudo = _conteudo_da_fonte(conteudo, aba)
+        resultado = disco.carregar(conteudo, coluna, coluna_peso)
+        if resultado is not None:
+            return resultado
+
+    resultado = ler_planilha(arquivo, coluna, coluna_peso=coluna_peso, aba=aba)
+    if disco:
+        disco.salvar(conteudo, *resultado, coluna_peso=coluna_peso)
+    return resultado
+
+
+def _ler_fontes(fontes, coluna, coluna_peso, processos, progresso, cancelar, diretorio_cache, hash_de):
+    conteudos = {}
+    if diretorio_cache:
+        conteudos = {arquivo: hash_de(arquivo) for arquivo, _ in fontes}
+    tarefas = [(arquivo, aba, coluna, coluna_peso, diretorio_cache, conteudos.get(arquivo))
+               for arquivo, aba in fontes]
+
+    if processos == 1 or len(tarefas) < 2:
+        lidas = []
+        for tarefa in tarefas:
+            if cancelar and cancelar():
+                raise OperacaoCancelada()
+            lidas.append(_ler_fonte(*tarefa))
+            if progresso:
+                progresso(len(lidas), len(tarefas))
+        return lidas
+
+    from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+    # spawn: o ler_conjunto roda numa QThread, e um fork copiaria o processo
+    # com as travas das outras threads no estado em que estivessem.
+    executor = ProcessPoolExecutor(min(processos or os.cpu_count() or 1, len(tarefas)),
+                                   mp_context=multiprocessing.get_context('spawn'))
+    cancelado = False
+    try:
+        futuros = {executor.submit(_ler_fonte, *tarefa): i for i, tarefa in enumerate(tarefas)}
+        lidas = [None] * len(tarefas)
+        pendentes = set(futuros)
+        while pendentes:
+            prontos, pendentes = wait(pendentes, ESPERA_CANCELAMENTO, FIRST_COMPLETED)
+            if cancelar and cancelar():
+                cancelado = True
+                raise OperacaoCancelada()
+            for futuro in prontos:
+                lidas[futuros[futuro]] = futuro.result()
+            if progresso and prontos:
+                progresso(len(tarefas) - len(pendentes), len(tarefas))
+        return lidas
+    finally:
+        # Cancelado, não espera as leituras em andamento terminarem.
+        executor.shutdown(wait=not cancelado, cancel_futures=True)
+
+
+def ler_conjunto(fontes, coluna=None, coluna_peso=None, politica=None, processos=None,
+                 progresso=None, cancelar=None, diretorio_cache=None, hash_de=hash_arquivo):
+    """Lê várias fontes (arquivo, aba) e as junta numa só TabelaParticipantes.
+
+    As fontes são lidas em paralelo, uma por processo (processos=1 lê tudo
+    neste), e concatenadas na ordem dada. Com politica, os nomes repetidos
+    entre as fontes, e dentro delas, são juntados por normalizacao.deduplicar.
+    A tabela sai com fontes (rótulo de cada fonte) e origens (a fonte de
+    cada linha, ou da primeira linha de um nome juntado).
+
+    Sem coluna, usa a primeira coluna com dados em alguma das fontes; as que
+    escolheram outra são lidas de novo com ela. Com diretorio_cache, cada
+    fonte passa pelo CacheDisco desse diretório, aba por aba. progresso é
+    chamado com (fontes_lidas, total) e cancelar é consultado entre elas.
+
+    Retorna (colunas_disponiveis, coluna, TabelaParticipantes), com as
+    colunas com dados em qualquer uma das fontes.
+    """
+    fontes = [tuple(fonte) for fonte in fontes]
+    if not fontes:
+        raise ValueError("Nenhuma planilha para combinar")
+
+    lidas = _ler_fontes(fontes, coluna, coluna_peso, processos, progresso, cancelar, diretorio_cache, hash_de)
+    colunas = sorted({c for colunas_fonte, _, _ in lidas for c in colunas_fonte}, key=lambda c: (len(c), c))
+
+    if coluna is None and colunas:
+        coluna = colunas[0]
+        for i, (arquivo, aba) in enumerate(fontes):
+            if lidas[i][1] != coluna and lidas[i][0]:
+                lidas[i] = _ler_fonte(arquivo, aba, coluna, coluna_peso, diretorio_cache,
+                                      hash_de(arquivo) if diretorio_cache else None)
+
+    tabelas = [tabela for _, _, tabela in lidas]
+    origens = array(tipo_dos_codigos(len(fontes)), chain.from_iterable(repeat(i, len(tabela)) for i, tabela in enumerate(tabelas)))
+    if politica:
+        tabela, _ = deduplicar(chain.from_iterable(map(linhas_da_tabela, tabelas)), politica,
+                               coluna_peso is not None, origens=origens)
+    else:
+        tabela = TabelaParticipantes.concatenar(tabelas, coluna_peso is not None)
+        tabela.origens = origens
+    tabela.fontes = [rotulo_fonte(*fonte) for fonte in fontes]
+    return colunas, coluna, tabela
+
+
+def contagem_por_fonte(tabela):
+    """[(rótulo, itens)] na ordem das fontes."""
+    contagem = Counter(tabela.origens)
+    return [(rotulo, contagem[i]) for i, rotulo in enumerate(tabela.fontes)]
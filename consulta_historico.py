@@ -0,0 +1,211 @@
+from array import array
+from bisect import bisect_left, bisect_right
+import heapq
+from collections import Counter, defaultdict
+
+from historico import data_ordenavel
+from motor_sorteio import TIPO_CLASSIFICACAO
+from normalizacao import chave_normalizada
+
+# Escopos de exclusão cujos vencedores ficam memorizados; com o período em
+# dias, o escopo muda a cada dia, e os mais antigos saem.
+LIMITE_ESCOPOS_MEMORIZADOS = 8
+
+
+def chave_participante(nome):
+    """A chave da deduplicação da planilha (sem acentos nem pontuação nas
+    pontas); nomes só com pontuação, que ela deixa vazios, ficam com a
+    chave legada.
+    """
+    texto = nome if isinstance(nome, str) else str(nome)
+    return chave_normalizada(texto) or chave_legada(texto)
+
+
+def chave_legada(nome):
+    """A chave dos sorteios gravados sem as chaves descartadas: a verificação
+    refaz a exclusão deles com ela.
+    """
+    return nome.strip().casefold() if isinstance(nome, str) else str(nome).strip().casefold()
+
+
+class IndiceHistorico:
+    """Índices invertidos sobre o histórico, mantidos a cada sorteio.
+
+    Os ids são as posições dos registros no histórico (0 = o mais antigo).
+    Como o histórico só recebe acréscimos em ordem cronológica, os ids de um
+    período formam um intervalo contínuo, achado por busca binária nas datas.
+    """
+
+    def __init__(self, registros=(), chave=chave_participante):
+        self.chave = chave
+        self.reconstruir(registros)
+
+    def reconstruir(self, registros):
+        self.total = 0
+        self.datas = []
+        self.ordenado = True
+        self.por_participante = {}
+        self.por_classificacao = defaultdict(lambda: array('I'))
+        self.por_tipo = defaultdict(lambda: array('I'))
+        self.vitorias_classificacao = Counter()
+        self.sorteios_por_mes = Counter()
+        self.nomes = {}
+        self.chaves_por_registro = []
+        self.classificacoes_por_registro = []
+        self._frequencia = None
+        self._vencedores = {}
+
+        for registro in registros:
+            self.adicionar(registro)
+
+    def adicionar(self, registro):
+        id_registro = self.total
+        self.total += 1
+
+        data = data_ordenavel(registro.get('data', ''))
+        if self.datas and data < self.datas[-1]:
+            self.ordenado = False
+        self.datas.append(data)
+        self.sorteios_por_mes[data[:6]] += 1
+        self.por_tipo[registro.get('tipo', '')].append(id_registro)
+
+        itens = registro.get('itens') or []
+        classificacoes = registro.get('classificacoes') or []
+        if registro.get('tipo') == TIPO_CLASSIFICACAO and registro.get('classificacao'):
+            classificacoes = [registro['classificacao']] * len(itens)
+
+        por_participante = self.por_participante
+        chaves = []
+        for nome in itens:
+            chave = self.chave(nome)
+            chaves.append(chave)
+            ids = por_participante.get(chave)
+            if ids is None:
+                ids = por_participante[chave] = array('I')
+                self.nomes[chave] = nome
+            elif ids[-1] == id_registro:
+                continue
+            ids.append(id_registro)
+        self.chaves_por_registro.append(tuple(chaves))
+        self.classificacoes_por_registro.append(tuple(classificacoes))
+
+        for classificacao in set(classificacoes) - {''}:
+            self.por_classificacao[classificacao].append(id_registro)
+        self.vitorias_classificacao.update(c for c in classificacoes if c)
+
+        for escopo, memorizado in self._vencedores.items():
+            novos = _vencedores_do_registro(escopo, data, registro.get('tipo', ''), chaves, classificacoes)
+            if novos and not memorizado[0].issuperset(novos):
+                memorizado[0].update(novos)
+                memorizado[1] = None
+
+        return id_registro
+
+    def intervalo(self, data_inicial='', data_final=''):
+        """Ids [início, fim) dos registros entre as datas "aaaammdd" dadas."""
+        inicio = bisect_left(self.datas, data_inicial) if data_inicial else 0
+        fim = bisect_right(self.datas, data_final) if data_final else self.total
+        return inicio, fim
+
+    def _no_periodo(self, ids, data_inicial='', data_final=''):
+        if not data_inicial and not data_final:
+            return list(ids)
+        if not self.ordenado:
+            return [i for i in ids
+                    if (not data_inicial or self.datas[i] >= data_inicial)
+                    and (not data_final or self.datas[i] <= data_final)]
+        inicio, fim = self.intervalo(data_inicial, data_final)
+        return list(ids[bisect_left(ids, inicio):bisect_left(ids, fim)])
+
+    def sorteios_de(self, nome, data_inicial='', data_final=''):
+        ids = self.por_participante.get(self.chave(nome), ())
+        return self._no_periodo(ids, data_inicial, data_final)
+
+    def sorteios_da_classificacao(self, classificacao, data_inicial='', data_final=''):
+        return self._no_periodo(self.por_classificacao.get(classificacao, ()), data_inicial, data_final)
+
+    def vencedores(self, data_inicial='', data_final='', tipo='', classificacao='', ate=None):
+        """Chaves dos participantes sorteados nos registros do escopo.
+
+        Com classificacao, só contam os itens sorteados com ela; ate limita
+        aos ids menores que ele (o estado do histórico antes daquele sorteio).
+
+        Sem ate, os vencedores do escopo são memorizados e acrescidos a cada
+        registro adicionado, sem percorrer o histórico de novo a cada sorteio;
+        o frozenset retornado não muda depois.
+        """
+        if ate is None:
+            escopo = (data_inicial, data_final, tipo, classificacao)
+            memorizado = self._vencedores.get(escopo)
+            if memorizado is None:
+                if len(self._vencedores) >= LIMITE_ESCOPOS_MEMORIZADOS:
+                    del self._vencedores[next(iter(self._vencedores))]
+                memorizado = self._vencedores[escopo] = [self._percorrer_vencedores(*escopo), None]
+            if memorizado[1] is None:
+                memorizado[1] = frozenset(memorizado[0])
+            return memorizado[1]
+        return self._percorrer_vencedores(data_inicial, data_final, tipo, classificacao, ate)
+
+    def _percorrer_vencedores(self, data_inicial, data_final, tipo, classificacao, ate=None):
+        if classificacao:
+            ids = self.sorteios_da_classificacao(classificacao, data_inicial, data_final)
+            if tipo:
+                do_tipo = set(self.por_tipo.get(tipo, ()))
+                ids = [i for i in ids if i in do_tipo]
+        elif tipo:
+            ids = self._no_periodo(self.por_tipo.get(tipo, ()), data_inicial, data_final)
+        else:
+            ids = self._no_periodo(range(self.total), data_inicial, data_final)
+
+        vencedores = set()
+        for i in ids:
+            if ate is not None and i >= ate:
+                break
+            chaves = self.chaves_por_registro[i]
+            if classificacao:
+                classificacoes = self.classificacoes_por_registro[i]
+                chaves = [chave for chave, cls in zip(chaves, classificacoes) if cls == classificacao]
+            vencedores.update(chaves)
+        return vencedores
+
+    def vezes_sorteado(self, nome, data_inicial='', data_final=''):
+        if not data_inicial and not data_final:
+            return len(self.por_participante.get(self.chave(nome), ()))
+        return len(self.sorteios_de(nome, data_inicial, data_final))
+
+    def mais_sorteados(self, quantidade=10):
+        maiores = heapq.nlargest(quantidade, self.por_participante.items(), key=lambda par: len(par[1]))
+        return [(self.nomes[chave], len(ids)) for chave, ids in maiores]
+
+    def classificacoes_mais_vencedoras(self, quantidade=10):
+        return self.vitorias_classificacao.most_common(quantidade)
+
+    def frequencia_de_vitorias(self):
+        """quantidades[k] = participantes sorteados em exatamente k sorteios.
+
+        Memorizado até o próximo registro entrar no índice.
+        """
+        if self._frequencia is None or self._frequencia[0] != self.total:
+            import numpy as np
+
+            vitorias = np.fromiter(map(len, self.por_participante.values()),
+                                   dtype=np.uint32, count=len(self.por_participante))
+            self._frequencia = self.total, np.bincount(vitorias).tolist()
+        return self._frequencia[1]
+
+    def contagem_por_mes(self):
+        """{"aaaamm": sorteios}, em ordem cronológica."""
+        return dict(sorted(self.sorteios_por_mes.items()))
+
+
+def _vencedores_do_registro(escopo, data, tipo_registro, chaves, classificacoes):
+    """As chaves de um registro que entram nos vencedores do escopo, com os
+    mesmos filtros de IndiceHistorico.vencedores."""
+    data_inicial, data_final, tipo, classificacao = escopo
+    if (data_inicial and data < data_inicial) or (data_final and data > data_final):
+        return ()
+    if tipo and tipo_registro != tipo:
+        return ()
+    if classificacao:
+        return [chave for chave, cls in zip(chaves, classificacoes) if cls == classificacao]
+    return chaves
@@ -0,0 +1,187 @@
+import cProfile
+import io
+import json
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+
+LIMITE_MEDICOES = 500
+
+
+def _mb(tamanho):
+    return f"{tamanho / 2**20:+.1f} MB"
+
+
+class Medidor:
+    """Tempos das etapas pesadas do aplicativo (leitura da planilha,
+    sorteios, gráfico, histórico), para saber para onde foi o tempo quando a
+    janela trava.
+
+    Uma medição custa dois perf_counter e um append numa deque com as
+    LIMITE_MEDICOES mais recentes; os totais por etapa ficam num dict. A
+    captura, desligada por padrão porque deixa tudo bem mais lento, liga o
+    cProfile na thread que a iniciou e o tracemalloc, que acrescenta a
+    memória alocada a cada medição.
+    """
+
+    def __init__(self, limite=LIMITE_MEDICOES):
+        self.medicoes = deque(maxlen=limite)
+        self.totais = {}
+        self.perfil = None
+        self.ultimo_perfil = None
+        self._tracemalloc_proprio = False
+        self._abertas = 0
+        self._origem = time.perf_counter()
+        self._trava = threading.Lock()
+
+    @property
+    def capturando(self):
+        return self.perfil is not None
+
+    @contextmanager
+    def medir(self, etapa, **detalhes):
+        """Mede o bloco como etapa. O dict de detalhes é devolvido pelo with
+        e pode ganhar campos dentro do bloco (linhas lidas, por exemplo).
+
+        Com o tracemalloc ligado, registra a memória que o bloco deixou
+        alocada e o pico desde o início da medição mais externa em aberto.
+        """
+        memoria = tracemalloc.is_tracing()
+        if memoria:
+            with self._trava:
+                if not self._abertas:
+                    tracemalloc.reset_peak()
+                self._abertas += 1
+            alocada = tracemalloc.get_traced_memory()[0]
+        inicio = time.perf_counter()
+        try:
+            yield detalhes
+        finally:
+            medicao = {
+                'etapa': etapa,
+                'hora': time.time(),
+                'inicio': inicio - self._origem,
+                'duracao': time.perf_counter() - inicio,
+                'thread': threading.current_thread().name,
+                'detalhes': detalhes,
+            }
+            if memoria:
+                atual, pico = tracemalloc.get_traced_memory()
+                medicao['memoria'] = atual - alocada
+                medicao['pico_memoria'] = pico
+                with self._trava:
+                    self._abertas -= 1
+            self._registrar(medicao)
+
+    def _registrar(self, medicao):
+        duracao = medicao['duracao']
+        with self._trava:
+            self.medicoes.append(medicao)
+            total = self.totais.get(medicao['etapa'])
+            if total is None:
+                total = self.totais[medicao['etapa']] = [0, 0.0, 0.0]
+            total[0] += 1
+            total[1] += duracao
+            total[2] = max(total[2], duracao)
+
+    def limpar(self):
+        with self._trava:
+            self.medicoes.clear()
+            self.totais.clear()
+
+    def iniciar_captura(self):
+        if self.perfil is not None:
+            return
+        # Um tracemalloc já ligado (python -X tracemalloc, por exemplo) é
+        # usado e fica ligado ao fim da captura.
+        self._tracemalloc_proprio = not tracemalloc.is_tracing()
+        if self._tracemalloc_proprio:
+            tracemalloc.start()
+        self.perfil = cProfile.Profile()
+        self.perfil.enable()
+
+    def parar_captura(self):
+        if self.perfil is None:
+            return
+        self.perfil.disable()
+        self.ultimo_perfil, self.perfil = self.perfil, None
+        if self._tracemalloc_proprio:
+            tracemalloc.stop()
+            self._tracemalloc_proprio = False
+
+    def resumo(self):
+        """(etapa, chamadas, total, média, máximo) em segundos, da etapa com
+        mais tempo acumulado para a com menos."""
+        with self._trava:
+            totais = [(etapa, n, total, total / n, maximo) for etapa, (n, total, maximo) in self.totais.items()]
+        return sorted(totais, key=lambda linha: linha[2], reverse=True)
+
+    def recentes(self, limite=30):
+        with self._trava:
+            medicoes = list(self.medicoes)
+        return medicoes[:-limite - 1:-1]
+
+    def texto(self, limite_recentes=30, limite_funcoes=20):
+        linhas = [f"{'Etapa':<28}{'Chamadas':>9}{'Total (ms)':>13}{'Média (ms)':>13}{'Máx. (ms)':>13}"]
+        for etapa, n, total, media, maximo in self.resumo():
+            linhas.append(f"{etapa:<28}{n:>9}{total * 1000:>13.1f}{media * 1000:>13.1f}{maximo * 1000:>13.1f}")
+
+        linhas.append("\nÚltimas medições:")
+        for medicao in self.recentes(limite_recentes):
+            hora = datetime.fromtimestamp(medicao['hora']).strftime("%H:%M:%S")
+            texto = f"  {hora}  {medicao['etapa']:<28}{medicao['duracao'] * 1000:>10.1f} ms"
+            if 'memoria' in medicao:
+                texto += f"  {_mb(medicao['memoria'])} (pico {medicao['pico_memoria'] / 2**20:.1f} MB)"
+            detalhes = " ".join(f"{campo}={valor}" for campo, valor in medicao['detalhes'].items())
+            linhas.append(f"{texto}  {detalhes}  [{medicao['thread']}]".rstrip())
+
+        if self.ultimo_perfil is not None:
+            saida = io.StringIO()
+            pstats.Stats(self.ultimo_perfil, stream=saida).strip_dirs().sort_stats('cumulative') \
+                .print_stats(limite_funcoes)
+            linhas.append("\nÚltima captura (cProfile, por tempo acumulado):")
+            linhas.append(saida.getvalue().strip())
+        return "\n".join(linhas)
+
+    def exportar(self, arquivo):
+        """Grava as medições em arquivo no formato Trace Event (JSON), que
+        abre no chrome://tracing ou no Perfetto, e o perfil da última captura,
+        se houver, ao lado em .prof (pstats, snakeviz). Retorna os arquivos
+        gravados.
+        """
+        with self._trava:
+            medicoes = list(self.medicoes)
+
+        pid = os.getpid()
+        threads = {}
+        eventos = []
+        for medicao in medicoes:
+            tid = threads.setdefault(medicao['thread'], len(threads) + 1)
+            args = dict(medicao['detalhes'])
+            for campo in ('memoria', 'pico_memoria'):
+                if campo in medicao:
+                    args[campo] = medicao[campo]
+            eventos.append({
+                'name': medicao['etapa'], 'ph': 'X', 'pid': pid, 'tid': tid,
+                'ts': round(medicao['inicio'] * 1e6), 'dur': round(medicao['duracao'] * 1e6), 'args': args,
+            })
+        eventos += [{'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': nome}}
+                    for nome, tid in threads.items()]
+
+        with open(arquivo, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': eventos, 'displayTimeUnit': 'ms'}, f, ensure_ascii=False, default=str)
+        gravados = [arquivo]
+
+        if self.ultimo_perfil is not None:
+            arquivo_perfil = os.path.splitext(arquivo)[0] + ".prof"
+            self.ultimo_perfil.dump_stats(arquivo_perfil)
+            gravados.append(arquivo_perfil)
+        return gravados
+
+
+medidor = Medidor()
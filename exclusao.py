@@ -0,0 +1,109 @@
+from consulta_historico import chave_participante
+
+
+def escopo_exclusao(data_inicial='', data_final='', tipo='', classificacao='', por_classificacao=False):
+    """Escopo gravado no registro do sorteio: só os filtros usados.
+
+    por_classificacao marca os sorteios por cotas em que cada cota exclui
+    só os vencedores da própria classificação.
+    """
+    escopo = {'data_inicial': data_inicial, 'data_final': data_final, 'tipo': tipo, 'classificacao': classificacao,
+              'por_classificacao': por_classificacao}
+    return {campo: valor for campo, valor in escopo.items() if valor}
+
+
+class Exclusao:
+    """Vencedores anteriores que não podem ser sorteados de novo.
+
+    Guarda só as chaves normalizadas dos nomes num conjunto: testar um nome
+    custa O(1), e os sorteios consultam apenas as posições que sortearam,
+    sem montar uma cópia filtrada da planilha.
+
+    descartados junta as chaves que de fato barraram um sorteado, anotadas
+    pela amostragem com descartar(); gravadas no registro, bastam para refazer o sorteio mesmo depois que o
+    histórico for compactado. tamanho é o total do conjunto no momento do
+    sorteio, que decide entre a amostragem com e sem exclusão.
+    """
+
+    def __init__(self, chaves=(), escopo=None, tamanho=None, chave=chave_participante):
+        self.chaves = frozenset(chaves)
+        self.chave = chave
+        self.escopo = escopo or {}
+        self.tamanho = len(self.chaves) if tamanho is None else tamanho
+        self.descartados = set()
+
+    def __contains__(self, nome):
+        return self.chave(nome) in self.chaves
+
+    def descartar(self, nome):
+        """True se nome está excluído, anotando a chave em descartados."""
+        chave = self.chave(nome)
+        if chave in self.chaves:
+            self.descartados.add(chave)
+            return True
+        return False
+
+    def __len__(self):
+        return self.tamanho
+
+    def para(self, classificacao):
+        return self
+
+    def anotacao(self):
+        return {'excluidos': self.tamanho, 'descartados': sorted(self.descartados)}
+
+
+class ExclusaoPorClassificacao:
+    """Uma Exclusao para cada classificação de um sorteio por cotas."""
+
+    def __init__(self, por_classificacao, escopo=None):
+        self.por_classificacao = por_classificacao
+        self.escopo = escopo or {}
+
+    def __len__(self):
+        return sum(map(len, self.por_classificacao.values()))
+
+    def para(self, classificacao):
+        return self.por_classificacao.get(classificacao)
+
+    def anotacao(self):
+        return {
+            'excluidos': len(self),
+            'excluidos_por_classificacao': {cls: len(e) for cls, e in self.por_classificacao.items()},
+            'descartados': {cls: sorted(e.descartados) for cls, e in self.por_classificacao.items()},
+        }
+
+
+def exclusao_do_historico(indice, escopo, ate=None):
+    """Exclusao com os vencedores do escopo no IndiceHistorico.
+
+    ate é o id do registro a refazer, numa verificação: só contam os
+    sorteios anteriores a ele.
+    """
+    return Exclusao(indice.vencedores(ate=ate, **escopo), escopo, chave=indice.chave)
+
+
+def exclusao_por_classificacao(indice, escopo, classificacoes, ate=None):
+    """ExclusaoPorClassificacao com os vencedores de cada classificação no escopo."""
+    filtros = {campo: valor for campo, valor in escopo.items() if campo != 'por_classificacao'}
+    return ExclusaoPorClassificacao({
+        classificacao: Exclusao(indice.vencedores(ate=ate, classificacao=classificacao, **filtros), chave=indice.chave)
+        for classificacao in classificacoes
+    }, escopo)
+
+
+def exclusao_gravada(registro):
+    """Exclusao refeita das chaves descartadas gravadas no registro.
+
+    None se o registro é anterior a esse campo: aí só o histórico (sem
+    compactação desde o sorteio) permite refazer o conjunto.
+    """
+    descartados = registro.get('descartados')
+    if descartados is None:
+        return None
+    if isinstance(descartados, dict):
+        return ExclusaoPorClassificacao({
+            classificacao: Exclusao(descartados.get(classificacao, ()), tamanho=tamanho)
+            for classificacao, tamanho in registro['excluidos_por_classificacao'].items()
+        }, registro.get('exclusao'))
+    return Exclusao(descartados, registro.get('exclusao'), tamanho=registro.get('excluidos', 0))
@@ -0,0 +1,186 @@
+import csv
+import json
+import os
+from itertools import islice
+
+from motor_sorteio import TIPO_CLASSIFICACAO, TIPO_COLOCACAO, TIPO_COTAS, TIPO_GRUPOS, TIPO_SORTEIO, agora
+
+# Os exportadores aceitam qualquer iterável de resultados (ou de registros do
+# histórico) e gravam um por vez, então a memória usada não cresce com o
+# tamanho da exportação.
+
+CAMPOS_CSV = ["sorteio", "data", "tipo", "coluna", "classificacao", "grupo", "posicao", "item", "premio"]
+
+
+def _cabecalho(resultados):
+    yield ["RESULTADOS DO SORTEIO"]
+    yield ["Data:", resultados.get('data', agora())]
+
+    if 'coluna' in resultados:
+        yield ["Coluna:", resultados['coluna']]
+    if 'classificacao' in resultados:
+        yield ["Classificação:", resultados['classificacao']]
+
+    yield []
+
+
+def _itens_das_cotas(resultados):
+    # Resultados trazem a lista de cada cota; registros do histórico, só a
+    # quantidade, com os itens em sequência na mesma ordem.
+    cotas = resultados.get('cotas') or {}
+    if all(isinstance(itens, list) for itens in cotas.values()):
+        return list(cotas.items())
+    itens = iter(resultados.get('itens', []))
+    return [(classificacao, list(islice(itens, quantidade))) for classificacao, quantidade in cotas.items()]
+
+
+def _linhas_resultado(resultados):
+    yield from _cabecalho(resultados)
+
+    if resultados['tipo'] == TIPO_SORTEIO:
+        yield ["Itens Sorteados"]
+        for item in resultados.get('itens', []):
+            yield [item]
+
+    elif resultados['tipo'] == TIPO_COLOCACAO:
+        premios = resultados.get('premios') or []
+        yield ["Itens Sorteados com Colocação"]
+        for posicao, item in enumerate(resultados.get('itens', []), 1):
+            linha = [f"{posicao}º lugar: {item}"]
+            if posicao <= len(premios):
+                linha.append(f"Prêmio: {premios[posicao-1]}")
+            yield linha
+
+    elif resultados['tipo'] == TIPO_GRUPOS:
+        # Registros do histórico guardam só o tamanho de cada grupo.
+        yield ["Grupos Criados"]
+        for i, tamanho in enumerate(resultados.get('itens_por_grupo', []), 1):
+            yield [f"Grupo {i}", f"{tamanho} itens"]
+
+    elif resultados['tipo'] == TIPO_COTAS:
+        premios = resultados.get('premios') or {}
+        yield ["Itens Sorteados por Cota"]
+        for classificacao, itens in _itens_das_cotas(resultados):
+            yield []
+            yield [f"Classificação: {classificacao}", f"{len(itens)} itens"]
+            lista = premios.get(classificacao, [])
+            for posicao, item in enumerate(itens, 1):
+                linha = [f"{posicao}º lugar: {item}"]
+                if posicao <= len(lista):
+                    linha.append(f"Prêmio: {lista[posicao-1]}")
+                yield linha
+
+    elif resultados['tipo'] == TIPO_CLASSIFICACAO:
+        yield [f"Itens da Classificação: {resultados['classificacao']}"]
+        for item in resultados.get('itens', []):
+            yield [item]
+
+
+def _linhas_grupo(resultados, i, grupo):
+    yield from _cabecalho(resultados)
+    yield [f"Grupo {i}"]
+    for item in grupo:
+        yield [item]
+
+
+def _abas(resultados, numero):
+    """(título, linhas) de cada aba do resultado: uma por grupo, se houver."""
+    if resultados['tipo'] == TIPO_GRUPOS and 'grupos' in resultados:
+        for i, grupo in enumerate(resultados['grupos'], 1):
+            yield f"Sorteio {numero} - Grupo {i}", _linhas_grupo(resultados, i, grupo)
+    else:
+        yield f"Sorteio {numero}", _linhas_resultado(resultados)
+
+
+def exportar_xlsx(lista_resultados, arquivo):
+    from openpyxl import Workbook
+
+    # write_only grava cada linha num arquivo temporário em vez de montar
+    # as células em memória; fechar a aba ao terminar libera o arquivo. Cada
+    # aba ainda custa alguns KB de metadados no openpyxl: para milhares de
+    # sorteios, CSV ou JSON Lines mantêm a memória constante.
+    wb = Workbook(write_only=True)
+    for numero, resultados in enumerate(lista_resultados, 1):
+        for titulo, linhas in _abas(resultados, numero):
+            planilha = wb.create_sheet(titulo[:31])
+            for linha in linhas:
+                planilha.append(linha)
+            planilha.close()
+
+    if not wb.worksheets:
+        wb.create_sheet("Sorteio")
+    wb.save(arquivo)
+
+
+def _linhas_csv(resultados, numero):
+    base = [numero, resultados.get('data', ''), resultados['tipo'],
+            resultados.get('coluna', ''), resultados.get('classificacao', '')]
+
+    if resultados['tipo'] == TIPO_GRUPOS:
+        if 'grupos' in resultados:
+            for grupo, itens in enumerate(resultados['grupos'], 1):
+                for posicao, item in enumerate(itens, 1):
+                    yield base + [grupo, posicao, item, '']
+        else:
+            for grupo, _ in enumerate(resultados.get('itens_por_grupo', []), 1):
+                yield base + [grupo, '', '', '']
+        return
+
+    if resultados['tipo'] == TIPO_COTAS:
+        premios = resultados.get('premios') or {}
+        for classificacao, itens in _itens_das_cotas(resultados):
+            lista = premios.get(classificacao, [])
+            for posicao, item in enumerate(itens, 1):
+                premio = lista[posicao-1] if posicao <= len(lista) else ''
+                yield base[:4] + [classificacao, '', posicao, item, premio]
+        return
+
+    premios = resultados.get('premios') or []
+    for posicao, item in enumerate(resultados.get('itens', []), 1):
+        premio = premios[posicao-1] if posicao <= len(premios) else ''
+        yield base + ['', posicao, item, premio]
+
+
+def exportar_csv(lista_resultados, arquivo):
+    """Uma linha por item sorteado, com o número do sorteio e do grupo."""
+    with open(arquivo, "w", encoding='utf-8-sig', newline='') as f:
+        escritor = csv.writer(f, delimiter=';')
+        escritor.writerow(CAMPOS_CSV)
+        for numero, resultados in enumerate(lista_resultados, 1):
+            escritor.writerows(_linhas_csv(resultados, numero))
+
+
+def exportar_jsonl(lista_resultados, arquivo):
+    with open(arquivo, "w", encoding='utf-8') as f:
+        for resultados in lista_resultados:
+            f.write(json.dumps(resultados, ensure_ascii=False) + "\n")
+
+
+def escrever_json(lista_resultados, f):
+    # Mesmo texto de json.dump(lista, f, indent=4), sem montar a lista.
+    separador = "[\n"
+    for resultados in lista_resultados:
+        f.write(separador)
+        f.write("    " + json.dumps(resultados, indent=4, ensure_ascii=False).replace("\n", "\n    "))
+        separador = ",\n"
+    f.write("[]" if separador == "[\n" else "\n]")
+
+
+def exportar_json(lista_resultados, arquivo):
+    with open(arquivo, "w", encoding='utf-8') as f:
+        escrever_json(lista_resultados, f)
+
+
+EXPORTADORES = {
+    '.xlsx': exportar_xlsx,
+    '.csv': exportar_csv,
+    '.jsonl': exportar_jsonl,
+    '.json': exportar_json,
+}
+EXPORTADOR_PADRAO = exportar_json
+
+
+def exportar(lista_resultados, arquivo):
+    """Escolhe o formato pela extensão; extensões desconhecidas saem em JSON."""
+    exportador = EXPORTADORES.get(os.path.splitext(arquivo)[1].lower(), EXPORTADOR_PADRAO)
+    exportador(lista_resultados, arquivo)
@@ -0,0 +1,169 @@
+# O matplotlib e o NumPy não são importados no topo: a figura vem de quem
+# cria o canvas, e o NumPy só entra quando há muitas categorias a agrupar.
+from operator import itemgetter
+
+GRAFICO_VAZIO = 'vazio'
+GRAFICO_CLASSIFICACOES = 'classificacoes'
+GRAFICO_INICIAIS = 'iniciais'
+GRAFICO_VITORIAS = 'vitorias'
+
+LIMITE_FATIAS = 10
+LIMITE_BARRAS = 30
+ROTULO_OUTROS = "Outros"
+
+ROTULOS_EIXOS = {
+    GRAFICO_INICIAIS: ("Letra Inicial", "Quantidade"),
+    GRAFICO_VITORIAS: ("Vezes sorteado", "Participantes"),
+}
+
+
+def agrupar_excedentes(contagem, limite):
+    """[(rótulo, quantidade)] das limite-1 maiores, da maior para a menor,
+    mais "Outros" com a soma do resto. Até limite itens, nada é agrupado.
+    """
+    if len(contagem) <= limite:
+        return sorted(contagem.items(), key=itemgetter(1), reverse=True)
+
+    import numpy as np
+
+    rotulos = list(contagem)
+    quantidades = np.fromiter(contagem.values(), dtype=np.int64, count=len(contagem))
+    maiores = np.argpartition(quantidades, -(limite - 1))[-(limite - 1):]
+    maiores = maiores[np.argsort(quantidades[maiores], kind='stable')[::-1]]
+    resto = int(quantidades.sum() - quantidades[maiores].sum())
+    return [(rotulos[i], int(quantidades[i])) for i in maiores.tolist()] + [(ROTULO_OUTROS, resto)]
+
+
+def agregado_do_grafico(dados, coluna):
+    """(tipo, ((rótulo, quantidade), ...), título) do gráfico da planilha.
+
+    As contagens vêm memorizadas da própria tabela, então repetir a chamada
+    para os mesmos dados custa só o agrupamento, sobre poucas chaves.
+    """
+    if not dados:
+        return GRAFICO_VAZIO, (), "Nenhum dado carregado"
+
+    contagem = dados.contagem_classificacoes()
+    if len(contagem) > 1:
+        fatias = agrupar_excedentes(contagem, LIMITE_FATIAS)
+        return GRAFICO_CLASSIFICACOES, tuple(fatias), f"Distribuição por Classificação\nColuna {coluna}"
+
+    # Letras em ordem alfabética; "Outros", se houver, fica no fim.
+    barras = agrupar_excedentes(dados.contagem_iniciais(), LIMITE_BARRAS)
+    barras.sort(key=lambda par: (par[0] == ROTULO_OUTROS, par[0]))
+    return GRAFICO_INICIAIS, tuple(barras), f"Distribuição por Letra Inicial\nColuna {coluna}"
+
+
+def agregado_das_vitorias(indice):
+    """Histograma de quantos participantes foram sorteados 1, 2, ... vezes."""
+    frequencia = indice.frequencia_de_vitorias()[1:]
+    if not any(frequencia):
+        return GRAFICO_VAZIO, (), "Nenhum sorteio no histórico"
+
+    barras = [(str(vezes), quantidade) for vezes, quantidade in enumerate(frequencia, 1)]
+    if len(barras) > LIMITE_BARRAS:
+        cauda = sum(frequencia[LIMITE_BARRAS - 1:])
+        barras = barras[:LIMITE_BARRAS - 1] + [(f"{LIMITE_BARRAS}+", cauda)]
+    return GRAFICO_VITORIAS, tuple(barras), f"Frequência de Vitórias\n{indice.total} sorteios no histórico"
+
+
+class GraficoDistribuicao:
+    """Mantém os artistas do gráfico e só os altera quando o agregado muda.
+
+    Barras e pizza ficam em eixos separados, alternados por visibilidade.
+    Se os rótulos das barras não mudaram, só alturas e valores são
+    atualizados; caso contrário, apenas os artistas daquele eixo são
+    recriados, sem limpar a figura. Com o agrupamento em "Outros", o número
+    de artistas fica limitado por LIMITE_FATIAS e LIMITE_BARRAS.
+    """
+
+    def __init__(self, figure):
+        self.figure = figure
+        self.eixo_barras = figure.add_subplot(111)
+        self.eixo_pizza = figure.add_subplot(111, label='pizza')
+        self.barras = None
+        self.rotulos_barras = []
+        self.artistas_pizza = []
+        self.agregado = None
+
+        self.eixo_barras.set_visible(False)
+
+    def atualizar(self, agregado):
+        """Retorna True se algo mudou e o canvas precisa ser redesenhado."""
+        if agregado == self.agregado:
+            return False
+
+        tipo, contagem, titulo = agregado
+        anterior = self.agregado
+        self.agregado = agregado
+
+        if tipo in ROTULOS_EIXOS:
+            mesmas_barras = (
+                anterior is not None and anterior[0] == tipo
+                and [rotulo for rotulo, _ in anterior[1]] == [rotulo for rotulo, _ in contagem]
+            )
+            if mesmas_barras:
+                self._atualizar_barras(contagem)
+            else:
+                self._desenhar_barras(contagem)
+                self.eixo_barras.set_xlabel(ROTULOS_EIXOS[tipo][0])
+                self.eixo_barras.set_ylabel(ROTULOS_EIXOS[tipo][1])
+            self.eixo_barras.set_title(titulo)
+        elif tipo == GRAFICO_CLASSIFICACOES:
+            self._desenhar_pizza(contagem)
+            self.eixo_pizza.set_title(titulo)
+        else:
+            self._remover_pizza()
+            self.artistas_pizza.append(self.eixo_pizza.text(
+                0.5, 0.5, "Sem dados para exibir", ha='center', va='center'
+            ))
+            self.eixo_pizza.set_title(titulo)
+
+        self.eixo_barras.set_visible(tipo in ROTULOS_EIXOS)
+        self.eixo_pizza.set_visible(tipo not in ROTULOS_EIXOS)
+        return True
+
+    def _desenhar_barras(self, contagem):
+        if self.barras is not None:
+            self.barras.remove()
+        for rotulo in self.rotulos_barras:
+            rotulo.remove()
+
+        ax = self.eixo_barras
+        posicoes = range(len(contagem))
+        self.barras = ax.bar(posicoes, [quantidade for _, quantidade in contagem])
+        self.rotulos_barras = [
+            ax.text(i, quantidade, str(quantidade), ha='center', va='bottom')
+            for i, (_, quantidade) in enumerate(contagem)
+        ]
+        ax.set_xticks(posicoes, [rotulo for rotulo, _ in contagem])
+        self._ajustar_limite(contagem)
+
+    def _atualizar_barras(self, contagem):
+        for barra, rotulo, (_, quantidade) in zip(self.barras, self.rotulos_barras, contagem):
+            barra.set_height(quantidade)
+            rotulo.set_y(quantidade)
+            rotulo.set_text(str(quantidade))
+        self._ajustar_limite(contagem)
+
+    def _ajustar_limite(self, contagem):
+        maior = max((quantidade for _, quantidade in contagem), default=0)
+        self.eixo_barras.set_ylim(0, maior * 1.1 or 1)
+
+    def _desenhar_pizza(self, contagem):
+        self._remover_pizza()
+        valores = [quantidade for _, quantidade in contagem]
+        total = sum(valores)
+        fatias, textos, percentuais = self.eixo_pizza.pie(
+            valores,
+            labels=[classificacao for classificacao, _ in contagem],
+            autopct=lambda p: f'{p:.1f}%\n({round(p * total / 100)})',
+            startangle=90,
+            textprops={'fontsize': 8}
+        )
+        self.artistas_pizza = [*fatias, *textos, *percentuais]
+
+    def _remover_pizza(self):
+        for artista in self.artistas_pizza:
+            artista.remove()
+        self.artistas_pizza = []
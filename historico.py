@@ -0,0 +1,237 @@
+import json
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+DIRETORIO_PADRAO = Path.home() / "Documents"
+NOME_ARQUIVO = "Sorteador_historico.jsonl"
+NOME_ARQUIVO_MORTO = "Sorteador_historico.arquivo.jsonl"
+NOME_LEGADO = "Sorteador_historico.json"
+NOME_TRAVA = "Sorteador_historico.lock"
+
+LIMITE_ENTRADAS = 100_000
+VERIFICAR_A_CADA = 1000
+
+
+def data_ordenavel(data):
+    # "dd/mm/aaaa HH:MM" -> "aaaammdd", comparável como texto.
+    return data[6:10] + data[3:5] + data[0:2] if len(data) >= 10 else ''
+
+
+class HistoricoSorteios:
+    """Histórico em JSON Lines, só com acréscimos: um registro por linha.
+
+    Cada sorteio é gravado (com fsync) no momento em que acontece. Na leitura
+    as linhas são percorridas uma a uma; linhas corrompidas (por exemplo, uma
+    gravação interrompida) são ignoradas e removidas na próxima compactação.
+    A compactação também move os registros mais antigos que LIMITE_ENTRADAS
+    para o arquivo morto, que nunca é lido na inicialização.
+
+    O aplicativo e o servidor podem usar o mesmo arquivo ao mesmo tempo:
+    gravações, compactação e limpeza passam por uma trava entre processos
+    (trava()), e novas_entradas() lê só o que os outros acrescentaram desde a
+    última leitura deste objeto.
+    """
+
+    def __init__(self, diretorio=DIRETORIO_PADRAO, limite_entradas=LIMITE_ENTRADAS):
+        self.diretorio = Path(diretorio)
+        self.caminho = self.diretorio / NOME_ARQUIVO
+        self.caminho_morto = self.diretorio / NOME_ARQUIVO_MORTO
+        self.caminho_legado = self.diretorio / NOME_LEGADO
+        self.caminho_trava = self.diretorio / NOME_TRAVA
+        self.limite_entradas = limite_entradas
+        self.total_entradas = 0
+        self.linhas_invalidas = 0
+        # Até onde este objeto já leu (ou gravou) e de qual arquivo: a
+        # compactação troca o arquivo por outro (os.replace).
+        self.posicao = 0
+        self._identidade = None
+        self._acrescimos = 0
+        self._trava_local = threading.RLock()
+        self._arquivo_trava = None
+        self._travas = 0
+
+    @contextmanager
+    def trava(self):
+        """Trava exclusiva do histórico entre processos; reentrante."""
+        with self._trava_local:
+            if not self._travas:
+                self.diretorio.mkdir(parents=True, exist_ok=True)
+                arquivo = open(self.caminho_trava, "a+b")
+                try:
+                    if fcntl:
+                        fcntl.flock(arquivo.fileno(), fcntl.LOCK_EX)
+                    else:
+                        arquivo.seek(0)
+                        msvcrt.locking(arquivo.fileno(), msvcrt.LK_LOCK, 1)
+                except OSError:
+                    arquivo.close()
+                    raise
+                self._arquivo_trava = arquivo
+            self._travas += 1
+            try:
+                yield
+            finally:
+                self._travas -= 1
+                if not self._travas:
+                    arquivo, self._arquivo_trava = self._arquivo_trava, None
+                    # Fechar o arquivo solta a trava (flock e locking).
+                    arquivo.close()
+
+    @staticmethod
+    def _identidade_de(estado):
+        return estado.st_dev, estado.st_ino
+
+    def entradas(self):
+        self.migrar_legado()
+        self.total_entradas = 0
+        self.linhas_invalidas = 0
+        self.posicao = 0
+        self._identidade = None
+
+        if not self.caminho.exists():
+            return
+
+        with open(self.caminho, "rb") as f:
+            self._identidade = self._identidade_de(os.fstat(f.fileno()))
+            yield from self._ler_linhas(f, ate_o_fim=True)
+
+    def novas_entradas(self):
+        """Registros acrescentados ao arquivo desde a última leitura ou
+        gravação deste objeto, em ordem. None se o arquivo foi substituído
+        (compactado ou apagado por outro processo): aí é preciso ler tudo de
+        novo com entradas().
+        """
+        if not self.caminho.exists():
+            return [] if self._identidade is None else None
+        with open(self.caminho, "rb") as f:
+            estado = os.fstat(f.fileno())
+            if self._identidade_de(estado) != self._identidade or estado.st_size < self.posicao:
+                return None
+            if estado.st_size == self.posicao:
+                return []
+            f.seek(self.posicao)
+            return list(self._ler_linhas(f))
+
+    def _ler_linhas(self, f, ate_o_fim=False):
+        for linha in f:
+            # Uma linha sem quebra ainda pode estar sendo gravada: na leitura
+            # do fim do arquivo fica para a próxima vez.
+            if not linha.endswith(b'\n') and not ate_o_fim:
+                break
+            self.posicao += len(linha)
+            if not linha.strip():
+                continue
+            try:
+                registro = json.loads(linha)
+            except (json.JSONDecodeError, UnicodeDecodeError):
+                self.linhas_invalidas += 1
+                continue
+            if not isinstance(registro, dict):
+                self.linhas_invalidas += 1
+                continue
+            self.total_entradas += 1
+            yield registro
+
+    def registrar(self, registro):
+        """Grava o registro no fim do arquivo.
+
+        Retorna os registros que outros processos acrescentaram antes dele
+        desde a última leitura (novas_entradas()), para o chamador incluí-los
+        antes do seu, ou None se o arquivo foi substituído: aí ele precisa ser
+        lido de novo, já com este registro.
+        """
+        self.diretorio.mkdir(parents=True, exist_ok=True)
+        linha = json.dumps(registro, ensure_ascii=False).encode('utf-8') + b'\n'
+
+        with self.trava():
+            novas = self.novas_entradas()
+            with open(self.caminho, "a+b") as f:
+                # Uma gravação interrompida pode ter deixado a última linha sem
+                # quebra; sem esta correção o novo registro seria colado nela.
+                if f.seek(0, os.SEEK_END):
+                    f.seek(-1, os.SEEK_END)
+                    if f.read(1) != b'\n':
+                        linha = b'\n' + linha
+                f.write(linha)
+                f.flush()
+                os.fsync(f.fileno())
+                if novas is not None:
+                    self.posicao = f.tell()
+                    self._identidade = self._identidade_de(os.fstat(f.fileno()))
+
+            self.total_entradas += 1
+            self._acrescimos += 1
+            if self._acrescimos >= VERIFICAR_A_CADA:
+                self._acrescimos = 0
+                if self.limite_entradas and self.total_entradas > self.limite_entradas:
+                    self.compactar()
+        return novas
+
+    def compactar(self):
+        with self.trava():
+            if not self.caminho.exists():
+                return
+
+            total = sum(1 for _ in self.entradas())
+            excedentes = max(total - self.limite_entradas, 0) if self.limite_entradas else 0
+            registros = self.entradas()
+
+            if excedentes:
+                with open(self.caminho_morto, "a", encoding='utf-8') as f:
+                    for _, registro in zip(range(excedentes), registros):
+                        f.write(json.dumps(registro, ensure_ascii=False) + "\n")
+                    f.flush()
+                    os.fsync(f.fileno())
+
+            self._regravar(registros)
+            self.total_entradas = total - excedentes
+            self.linhas_invalidas = 0
+
+    def precisa_compactar(self):
+        return bool(self.linhas_invalidas) or bool(
+            self.limite_entradas and self.total_entradas > self.limite_entradas
+        )
+
+    def limpar(self):
+        with self.trava():
+            for caminho in (self.caminho, self.caminho_morto):
+                if caminho.exists():
+                    caminho.unlink()
+        self.total_entradas = 0
+        self.linhas_invalidas = 0
+        self.posicao = 0
+        self._identidade = None
+
+    def migrar_legado(self):
+        if self.caminho.exists() or not self.caminho_legado.exists():
+            return
+
+        try:
+            with open(self.caminho_legado, "r", encoding='utf-8') as f:
+                dados = json.load(f)
+        except json.JSONDecodeError:
+            self.caminho_legado.rename(self.caminho_legado.with_suffix('.json.corrompido'))
+            raise
+        self._regravar(dados if isinstance(dados, list) else [])
+        self.caminho_legado.rename(self.caminho_legado.with_suffix('.json.migrado'))
+
+    def _regravar(self, registros):
+        self.diretorio.mkdir(parents=True, exist_ok=True)
+        temporario = self.caminho.with_suffix('.jsonl.tmp')
+        with open(temporario, "w", encoding='utf-8') as f:
+            for registro in registros:
+                f.write(json.dumps(registro, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+            estado = os.fstat(f.fileno())
+        os.replace(temporario, self.caminho)
+        self.posicao = estado.st_size
+        self._identidade = self._identidade_de(estado)
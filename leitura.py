@@ -0,0 +1,242 @@
+import csv
+import math
+import os
+from array import array
+from contextlib import contextmanager
+
+from participantes import TabelaParticipantes
+
+ASSINATURA_XLSX = b'\x50\x4B\x03\x04'
+ASSINATURA_PARQUET = b'PAR1'
+LINHAS_POR_AVISO = 5000
+TAMANHO_BLOCO = 1 << 20
+TAMANHO_AMOSTRA = 64 * 1024
+LINHAS_POR_LOTE_PARQUET = 64 * 1024
+
+
+class OperacaoCancelada(Exception):
+    pass
+
+
+def indice_da_coluna(letra):
+    indice = 0
+    for caractere in letra.upper():
+        indice = indice * 26 + ord(caractere) - ord('A') + 1
+    return indice - 1
+
+
+def letra_da_coluna(indice):
+    letras = ''
+    indice += 1
+    while indice:
+        indice, resto = divmod(indice - 1, 26)
+        letras = chr(ord('A') + resto) + letras
+    return letras
+
+
+INDICE_CLASSIFICACAO = indice_da_coluna('B')
+
+
+def converter_peso(valor, numero_linha):
+    """Peso de uma linha: célula vazia vale 1 e texto aceita vírgula decimal."""
+    if valor is None or valor == '':
+        return 1.0
+    try:
+        peso = float(valor.strip().replace(',', '.') if isinstance(valor, str) else valor)
+    except (TypeError, ValueError):
+        peso = math.nan
+    if not 0 <= peso < math.inf:
+        raise ValueError(f"Peso inválido na linha {numero_linha}: {valor!r}")
+    return peso
+
+
+def validar_excel(arquivo):
+    with open(arquivo, 'rb') as f:
+        if f.read(4) != ASSINATURA_XLSX:
+            raise ValueError("O arquivo selecionado não é um Excel válido")
+
+
+def validar_parquet(arquivo):
+    with open(arquivo, 'rb') as f:
+        if f.read(4) != ASSINATURA_PARQUET:
+            raise ValueError("O arquivo selecionado não é um Parquet válido")
+
+
+@contextmanager
+def abrir_excel(arquivo, aba=None):
+    from openpyxl import load_workbook
+
+    wb = load_workbook(arquivo, read_only=True, data_only=True)
+    try:
+        planilha = wb[aba] if aba is not None else wb.active
+        total = planilha.max_row or 0
+        planilha.reset_dimensions()
+        yield total, planilha.iter_rows(min_row=2, values_only=True)
+    finally:
+        wb.close()
+
+
+def _detectar_codificacao(amostra):
+    try:
+        amostra.decode('utf-8')
+    except UnicodeDecodeError as e:
+        # Um caractere multibyte cortado no fim da amostra não conta.
+        if e.start < len(amostra) - 3:
+            return 'cp1252'
+    return 'utf-8-sig'
+
+
+@contextmanager
+def abrir_csv(arquivo, delimitador=None):
+    with open(arquivo, 'rb') as f:
+        amostra = f.read(TAMANHO_AMOSTRA)
+    codificacao = _detectar_codificacao(amostra)
+
+    if delimitador is None:
+        try:
+            texto = amostra.decode(codificacao, errors='ignore')
+            delimitador = csv.Sniffer().sniff(texto, delimiters=',;\t|').delimiter
+        except csv.Error:
+            delimitador = ','
+
+    with open(arquivo, newline='', encoding=codificacao, buffering=TAMANHO_BLOCO) as f:
+        leitor = csv.reader(f, delimiter=delimitador)
+        next(leitor, None)
+        yield 0, leitor
+
+
+@contextmanager
+def abrir_tsv(arquivo):
+    with abrir_csv(arquivo, delimitador='\t') as fonte:
+        yield fonte
+
+
+@contextmanager
+def abrir_parquet(arquivo):
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ValueError("A leitura de Parquet requer o pacote pyarrow (pip install pyarrow)")
+
+    arquivo_parquet = pq.ParquetFile(arquivo)
+    try:
+        lotes = arquivo_parquet.iter_batches(batch_size=LINHAS_POR_LOTE_PARQUET)
+        linhas = (linha for lote in lotes for linha in zip(*(coluna.to_pylist() for coluna in lote.columns)))
+        yield arquivo_parquet.metadata.num_rows, linhas
+    finally:
+        arquivo_parquet.close()
+
+
+# Extensão -> (validação, abertura). A abertura é um gerenciador de contexto
+# que entrega (total_estimado, linhas de dados sem o cabeçalho).
+LEITORES = {
+    '.xlsx': (validar_excel, abrir_excel),
+    '.xlsm': (validar_excel, abrir_excel),
+    '.csv': (None, abrir_csv),
+    '.txt': (None, abrir_csv),
+    '.tsv': (None, abrir_tsv),
+    '.tab': (None, abrir_tsv),
+    '.parquet': (validar_parquet, abrir_parquet),
+    '.pq': (validar_parquet, abrir_parquet),
+}
+LEITOR_PADRAO = (validar_excel, abrir_excel)
+
+
+def registrar_leitor(extensoes, abrir, validar=None):
+    for extensao in extensoes:
+        LEITORES[extensao.lower()] = (validar, abrir)
+
+
+def leitor_para(arquivo):
+    return LEITORES.get(os.path.splitext(arquivo)[1].lower(), LEITOR_PADRAO)
+
+
+def validar_arquivo(arquivo):
+    validar, _ = leitor_para(arquivo)
+    if validar:
+        validar(arquivo)
+
+
+def ler_planilha(arquivo, coluna=None, progresso=None, cancelar=None, coluna_peso=None, aba=None):
+    """Lê o arquivo numa única passada, com o leitor da sua extensão.
+
+    Descobre as colunas com dados (a partir da linha 2) e extrai, na mesma
+    passada, os itens da coluna pedida junto com a classificação (coluna B)
+    da mesma linha. Sem coluna, usa a primeira coluna com dados. Com
+    coluna_peso, a tabela também recebe o peso numérico de cada item.
+
+    A cada LINHAS_POR_AVISO linhas chama progresso(linhas_lidas, total), com
+    total 0 quando o formato não informa o número de linhas, e levanta
+    OperacaoCancelada se cancelar() retornar verdadeiro. aba escolhe a aba
+    de um Excel (padrão: a ativa); os outros formatos não têm abas.
+
+    Retorna (colunas_disponiveis, coluna, TabelaParticipantes).
+    """
+    _, abrir = leitor_para(arquivo)
+    # Só o Excel tem abas: nos outros formatos aba é ignorada, e por nome,
+    # para nunca virar o delimitador de abrir_csv.
+    com_aba = aba is not None and abrir is abrir_excel
+
+    with (abrir(arquivo, aba=aba) if com_aba else abrir(arquivo)) as (total, linhas):
+        preenchidas = set()
+        alvo = indice_da_coluna(coluna) if coluna else None
+        indice_peso = indice_da_coluna(coluna_peso) if coluna_peso else None
+
+        def nova_tabela():
+            return TabelaParticipantes(pesos=array('d') if coluna_peso else None)
+
+        dados = nova_tabela()
+
+        for numero, linha in enumerate(linhas, 1):
+            if numero % LINHAS_POR_AVISO == 0:
+                if cancelar and cancelar():
+                    raise OperacaoCancelada()
+                if progresso:
+                    progresso(numero, total)
+
+            for i, valor in enumerate(linha):
+                if valor and i not in preenchidas:
+                    preenchidas.add(i)
+                    # Uma coluna mais à esquerda só aparece quando recebe
+                    # o primeiro valor, então não há itens dela a perder.
+                    if coluna is None and (alvo is None or i < alvo):
+                        alvo = i
+                        dados = nova_tabela()
+
+            if alvo is None or alvo >= len(linha) or not linha[alvo]:
+                continue
+
+            classificacao = linha[INDICE_CLASSIFICACAO] if len(linha) > INDICE_CLASSIFICACAO else None
+            peso = 1.0
+            if indice_peso is not None:
+                peso = converter_peso(linha[indice_peso] if indice_peso < len(linha) else None, numero + 1)
+            dados.adicionar(
+                str(linha[alvo]).strip(),
+                str(classificacao).strip() if classificacao else '',
+                peso
+            )
+
+    colunas = [letra_da_coluna(i) for i in sorted(preenchidas)]
+    coluna = letra_da_coluna(alvo) if alvo is not None else coluna
+    return colunas, coluna, dados
+
+
+def percorrer_planilha(arquivo, coluna, coluna_peso=None):
+    """Gera (nome, classificação, peso) de cada linha sem montar a tabela.
+
+    Para sorteios em fluxo sobre arquivos grandes demais para a memória; a
+    coluna precisa ser informada, já que não há passada de descoberta.
+    """
+    _, abrir = leitor_para(arquivo)
+    alvo = indice_da_coluna(coluna)
+    indice_peso = indice_da_coluna(coluna_peso) if coluna_peso else None
+
+    with abrir(arquivo) as (_, linhas):
+        for numero, linha in enumerate(linhas, 2):
+            if alvo >= len(linha) or not linha[alvo]:
+                continue
+            classificacao = linha[INDICE_CLASSIFICACAO] if len(linha) > INDICE_CLASSIFICACAO else None
+            peso = 1.0
+            if indice_peso is not None:
+                peso = converter_peso(linha[indice_peso] if indice_peso < len(linha) else None, numero)
+            yield str(linha[alvo]).strip(), str(classificacao).strip() if classificacao else '', peso
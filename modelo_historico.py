@@ -0,0 +1,155 @@
+from PyQt6.QtCore import QAbstractTableModel, QModelIndex, QSortFilterProxyModel, Qt
+
+from historico import data_ordenavel
+from motor_sorteio import TIPO_CLASSIFICACAO, TIPO_COLOCACAO, TIPO_COTAS, TIPO_GRUPOS
+
+CABECALHOS = ["Nº", "Data", "Tipo", "Coluna", "Descrição"]
+COLUNA_NUMERO, COLUNA_DATA, COLUNA_TIPO, COLUNA_COLUNA, COLUNA_DESCRICAO = range(len(CABECALHOS))
+
+
+def descrever_registro(item):
+    texto = _descrever_tipo(item)
+    if item.get("ponderado"):
+        texto += " [PONDERADO]"
+    if "exclusao" in item:
+        texto += f" [EXCLUIU {item.get('excluidos', 0)} VENCEDORES]"
+    return texto
+
+
+def _descrever_tipo(item):
+    if item.get("tipo") == TIPO_GRUPOS:
+        tamanhos = item.get('itens_por_grupo', [])
+        if len(tamanhos) > 10:
+            tamanhos = f"{min(tamanhos)} a {max(tamanhos)}"
+        texto = f"{item.get('num_grupos', '?')} grupos (Itens por grupo: {tamanhos})"
+        if item.get("estratificado"):
+            texto += " [ESTRATIFICADO]"
+        return texto
+    if item.get("tipo") == TIPO_CLASSIFICACAO:
+        return (
+            f"{item.get('quantidade', '?')} itens da classificação "
+            f"'{item.get('classificacao', 'Desconhecida')}'"
+        )
+    if item.get("tipo") == TIPO_COTAS:
+        texto = f"{item.get('quantidade', '?')} itens em {len(item.get('cotas', {}))} classificações"
+        if item.get("premiados"):
+            texto += " [COM PRÊMIOS]"
+        return texto
+    if item.get("tipo") == TIPO_COLOCACAO:
+        texto = f"{item.get('quantidade', '?')} itens sorteados com colocação"
+        if item.get("premiados"):
+            texto += " [COM PRÊMIOS]"
+        return texto
+    return f"{item.get('quantidade', '?')} itens sorteados"
+
+
+class ModeloHistorico(QAbstractTableModel):
+    """Registros do histórico, do mais recente para o mais antigo.
+
+    O texto de cada célula só é montado quando a view pede a linha, e um
+    sorteio novo entra com um único beginInsertRows, sem reconstruir a lista.
+    """
+
+    def __init__(self, registros=None, parent=None):
+        super().__init__(parent)
+        self.registros = registros if registros is not None else []
+        self.tipos = set()
+        self.colunas = set()
+        self._indexar_valores(self.registros)
+
+    def definir(self, registros):
+        self.beginResetModel()
+        self.registros = registros
+        self.tipos = set()
+        self.colunas = set()
+        self._indexar_valores(registros)
+        self.endResetModel()
+
+    def adicionar(self, registro):
+        self.acrescentar([registro])
+
+    def acrescentar(self, registros):
+        # A linha 0 é sempre o registro mais recente, então os novos entram no
+        # topo. A lista é a mesma do chamador, que vê o acréscimo também.
+        if not registros:
+            return
+        self.beginInsertRows(QModelIndex(), 0, len(registros) - 1)
+        self.registros.extend(registros)
+        self._indexar_valores(registros)
+        self.endInsertRows()
+
+    def registro(self, linha):
+        return self.registros[len(self.registros) - 1 - linha]
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.registros)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(CABECALHOS)
+
+    def headerData(self, secao, orientacao, papel=Qt.ItemDataRole.DisplayRole):
+        if orientacao == Qt.Orientation.Horizontal and papel == Qt.ItemDataRole.DisplayRole:
+            return CABECALHOS[secao]
+        return None
+
+    def data(self, indice, papel=Qt.ItemDataRole.DisplayRole):
+        if not indice.isValid() or papel != Qt.ItemDataRole.DisplayRole:
+            return None
+
+        item = self.registro(indice.row())
+        coluna = indice.column()
+        if coluna == COLUNA_NUMERO:
+            return len(self.registros) - indice.row()
+        if coluna == COLUNA_DATA:
+            return item.get('data', 'Data desconhecida')
+        if coluna == COLUNA_TIPO:
+            return item.get('tipo', '')
+        if coluna == COLUNA_COLUNA:
+            return item.get('coluna', '')
+        return descrever_registro(item)
+
+    def _indexar_valores(self, registros):
+        for item in registros:
+            self.tipos.add(item.get('tipo', ''))
+            if item.get('coluna'):
+                self.colunas.add(item['coluna'])
+
+
+class FiltroHistorico(QSortFilterProxyModel):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.tipo = None
+        self.coluna = None
+        self.data_inicial = ''
+        self.data_final = ''
+        self.ids = None
+
+    def filtrar(self, tipo=None, coluna=None, data_inicial='', data_final='', ids=None):
+        """Datas no formato "aaaammdd"; vazias não limitam o período.
+
+        ids, se dado, restringe aos registros nessas posições do histórico
+        (0 = o mais antigo), como as devolvidas por IndiceHistorico.
+        """
+        self.tipo = tipo
+        self.coluna = coluna
+        self.data_inicial = data_inicial
+        self.data_final = data_final
+        self.ids = ids
+        self.invalidateFilter()
+
+    def filterAcceptsRow(self, linha, parent):
+        modelo = self.sourceModel()
+        if self.ids is not None and modelo.rowCount() - 1 - linha not in self.ids:
+            return False
+        item = modelo.registro(linha)
+        if self.tipo and item.get('tipo') != self.tipo:
+            return False
+        if self.coluna and item.get('coluna') != self.coluna:
+            return False
+        if self.data_inicial or self.data_final:
+            data = data_ordenavel(item.get('data', ''))
+            if self.data_inicial and data < self.data_inicial:
+                return False
+            if self.data_final and data > self.data_final:
+                return False
+        return True
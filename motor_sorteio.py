@@ -0,0 +1,388 @@
+import hashlib
+import json
+import random
+import secrets
+from collections import deque
+from datetime import datetime
+
+from agrupamento import dividir_em_grupos, numero_de_grupos
+from amostragem import amostrar_indices, amostrar_ponderado, amostrar_reservatorio, amostrar_reservatorio_ponderado
+from participantes import PopulacaoEmFluxo
+
+TIPO_SORTEIO = 'Sorteio'
+TIPO_COLOCACAO = 'Sorteio com Colocação'
+TIPO_GRUPOS = 'Grupos'
+TIPO_CLASSIFICACAO = 'Sorteio por Classificação'
+TIPO_COTAS = 'Sorteio por Cotas'
+
+LIMITE_ITENS_EXIBIDOS = 10000
+
+
+def agora():
+    return datetime.now().strftime("%d/%m/%Y %H:%M")
+
+
+def premios_padrao(quantidade):
+    return ["Ouro", "Prata", "Bronze"] + [f"Menção {i}" for i in range(4, quantidade + 1)]
+
+
+def ler_cotas(linhas):
+    """(cotas, premios) de linhas "classificação: quantidade [| prêmio, prêmio...]".
+
+    "padrao" no lugar dos prêmios usa premios_padrao. Linhas vazias são
+    ignoradas; a ordem das linhas é a ordem do resultado.
+    """
+    cotas = {}
+    premios = {}
+    for numero, linha in enumerate(linhas, 1):
+        linha, _, lista_premios = linha.partition('|')
+        if not linha.strip():
+            continue
+        classificacao, separador, quantidade = linha.rpartition(':')
+        try:
+            quantidade = int(quantidade)
+        except ValueError:
+            quantidade = -1
+        if not separador or quantidade < 0:
+            raise ValueError(f"Cota inválida na linha {numero}: use 'classificação: quantidade'")
+
+        classificacao = classificacao.strip()
+        cotas[classificacao] = quantidade
+        lista_premios = lista_premios.strip()
+        if lista_premios == 'padrao':
+            premios[classificacao] = premios_padrao(quantidade)
+        elif lista_premios:
+            premios[classificacao] = [premio.strip() for premio in lista_premios.split(',') if premio.strip()]
+    return cotas, premios
+
+
+def gerador(semente=None):
+    """(semente, random.Random(semente)).
+
+    Sem semente, sorteia uma de 64 bits com o gerador do sistema operacional.
+    Guardada no histórico, ela permite refazer o sorteio numa auditoria.
+    """
+    if semente is None:
+        semente = secrets.randbits(64)
+    return semente, random.Random(semente)
+
+
+def _preparar_rng(rng, semente):
+    # Um rng passado pelo chamador tem estado próprio e não pode ser registrado.
+    if rng is not None:
+        return None, rng
+    return gerador(semente)
+
+
+def hash_resultado(resultados):
+    conteudo = resultados['grupos'] if resultados['tipo'] == TIPO_GRUPOS else resultados['itens']
+    return hashlib.blake2b(json.dumps(conteudo, ensure_ascii=False).encode('utf-8'), digest_size=20).hexdigest()
+
+
+def _auditar(resultados, registro, semente, tabela=None):
+    if semente is None:
+        return
+    resultados['semente'] = semente
+    registro['semente'] = semente
+    registro['hash_resultado'] = hash_resultado(resultados)
+    if tabela is not None:
+        registro['hash_populacao'] = tabela.hash_conteudo()
+
+
+def _sortear_indices(tabela, quantidade, rng, indices=None, exclusao=None):
+    # Só posições são sorteadas; com coluna de peso, proporcionalmente a ela.
+    excluido = None
+    if exclusao:
+        nomes = tabela.nomes
+
+        def excluido(i):
+            return exclusao.descartar(nomes[i])
+
+    if tabela.pesos is not None:
+        return amostrar_ponderado(tabela.pesos, quantidade, rng, indices, excluido)
+    return amostrar_indices(len(tabela), quantidade, rng, indices, excluido)
+
+
+def _anotar_exclusao(registro, exclusao):
+    # As chaves descartadas dispensam o histórico na verificação: a
+    # compactação muda a posição dos registros anteriores.
+    if exclusao is not None:
+        registro["exclusao"] = exclusao.escopo
+        registro.update(exclusao.anotacao())
+
+
+def _anotar_registro(registro, tabela, indices):
+    classificacoes = [tabela.classificacoes[i] for i in indices]
+    if any(classificacoes):
+        registro["classificacoes"] = classificacoes
+    if tabela.pesos is not None:
+        registro["ponderado"] = True
+    _anotar_fontes(registro, tabela, indices)
+
+
+def _anotar_fontes(registro, tabela, indices):
+    # Planilhas combinadas: de qual planilha (e aba) veio cada sorteado.
+    if tabela.origens is not None:
+        registro["fontes_itens"] = [tabela.fonte_de(i) for i in indices]
+
+
+def sortear(tabela, quantidade, coluna, rng=None, semente=None, exclusao=None):
+    semente, rng = _preparar_rng(rng, semente)
+    indices = _sortear_indices(tabela, quantidade, rng, exclusao=exclusao)
+    resultados, registro = _resultado_sorteio([tabela.nomes[i] for i in indices], quantidade, coluna)
+    _anotar_registro(registro, tabela, indices)
+    _anotar_exclusao(registro, exclusao)
+    _auditar(resultados, registro, semente, tabela)
+    return resultados, registro
+
+
+def _resultado_sorteio(sorteados, quantidade, coluna):
+    data = agora()
+
+    resultados = {
+        'tipo': TIPO_SORTEIO,
+        'coluna': coluna,
+        'itens': sorteados,
+        'data': data
+    }
+    registro = {
+        "data": data,
+        "tipo": TIPO_SORTEIO,
+        "quantidade": quantidade,
+        "coluna": coluna,
+        "itens": sorteados
+    }
+    return resultados, registro
+
+
+def sortear_com_colocacao(tabela, quantidade, coluna, premios=None, rng=None, semente=None, exclusao=None):
+    semente, rng = _preparar_rng(rng, semente)
+    indices = _sortear_indices(tabela, quantidade, rng, exclusao=exclusao)
+    resultados, registro = _resultado_colocacao(
+        [tabela.nomes[i] for i in indices], quantidade, coluna, premios
+    )
+    _anotar_registro(registro, tabela, indices)
+    _anotar_exclusao(registro, exclusao)
+    _auditar(resultados, registro, semente, tabela)
+    return resultados, registro
+
+
+def _resultado_colocacao(sorteados, quantidade, coluna, premios):
+    data = agora()
+
+    resultados = {
+        'tipo': TIPO_COLOCACAO,
+        'coluna': coluna,
+        'itens': sorteados,
+        'premios': premios if premios else None,
+        'data': data
+    }
+    registro = {
+        "data": data,
+        "tipo": TIPO_COLOCACAO,
+        "quantidade": quantidade,
+        "coluna": coluna,
+        "premiados": bool(premios),
+        "itens": sorteados
+    }
+    return resultados, registro
+
+
+def sortear_em_fluxo(linhas, quantidade, coluna, premios=None, colocacao=False, ponderado=False,
+                     rng=None, semente=None):
+    """Sorteia direto de um iterável de (nome, classificação, peso).
+
+    Guarda só os sorteados (amostragem por reservatório), para listas que
+    não cabem na memória, como as de leitura.percorrer_planilha. O registro
+    é marcado com "fluxo": a verificação refaz a mesma leitura e o mesmo
+    algoritmo, e confere o hash da população calculado durante a passada.
+    """
+    semente, rng = _preparar_rng(rng, semente)
+    populacao = PopulacaoEmFluxo(linhas, ponderado)
+    linhas = iter(populacao)
+    if ponderado:
+        sorteados = amostrar_reservatorio_ponderado(((nome, peso) for nome, _, peso in linhas), quantidade, rng)
+    else:
+        sorteados = amostrar_reservatorio((nome for nome, _, _ in linhas), quantidade, rng)
+    # O hash cobre a população inteira, mesmo se a amostragem parou antes.
+    deque(linhas, maxlen=0)
+
+    if colocacao:
+        resultados, registro = _resultado_colocacao(sorteados, quantidade, coluna, premios)
+    else:
+        resultados, registro = _resultado_sorteio(sorteados, quantidade, coluna)
+    if ponderado:
+        registro["ponderado"] = True
+    registro["fluxo"] = True
+    _auditar(resultados, registro, semente, populacao)
+    return resultados, registro
+
+
+def formar_grupos(tabela, num_grupos, coluna, rng=None, semente=None, tamanho=None, estratificado=False):
+    """num_grupos grupos ou, com tamanho, grupos de no máximo tamanho itens.
+
+    Com estratificado, cada grupo recebe uma parte proporcional de cada
+    classificação (ver agrupamento.dividir_em_grupos).
+    """
+    num_grupos = numero_de_grupos(len(tabela), num_grupos, tamanho)
+    semente, rng = _preparar_rng(rng, semente)
+    if estratificado:
+        codigos, categorias = tabela.codigos_classificacoes()
+        posicoes = dividir_em_grupos(len(tabela), num_grupos, rng, codigos, len(categorias))
+    else:
+        posicoes = dividir_em_grupos(len(tabela), num_grupos, rng)
+    # Todos os nomes entram nos grupos: decodificados de uma vez, em blocos.
+    nomes = list(tabela.nomes)
+    grupos = [[nomes[i] for i in grupo] for grupo in posicoes]
+    data = agora()
+
+    resultados = {
+        'tipo': TIPO_GRUPOS,
+        'coluna': coluna,
+        'grupos': grupos,
+        'data': data
+    }
+    registro = {
+        "data": data,
+        "tipo": TIPO_GRUPOS,
+        "num_grupos": num_grupos,
+        "coluna": coluna,
+        "itens_por_grupo": [len(g) for g in grupos]
+    }
+    if tamanho is not None:
+        registro["tamanho_grupo"] = tamanho
+    if estratificado:
+        registro["estratificado"] = True
+    _auditar(resultados, registro, semente, tabela)
+    return resultados, registro
+
+
+def sortear_por_classificacao(tabela, classificacao, quantidade, rng=None, semente=None, exclusao=None):
+    semente, rng = _preparar_rng(rng, semente)
+    indices = tabela.indices_da_classificacao(classificacao)
+    if not indices:
+        raise ValueError(f"Nenhum item com classificação '{classificacao}'")
+
+    indices = _sortear_indices(tabela, quantidade, rng, indices, exclusao)
+    sorteados = [tabela.nomes[i] for i in indices]
+    data = agora()
+
+    resultados = {
+        'tipo': TIPO_CLASSIFICACAO,
+        'classificacao': classificacao,
+        'itens': sorteados,
+        'data': data
+    }
+    registro = {
+        "data": data,
+        "tipo": TIPO_CLASSIFICACAO,
+        "classificacao": classificacao,
+        "quantidade": quantidade,
+        "itens": sorteados
+    }
+    if tabela.pesos is not None:
+        registro["ponderado"] = True
+    _anotar_fontes(registro, tabela, indices)
+    _anotar_exclusao(registro, exclusao)
+    _auditar(resultados, registro, semente, tabela)
+    return resultados, registro
+
+
+def sortear_por_cotas(tabela, cotas, coluna, premios=None, rng=None, semente=None, exclusao=None):
+    """Um sorteio de cotas[classificação] itens em cada classificação.
+
+    As posições de cada classificação vêm do índice da tabela, montado uma
+    vez; todas as cotas são validadas antes de qualquer sorteio e o
+    resultado é um só registro, com os itens na ordem das cotas.
+    """
+    por_classificacao = tabela.indices_por_classificacao()
+    for classificacao, quantidade in cotas.items():
+        disponiveis = len(por_classificacao.get(classificacao, ()))
+        if not disponiveis:
+            raise ValueError(f"Nenhum item com classificação '{classificacao}'")
+        if not 0 <= quantidade <= disponiveis:
+            raise ValueError(f"A cota de '{classificacao}' deve estar entre 0 e {disponiveis}")
+
+    semente, rng = _preparar_rng(rng, semente)
+    premios = premios or {}
+    sorteados = {}
+    todos = []
+    for classificacao, quantidade in cotas.items():
+        indices = _sortear_indices(
+            tabela, quantidade, rng, por_classificacao[classificacao],
+            exclusao.para(classificacao) if exclusao is not None else None
+        )
+        sorteados[classificacao] = [tabela.nomes[i] for i in indices]
+        todos.extend(indices)
+    itens = [nome for nomes in sorteados.values() for nome in nomes]
+    data = agora()
+
+    resultados = {
+        'tipo': TIPO_COTAS,
+        'coluna': coluna,
+        'cotas': sorteados,
+        'premios': {cls: lista for cls, lista in premios.items() if cls in cotas} or None,
+        'itens': itens,
+        'data': data
+    }
+    registro = {
+        "data": data,
+        "tipo": TIPO_COTAS,
+        "quantidade": len(itens),
+        "coluna": coluna,
+        "cotas": dict(cotas),
+        "premiados": bool(resultados['premios']),
+        "itens": itens,
+        "classificacoes": [cls for cls, nomes in sorteados.items() for _ in nomes]
+    }
+    if tabela.pesos is not None:
+        registro["ponderado"] = True
+    _anotar_fontes(registro, tabela, todos)
+    _anotar_exclusao(registro, exclusao)
+    _auditar(resultados, registro, semente, tabela)
+    return resultados, registro
+
+
+def formatar_resultado(resultados):
+    tipo = resultados['tipo']
+
+    if tipo == TIPO_COLOCACAO:
+        premios = resultados.get('premios') or []
+        texto = "🏆 RESULTADO COM COLOCAÇÃO:\n\n"
+        for posicao, item in enumerate(resultados['itens'], 1):
+            linha = f"{posicao}º lugar: {item}"
+            if posicao <= len(premios):
+                linha += f" - Prêmio: {premios[posicao-1]}"
+            texto += linha + "\n"
+        return texto
+
+    if tipo == TIPO_GRUPOS:
+        # Com milhares de grupos, o texto para após LIMITE_ITENS_EXIBIDOS nomes;
+        # o resultado completo continua disponível na exportação.
+        partes = ["🏆 GRUPOS CRIADOS:\n\n"]
+        exibidos = 0
+        for i, grupo in enumerate(resultados['grupos'], 1):
+            if exibidos >= LIMITE_ITENS_EXIBIDOS:
+                partes.append(f"... e mais {len(resultados['grupos']) - i + 1} grupos (exporte para ver todos)\n")
+                break
+            partes.append(f"Grupo {i} ({len(grupo)} itens):\n• " + "\n• ".join(grupo) + "\n\n")
+            exibidos += len(grupo)
+        return "".join(partes)
+
+    if tipo == TIPO_COTAS:
+        premios = resultados.get('premios') or {}
+        partes = ["🎯 SORTEIO POR COTAS:\n"]
+        for classificacao, itens in resultados['cotas'].items():
+            partes.append(f"\n🏷️ {classificacao} ({len(itens)}):\n")
+            lista = premios.get(classificacao, [])
+            for posicao, item in enumerate(itens, 1):
+                linha = f"{posicao}º: {item}"
+                if posicao <= len(lista):
+                    linha += f" - Prêmio: {lista[posicao-1]}"
+                partes.append(linha + "\n")
+        return "".join(partes)
+
+    if tipo == TIPO_CLASSIFICACAO:
+        return f"🏷️ Itens da classificação '{resultados['classificacao']}':\n\n• " + "\n• ".join(resultados['itens'])
+
+    return "🎉 ITENS SORTEADOS:\n\n• " + "\n• ".join(resultados['itens'])
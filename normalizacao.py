@@ -0,0 +1,154 @@
+import re
+import string
+import sys
+import unicodedata
+from array import array
+from itertools import repeat
+
+from participantes import TabelaParticipantes
+
+DEDUP_PRIMEIRO = 'primeiro'
+DEDUP_MESCLAR = 'mesclar'
+DEDUP_PESO = 'peso'
+POLITICAS_DEDUP = {
+    DEDUP_PRIMEIRO: "Manter o primeiro",
+    DEDUP_MESCLAR: "Mesclar",
+    DEDUP_PESO: "Contar como peso",
+}
+
+LIMITE_VARIANTES = 5
+
+_BORDAS = re.compile(r'^[\W_]+|[\W_]+$')
+_PONTUACAO_ASCII = string.punctuation + string.whitespace
+
+
+def limpar_nome(nome):
+    """Nome para exibição: NFKC e espaços internos reduzidos a um."""
+    if not nome.isascii():
+        nome = unicodedata.normalize('NFKC', nome)
+    return ' '.join(nome.split())
+
+
+def chave_normalizada(nome):
+    """Chave de comparação: sem acentos, casefold, espaços reduzidos e sem
+    pontuação nas pontas. Nomes só com pontuação dão ''.
+
+    NFKD já inclui a compatibilidade do NFKC e separa os acentos, que são
+    então descartados; nomes ASCII, a maioria, pulam essa etapa.
+    """
+    if not nome.isascii():
+        nome = ''.join(c for c in unicodedata.normalize('NFKD', nome) if not unicodedata.combining(c))
+    # A pontuação ASCII das pontas sai com strip; a expressão regular só
+    # roda se ainda sobrar outro símbolo numa das pontas.
+    chave = ' '.join(nome.casefold().split()).strip(_PONTUACAO_ASCII)
+    if chave[:1].isalnum() and chave[-1:].isalnum():
+        return chave
+    return _BORDAS.sub('', chave)
+
+
+class RelatorioDeduplicacao:
+    """O que a deduplicação juntou: para cada chave repetida, o nome mantido,
+    quantas linhas ela tinha e até LIMITE_VARIANTES grafias encontradas.
+    """
+
+    def __init__(self, politica):
+        self.politica = politica
+        self.lidos = 0
+        self.descartados = 0
+        self.repetidos = {}
+
+    def registrar(self, chave, mantido, nome):
+        repetido = self.repetidos.get(chave)
+        if repetido is None:
+            repetido = self.repetidos[chave] = [mantido, 1, []]
+        repetido[1] += 1
+        variantes = repetido[2]
+        if nome != mantido and len(variantes) < LIMITE_VARIANTES and nome not in variantes:
+            variantes.append(nome)
+
+    @property
+    def mesclados(self):
+        return sum(ocorrencias - 1 for _, ocorrencias, _ in self.repetidos.values())
+
+    def texto(self, limite=20):
+        linhas = [
+            f"{self.lidos} linhas lidas, {self.mesclados} repetições juntadas "
+            f"em {len(self.repetidos)} nomes ({POLITICAS_DEDUP[self.politica]})"
+        ]
+        if self.descartados:
+            linhas.append(f"{self.descartados} linhas sem nome válido descartadas")
+        maiores = sorted(self.repetidos.values(), key=lambda repetido: repetido[1], reverse=True)
+        for mantido, ocorrencias, variantes in maiores[:limite]:
+            linhas.append(f"  {mantido}: {ocorrencias}x" + (f" ({', '.join(variantes)})" if variantes else ""))
+        if len(maiores) > limite:
+            linhas.append(f"  ... e mais {len(maiores) - limite}")
+        return "\n".join(linhas)
+
+
+def linhas_da_tabela(tabela):
+    pesos = tabela.pesos if tabela.pesos is not None else repeat(1.0)
+    return zip(tabela.nomes, tabela.classificacoes, pesos)
+
+
+def deduplicar(linhas, politica=DEDUP_PRIMEIRO, com_pesos=False, origens=None):
+    """(TabelaParticipantes, RelatorioDeduplicacao) numa única passada sobre
+    linhas (nome, classificação, peso), com um dict chave -> posição.
+
+    Políticas para nomes repetidos:
+    - primeiro: vale a primeira linha, inteira;
+    - mesclar: uma entrada com o maior peso entre as linhas e a primeira
+      classificação não vazia (a mesma pessoa cadastrada mais de uma vez);
+    - peso: cada linha soma o seu peso, 1 sem coluna de peso (cada linha
+      repetida é mais um bilhete). A tabela sempre sai com pesos.
+
+    origens, se dado, é a fonte de cada linha (ver conjunto.ler_conjunto): a
+    tabela recebe as origens das linhas mantidas.
+    """
+    if politica not in POLITICAS_DEDUP:
+        raise ValueError(f"Política de duplicados desconhecida: {politica!r}")
+
+    pesos = array('d') if com_pesos or politica == DEDUP_PESO else None
+    nomes = []
+    classificacoes = []
+    relatorio = RelatorioDeduplicacao(politica)
+    posicao_de = {}
+    # Linhas idênticas são comuns (um bilhete por linha): a chave de cada
+    # grafia é calculada uma vez.
+    chave_de = {}
+    mantidas = array('I') if origens is not None else None
+
+    lidos = 0
+    for lidos, (nome, classificacao, peso) in enumerate(linhas, 1):
+        chave = chave_de.get(nome)
+        if chave is None:
+            chave = chave_de[nome] = chave_normalizada(nome)
+        if not chave:
+            relatorio.descartados += 1
+            continue
+
+        posicao = posicao_de.get(chave)
+        if posicao is None:
+            posicao_de[chave] = len(nomes)
+            nomes.append(limpar_nome(nome))
+            classificacoes.append(sys.intern(classificacao))
+            if pesos is not None:
+                pesos.append(peso)
+            if mantidas is not None:
+                mantidas.append(lidos - 1)
+            continue
+
+        relatorio.registrar(chave, nomes[posicao], nome)
+        if politica == DEDUP_PESO:
+            pesos[posicao] += peso
+        elif politica == DEDUP_MESCLAR:
+            if pesos is not None and peso > pesos[posicao]:
+                pesos[posicao] = peso
+            if classificacao and not classificacoes[posicao]:
+                classificacoes[posicao] = sys.intern(classificacao)
+
+    relatorio.lidos = lidos
+    tabela = TabelaParticipantes(nomes, classificacoes, pesos=pesos)
+    tabela.deduplicacao = relatorio
+    if mantidas is not None:
+        tabela.origens = array(origens.typecode, map(origens.__getitem__, mantidas))
+    return tabela, relatorio
@@ -0,0 +1,408 @@
+import hashlib
+import struct
+import sys
+from array import array
+from collections import Counter
+
+TEXTOS_POR_BLOCO = 1 << 16
+LIMITE_INICIOS_32 = 0xFFFFFFFF
+
+
+def tipo_dos_codigos(num_categorias):
+    """Typecode do array com o menor inteiro sem sinal que comporta os códigos."""
+    if num_categorias <= 1 << 8:
+        return 'B'
+    if num_categorias <= 1 << 16:
+        return 'H'
+    return 'I'
+
+
+def tipo_do_array(valores):
+    """Typecode de um array ou formato de uma memoryview (B, H, I, d...)."""
+    return valores.typecode if isinstance(valores, array) else valores.format
+
+
+def _tamanho(valores):
+    # Uma memoryview sobre um arquivo mapeado ocupa os bytes que enxerga.
+    return valores.nbytes if isinstance(valores, memoryview) else sys.getsizeof(valores)
+
+
+class ColunaTexto:
+    """Sequência de textos guardada num só bytearray UTF-8, cada texto
+    seguido de um NUL, com a posição inicial de cada um num array.
+
+    Um nome de 13 caracteres ocupa 18 bytes aqui, contra uns 70 num str
+    dentro de uma lista. O acesso por posição decodifica só aquele texto; a
+    iteração decodifica blocos de TEXTOS_POR_BLOCO de uma vez. Sem NUL dentro
+    dos textos (o comum), dados[:-1] é exatamente '\x00'.join(textos) em
+    UTF-8, o formato do CacheDisco e do hash da tabela.
+
+    dados pode ser também uma memoryview só de leitura (ver sobre()): a
+    coluna é copiada para um bytearray só se receber mais textos.
+    """
+
+    __slots__ = ('dados', 'inicios', 'com_nul')
+
+    def __init__(self, textos=()):
+        self.dados = bytearray()
+        self.inicios = array('I')
+        self.com_nul = False
+        self.estender(textos)
+
+    @classmethod
+    def dos_bytes(cls, unidos, quantidade):
+        """Coluna a partir de quantidade textos unidos por NUL, em UTF-8."""
+        if not quantidade:
+            return cls()
+        dados = bytearray(unidos)
+        dados.append(0)
+        return cls.sobre(dados, quantidade)
+
+    @classmethod
+    def sobre(cls, dados, quantidade):
+        """Coluna sobre dados (quantidade textos, cada um seguido de NUL),
+        sem copiá-los: só as posições iniciais são calculadas."""
+        coluna = cls()
+        if not quantidade:
+            return coluna
+        import numpy as np
+
+        fins = np.flatnonzero(np.frombuffer(dados, dtype=np.uint8) == 0)
+        if len(fins) != quantidade or fins[-1] != len(dados) - 1:
+            raise ValueError(f"Esperados {quantidade} textos, encontrados {len(fins)}")
+        tipo = 'I' if len(dados) <= LIMITE_INICIOS_32 else 'Q'
+        inicios = np.empty(quantidade, dtype=tipo)
+        inicios[0] = 0
+        inicios[1:] = fins[:-1] + 1
+        coluna.dados = dados
+        coluna.inicios = array(tipo, inicios.tobytes())
+        return coluna
+
+    def __getstate__(self):
+        # Uma memoryview não atravessa o pickle (processos de leitura).
+        return bytearray(self.dados), self.inicios, self.com_nul
+
+    def __setstate__(self, estado):
+        self.dados, self.inicios, self.com_nul = estado
+
+    def append(self, texto):
+        if not isinstance(self.dados, bytearray):
+            self.dados = bytearray(self.dados)
+        if len(self.dados) > LIMITE_INICIOS_32 and self.inicios.typecode == 'I':
+            self.inicios = array('Q', self.inicios)
+        self.inicios.append(len(self.dados))
+        self.dados += texto.encode('utf-8')
+        self.dados.append(0)
+        if '\x00' in texto:
+            self.com_nul = True
+
+    def estender(self, textos):
+        if not isinstance(textos, ColunaTexto):
+            for texto in textos:
+                self.append(texto)
+            return
+        if not isinstance(self.dados, bytearray):
+            self.dados = bytearray(self.dados)
+        base = len(self.dados)
+        if base + len(textos.dados) > LIMITE_INICIOS_32 and self.inicios.typecode == 'I':
+            self.inicios = array('Q', self.inicios)
+        self.inicios.extend(map(base.__add__, textos.inicios))
+        self.dados += textos.dados
+        self.com_nul = self.com_nul or textos.com_nul
+
+    def _fim(self, i):
+        return self.inicios[i + 1] - 1 if i + 1 < len(self.inicios) else len(self.dados) - 1
+
+    def __len__(self):
+        return len(self.inicios)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        return str(self.dados[self.inicios[i]:self._fim(i)], 'utf-8')
+
+    def __iter__(self):
+        total = len(self)
+        if self.com_nul:
+            for i in range(total):
+                yield self[i]
+            return
+        for inicio in range(0, total, TEXTOS_POR_BLOCO):
+            fim = min(inicio + TEXTOS_POR_BLOCO, total)
+            yield from str(self.dados[self.inicios[inicio]:self._fim(fim - 1)], 'utf-8').split('\x00')
+
+    def unidos(self):
+        """'\x00'.join(textos) em UTF-8, sem copiar (memoryview)."""
+        return memoryview(self.dados)[:-1]
+
+    def tamanho_em_bytes(self):
+        return _tamanho(self.dados) + sys.getsizeof(self.inicios)
+
+
+class ColunaCodificada:
+    """Vista só de leitura das classificações: categorias[codigos[i]]."""
+
+    __slots__ = ('codigos', 'categorias')
+
+    def __init__(self, codigos, categorias):
+        self.codigos = codigos
+        self.categorias = categorias
+
+    def __len__(self):
+        return len(self.codigos)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return list(map(self.categorias.__getitem__, self.codigos[i]))
+        return self.categorias[self.codigos[i]]
+
+    def __iter__(self):
+        return map(self.categorias.__getitem__, self.codigos)
+
+
+class TabelaParticipantes:
+    """Participantes em colunas paralelas: nomes[i] tem classificacoes[i].
+
+    nomes é uma ColunaTexto e as classificações são guardadas só como
+    códigos (um array de 1 ou 2 bytes por linha, na maioria das planilhas)
+    numa tabela de categorias; classificacoes é uma vista sobre eles. Os
+    sorteios, os grupos e os gráficos trabalham direto com os códigos.
+
+    pesos, quando a planilha tem coluna de peso, é um array('d') paralelo
+    (por exemplo, bilhetes por participante); None num sorteio sem pesos.
+    Vindos do CacheDisco, códigos e pesos são memoryviews sobre o arquivo
+    mapeado, trocadas por arrays se a tabela receber mais linhas.
+    deduplicacao é o RelatorioDeduplicacao de normalizacao.deduplicar,
+    quando a tabela saiu dela. Numa tabela que junta várias planilhas
+    (conjunto.ler_conjunto), fontes tem o rótulo de cada uma e origens, um
+    array paralelo aos nomes, o índice da fonte de cada linha.
+    """
+
+    def __init__(self, nomes=None, classificacoes=None, codigos=None, categorias=None, pesos=None):
+        self.nomes = nomes if isinstance(nomes, ColunaTexto) else ColunaTexto(nomes or ())
+        self.pesos = pesos
+        self.deduplicacao = None
+        self.fontes = None
+        self.origens = None
+        self._unicas = None
+        # classificacoes[i] == categorias[codigos[i]]; os códigos podem vir
+        # prontos do cache em disco.
+        self._codigo_de = None
+        if codigos is not None:
+            self._codigos, self._categorias = codigos, categorias
+        elif classificacoes is not None:
+            self._categorias = list(dict.fromkeys(classificacoes))
+            self._codigo_de = {cls: i for i, cls in enumerate(self._categorias)}
+            self._codigos = array(tipo_dos_codigos(len(self._categorias)),
+                                  map(self._codigo_de.__getitem__, classificacoes))
+        else:
+            self._categorias = [''] if len(self.nomes) else []
+            self._codigos = array('B', bytes(len(self.nomes)))
+        self._contagem_classificacoes = None
+        self._contagem_iniciais = None
+        self._indices_por_classificacao = None
+        self._hash = None
+
+    @classmethod
+    def concatenar(cls, tabelas, com_pesos=False):
+        """Uma tabela com as linhas de todas, na ordem, sem decodificar os
+        nomes; os códigos de cada uma são traduzidos para as categorias da
+        nova tabela."""
+        tabela = cls(pesos=array('d') if com_pesos else None)
+        tabela._codigo_de = {}
+        for parte in tabelas:
+            codigos, categorias = parte.codigos_classificacoes()
+            traducao = [tabela._codigo_de.setdefault(c, len(tabela._codigo_de)) for c in categorias]
+            tipo = tipo_dos_codigos(len(tabela._codigo_de))
+            if tipo != tabela._codigos.typecode:
+                tabela._codigos = array(tipo, tabela._codigos)
+            tabela._codigos.extend(map(traducao.__getitem__, codigos))
+            tabela.nomes.estender(parte.nomes)
+            if com_pesos:
+                tabela.pesos.extend(parte.pesos)
+        tabela._categorias = list(tabela._codigo_de)
+        return tabela
+
+    @property
+    def classificacoes(self):
+        return ColunaCodificada(self._codigos, self._categorias)
+
+    def __getstate__(self):
+        # Uma memoryview não atravessa o pickle (processos de leitura).
+        estado = dict(self.__dict__)
+        for campo in ('_codigos', 'pesos'):
+            if isinstance(estado[campo], memoryview):
+                estado[campo] = array(estado[campo].format, estado[campo])
+        return estado
+
+    def adicionar(self, nome, classificacao='', peso=1.0):
+        if isinstance(self._codigos, memoryview):
+            self._codigos = array(self._codigos.format, self._codigos)
+        if isinstance(self.pesos, memoryview):
+            self.pesos = array('d', self.pesos)
+        codigo = self._codificar(classificacao)
+        self.nomes.append(nome)
+        self._codigos.append(codigo)
+        if self.pesos is not None:
+            self.pesos.append(peso)
+        self._unicas = None
+        self._hash = None
+        # Contagens já calculadas são atualizadas em vez de descartadas.
+        if self._contagem_classificacoes is not None and classificacao:
+            self._contagem_classificacoes[classificacao] += 1
+        if self._contagem_iniciais is not None and nome:
+            self._contagem_iniciais[nome[0].upper()] += 1
+        if self._indices_por_classificacao is not None:
+            self._indices_por_classificacao.setdefault(classificacao, array('I')).append(len(self.nomes) - 1)
+
+    def _codificar(self, classificacao):
+        if self._codigo_de is None:
+            self._codigo_de = {cls: i for i, cls in enumerate(self._categorias)}
+        codigo = self._codigo_de.get(classificacao)
+        if codigo is None:
+            codigo = self._codigo_de[classificacao] = len(self._categorias)
+            self._categorias.append(classificacao)
+            tipo = tipo_dos_codigos(len(self._categorias))
+            if tipo != tipo_do_array(self._codigos):
+                self._codigos = array(tipo, self._codigos)
+        return codigo
+
+    def __len__(self):
+        return len(self.nomes)
+
+    def classificacoes_unicas(self):
+        if self._unicas is None:
+            self._unicas = sorted(set(self._categorias) - {''})
+        return self._unicas
+
+    def codigos_classificacoes(self):
+        """(códigos, categorias), com classificacoes[i] == categorias[códigos[i]].
+
+        códigos é um array (ou memoryview) de typecode
+        tipo_dos_codigos(len(categorias)); ver tipo_do_array.
+        """
+        return self._codigos, self._categorias
+
+    def contagem_classificacoes(self):
+        """Counter {classificação: itens}, sem as vazias. Calculado uma vez."""
+        if self._contagem_classificacoes is None:
+            import numpy as np
+
+            codigos, categorias = self.codigos_classificacoes()
+            quantidades = np.bincount(np.frombuffer(codigos, dtype=tipo_do_array(codigos)), minlength=len(categorias))
+            contagem = Counter({cls: n for cls, n in zip(categorias, quantidades.tolist()) if n})
+            contagem.pop('', None)
+            self._contagem_classificacoes = contagem
+        return self._contagem_classificacoes
+
+    def contagem_iniciais(self):
+        """Counter {letra inicial: itens}. Calculado uma vez."""
+        if self._contagem_iniciais is None:
+            import numpy as np
+
+            # O primeiro byte de cada nome, direto da ColunaTexto: os ASCII são
+            # contados de uma vez; só os nomes que começam com outro caractere
+            # são decodificados. Maiúsculas e minúsculas se juntam no fim.
+            inicios = np.frombuffer(self.nomes.inicios, dtype=self.nomes.inicios.typecode)
+            primeiros = np.frombuffer(self.nomes.dados, dtype=np.uint8)[inicios] if len(inicios) else \
+                np.empty(0, dtype=np.uint8)
+            contagem = Counter()
+            for byte, quantidade in enumerate(np.bincount(primeiros[primeiros < 0x80], minlength=0x80).tolist()):
+                if byte and quantidade:
+                    contagem[chr(byte).upper()] += quantidade
+            for i in np.flatnonzero(primeiros >= 0x80).tolist():
+                contagem[self.nomes[i][0].upper()] += 1
+            del inicios, primeiros
+            self._contagem_iniciais = contagem
+        return self._contagem_iniciais
+
+    def hash_conteudo(self):
+        """blake2b de nomes, classificações e pesos, na ordem. Calculado uma vez.
+
+        Identifica a população de um sorteio: a mesma semente sobre tabelas
+        com o mesmo hash sorteia as mesmas posições.
+        """
+        if self._hash is None:
+            h = hashlib.blake2b(digest_size=20)
+            with self.nomes.unidos() as nomes:
+                h.update(nomes)
+            h.update(b'\x01')
+            h.update('\x00'.join(self.classificacoes).encode('utf-8'))
+            if self.pesos is not None:
+                pesos = self.pesos
+                if sys.byteorder != 'little':
+                    pesos = array('d', pesos)
+                    pesos.byteswap()
+                h.update(b'\x01')
+                h.update(pesos.tobytes())
+            self._hash = h.hexdigest()
+        return self._hash
+
+    def tamanho_em_bytes(self):
+        return (
+            self.nomes.tamanho_em_bytes()
+            + _tamanho(self._codigos)
+            + sys.getsizeof(self._categorias)
+            + sum(map(sys.getsizeof, self._categorias))
+            + (_tamanho(self.pesos) if self.pesos is not None else 0)
+            + (sys.getsizeof(self.origens) if self.origens is not None else 0)
+        )
+
+    def indices_por_classificacao(self):
+        """{classificação: array('I') das posições, em ordem}. Calculado uma vez."""
+        if self._indices_por_classificacao is None:
+            import numpy as np
+
+            codigos, categorias = self.codigos_classificacoes()
+            codigos = np.frombuffer(codigos, dtype=tipo_do_array(codigos))
+            # Ordenação estável: as posições de cada classificação ficam em
+            # ordem crescente. Com códigos de 1 ou 2 bytes, é um radix sort.
+            ordem = np.argsort(codigos, kind='stable').astype(np.uint32)
+            limites = np.cumsum(np.bincount(codigos, minlength=len(categorias)))[:-1]
+            self._indices_por_classificacao = {
+                classificacao: array('I', parte.tobytes())
+                for classificacao, parte in zip(categorias, np.split(ordem, limites))
+            }
+        return self._indices_por_classificacao
+
+    def indices_da_classificacao(self, classificacao):
+        return self.indices_por_classificacao().get(classificacao, array('I'))
+
+    def fonte_de(self, indice):
+        return self.fontes[self.origens[indice]] if self.origens is not None else None
+
+    def nomes_da_classificacao(self, classificacao):
+        return [self.nomes[i] for i in self.indices_da_classificacao(classificacao)]
+
+
+class PopulacaoEmFluxo:
+    """Repassa as linhas (nome, classificação, peso) de um sorteio em fluxo
+    calculando o hash da população, sem guardá-las.
+
+    O valor não é o de TabelaParticipantes.hash_conteudo, que precisaria de
+    todos os nomes antes das classificações: nomes, classificações e pesos
+    têm cada um o seu blake2b, combinados ao final. A verificação refaz a
+    leitura em fluxo para compará-lo.
+    """
+
+    def __init__(self, linhas, com_pesos=False):
+        self.linhas = linhas
+        self.com_pesos = com_pesos
+        self._partes = [hashlib.blake2b(digest_size=20) for _ in range(3)]
+
+    def __iter__(self):
+        nomes, classificacoes, pesos = self._partes
+        for nome, classificacao, peso in self.linhas:
+            nomes.update(nome.encode('utf-8') + b'\x00')
+            classificacoes.update(classificacao.encode('utf-8') + b'\x00')
+            if self.com_pesos:
+                pesos.update(struct.pack('<d', peso))
+            yield nome, classificacao, peso
+
+    def hash_conteudo(self):
+        h = hashlib.blake2b(digest_size=20)
+        for parte in self._partes[:3 if self.com_pesos else 2]:
+            h.update(parte.digest())
+        return h.hexdigest()
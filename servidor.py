@@ -0,0 +1,492 @@
+"""Servidor de sorteios ao vivo: HTTP e WebSocket locais, para telões e quiosques.
+
+Uso:
+    python servidor.py participantes.xlsx [outras.csv ...] [--coluna A] [--peso C] [--duplicados primeiro]
+        [--host 127.0.0.1] [--porta 8765] [--token segredo] [--cors https://painel.exemplo]
+
+Carrega a lista uma vez, mantém-na em memória e atende:
+
+    GET  /                   página que mostra cada resultado assim que sai
+    GET  /estado             participantes, coluna, classificações e total de sorteios
+    GET  /resultado          último resultado
+    GET  /historico          ?limite=50&nome=...&tipo=..., do mais recente para o mais antigo
+    POST /sortear            {"modo": "sorteio" | "colocacao" | "classificacao" | "cotas", "quantidade": 3,
+                              "classificacao": "...", "cotas": {"X": 2}, "premios": "padrao" | [...],
+                              "excluir": {"dias": 30, "escopo": "qualquer" | "tipo" | "classificacao"}}
+    POST /grupos             {"grupos": 4} ou {"tamanho": 10}, com "estratificar": true opcional
+    GET  /ws                 WebSocket: recebe {"evento": "resultado", ...} a cada sorteio
+
+Os sorteios passam um de cada vez (uma trava), rodam fora do laço de eventos
+e são gravados no mesmo histórico do aplicativo, com semente e hashes para a
+verificação. Leituras não esperam os sorteios. Com --token, os POST exigem o
+cabeçalho "Authorization: Bearer <token>". Sem --host, só aceita conexões
+desta máquina.
+
+A semente é sorteada pelo servidor. Um "semente" (inteiro) no pedido só é
+aceito com --token: sem ele, qualquer processo local, ou página aberta no
+navegador, poderia tentar sementes até achar o vencedor que quisesse, e o
+sorteio ainda passaria na verificação.
+
+Por padrão, as respostas não têm cabeçalhos CORS: páginas de outras origens
+não leem as respostas nem enviam POST com JSON. --cors libera a origem dada
+(ou * para qualquer uma) e só é aceito junto com --token, para que uma página
+qualquer aberta no navegador não possa disparar sorteios.
+"""
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import sys
+from datetime import datetime, timedelta
+from urllib.parse import parse_qs, urlsplit
+
+import motor_sorteio
+from consulta_historico import IndiceHistorico
+from exclusao import escopo_exclusao, exclusao_do_historico, exclusao_por_classificacao
+from historico import HistoricoSorteios
+from normalizacao import DEDUP_PRIMEIRO, POLITICAS_DEDUP
+from sorteio_cli import carregar_conjunto, carregar_tabela, origem_do_sorteio, premios_da_opcao
+
+PORTA_PADRAO = 8765
+LIMITE_CORPO = 1 << 20
+LIMITE_HISTORICO = 1000
+FILA_ASSINANTE = 64
+GUID_WEBSOCKET = '258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+MODOS = ('sorteio', 'colocacao', 'classificacao', 'cotas')
+ESCOPOS_EXCLUSAO = ('qualquer', 'tipo', 'classificacao')
+
+STATUS = {200: 'OK', 204: 'No Content', 400: 'Bad Request', 401: 'Unauthorized', 403: 'Forbidden', 404: 'Not Found',
+          405: 'Method Not Allowed', 413: 'Payload Too Large', 500: 'Internal Server Error'}
+
+PAGINA = """<!DOCTYPE html>
+<html lang="pt-br"><head><meta charset="utf-8"><title>Sorteador</title>
+<style>body{font-family:sans-serif;background:#111;color:#eee;margin:2em}
+pre{font-size:2.2em;white-space:pre-wrap}#situacao{color:#888}</style></head>
+<body><div id="situacao">Conectando...</div><pre id="resultado"></pre>
+<script>
+function conectar() {
+  const ws = new WebSocket((location.protocol === 'https:' ? 'wss://' : 'ws://') + location.host + '/ws');
+  ws.onopen = () => situacao.textContent = 'Aguardando sorteio...';
+  ws.onmessage = (e) => {
+    const mensagem = JSON.parse(e.data);
+    if (mensagem.texto) { resultado.textContent = mensagem.texto; situacao.textContent = mensagem.registro.data; }
+  };
+  ws.onclose = () => { situacao.textContent = 'Reconectando...'; setTimeout(conectar, 2000); };
+}
+conectar();
+</script></body></html>
+"""
+
+
+class ErroRequisicao(Exception):
+    def __init__(self, status, mensagem):
+        super().__init__(mensagem)
+        self.status = status
+
+
+def quadro_websocket(opcode, dados):
+    """Quadro WebSocket final, sem máscara (servidor para cliente)."""
+    tamanho = len(dados)
+    if tamanho < 126:
+        cabecalho = bytes([0x80 | opcode, tamanho])
+    elif tamanho < 1 << 16:
+        cabecalho = bytes([0x80 | opcode, 126]) + tamanho.to_bytes(2, 'big')
+    else:
+        cabecalho = bytes([0x80 | opcode, 127]) + tamanho.to_bytes(8, 'big')
+    return cabecalho + dados
+
+
+async def ler_quadro(leitor):
+    """(opcode, dados) do próximo quadro do cliente, já sem a máscara."""
+    primeiro, segundo = await leitor.readexactly(2)
+    tamanho = segundo & 0x7F
+    if tamanho == 126:
+        tamanho = int.from_bytes(await leitor.readexactly(2), 'big')
+    elif tamanho == 127:
+        tamanho = int.from_bytes(await leitor.readexactly(8), 'big')
+    if tamanho > LIMITE_CORPO:
+        raise ErroRequisicao(413, "Mensagem grande demais")
+
+    mascara = await leitor.readexactly(4) if segundo & 0x80 else None
+    dados = await leitor.readexactly(tamanho)
+    if mascara:
+        # XOR com a máscara repetida, de uma vez, como inteiros.
+        repetida = (mascara * (tamanho // 4 + 1))[:tamanho]
+        dados = (int.from_bytes(dados, 'big') ^ int.from_bytes(repetida, 'big')).to_bytes(tamanho, 'big')
+    return primeiro & 0x0F, dados
+
+
+def _json(dados):
+    return json.dumps(dados, ensure_ascii=False).encode('utf-8')
+
+
+class ServidorSorteio:
+    """Estado compartilhado pelas conexões: a tabela (só leitura), o
+    histórico com o seu índice e os assinantes do WebSocket.
+
+    Um sorteio segura a trava do começo (exclusão calculada sobre o
+    histórico) ao fim (registro gravado e publicado), então dois pedidos
+    simultâneos nunca veem o mesmo histórico. A amostragem e a gravação com
+    fsync rodam em threads; o histórico em memória e o índice só mudam no
+    laço de eventos, onde as leituras os consultam.
+    """
+
+    def __init__(self, tabela, coluna, origem, arquivo_historico, token=None, origem_cors=None):
+        if origem_cors and not token:
+            raise ValueError("CORS só pode ser liberado com token")
+        self.tabela = tabela
+        self.coluna = coluna
+        self.origem = origem
+        self.arquivo_historico = arquivo_historico
+        self.token = token
+        self.origem_cors = origem_cors
+        self.historico = []
+        self.indice = IndiceHistorico()
+        self.ultimo = None
+        self.assinantes = {}
+        self._trava = asyncio.Lock()
+
+    async def carregar_historico(self):
+        """Lê o que foi acrescentado ao histórico desde a última leitura ou
+        gravação deste servidor (por exemplo, um sorteio feito no aplicativo),
+        ou tudo de novo se o arquivo foi compactado ou apagado.
+
+        Com um sorteio em andamento não faz nada: ele relê antes de sortear e
+        acrescenta o seu registro ao terminar.
+        """
+        if self._trava.locked():
+            return
+        async with self._trava:
+            await self._reler_historico()
+
+    async def _reler_historico(self):
+        await self._incorporar(await asyncio.to_thread(self.arquivo_historico.novas_entradas))
+
+    async def _incorporar(self, novas):
+        if novas is None:
+            self.historico = await asyncio.to_thread(lambda: list(self.arquivo_historico.entradas()))
+            self.indice.reconstruir(self.historico)
+            return
+        for registro in novas:
+            self.historico.append(registro)
+            self.indice.adicionar(registro)
+
+    def estado(self):
+        return {
+            'participantes': len(self.tabela),
+            'coluna': self.coluna,
+            'ponderado': self.tabela.pesos is not None,
+            'classificacoes': self.tabela.classificacoes_unicas(),
+            'fontes': self.tabela.fontes,
+            'sorteios': len(self.historico),
+            'assinantes': len(self.assinantes),
+        }
+
+    def consultar_historico(self, consulta):
+        limite = min(int(consulta.get('limite', ['50'])[0]), LIMITE_HISTORICO)
+        nome = consulta.get('nome', [''])[0].strip()
+        tipo = consulta.get('tipo', [''])[0]
+
+        ids = reversed(self.indice.sorteios_de(nome)) if nome else range(len(self.historico) - 1, -1, -1)
+        registros = []
+        for i in ids:
+            if len(registros) >= limite:
+                break
+            if not tipo or self.historico[i].get('tipo') == tipo:
+                registros.append(self.historico[i])
+        return {'total': len(self.historico), 'registros': registros}
+
+    def _exclusao(self, pedido, tipo, classificacao='', cotas=None):
+        excluir = pedido.get('excluir')
+        if excluir is not None and not isinstance(excluir, dict):
+            raise ValueError("\"excluir\" deve ser um objeto: {\"dias\": 30, \"escopo\": \"qualquer\"}")
+        if not excluir:
+            return None
+        escopo = excluir.get('escopo', 'qualquer')
+        if escopo not in ESCOPOS_EXCLUSAO:
+            raise ValueError(f"Escopo de exclusão deve ser um de: {', '.join(ESCOPOS_EXCLUSAO)}")
+        dias = int(excluir.get('dias', 0))
+        data_inicial = (datetime.now() - timedelta(days=dias)).strftime("%Y%m%d") if dias else ''
+        if escopo == 'classificacao' and cotas is not None:
+            return exclusao_por_classificacao(self.indice, escopo_exclusao(data_inicial, por_classificacao=True), cotas)
+        if escopo == 'classificacao' and not classificacao:
+            raise ValueError("O escopo \"classificacao\" só vale nos modos classificacao e cotas")
+        return exclusao_do_historico(self.indice, escopo_exclusao(
+            data_inicial,
+            tipo=tipo if escopo == 'tipo' else '',
+            classificacao=classificacao if escopo == 'classificacao' else ''
+        ))
+
+    def _semente(self, pedido):
+        # None: o motor sorteia a semente. Ver o docstring do módulo.
+        semente = pedido.get('semente')
+        if semente is None:
+            return None
+        if not self.token:
+            raise ErroRequisicao(403, "Semente escolhida pelo cliente só é aceita com --token")
+        if type(semente) is not int or semente < 0:
+            raise ValueError("A semente deve ser um inteiro não negativo")
+        return semente
+
+    def _preparar_sorteio(self, pedido):
+        """Função sem argumentos que faz o sorteio pedido (para rodar numa thread)."""
+        modo = pedido.get('modo', 'sorteio')
+        if modo not in MODOS:
+            raise ValueError(f"Modo deve ser um de: {', '.join(MODOS)}")
+        quantidade = int(pedido.get('quantidade', 1))
+        semente = self._semente(pedido)
+        tabela = self.tabela
+
+        if modo == 'cotas':
+            cotas = {str(cls): int(n) for cls, n in dict(pedido.get('cotas') or {}).items()}
+            if not cotas:
+                raise ValueError("O modo cotas exige \"cotas\": {\"classificação\": quantidade}")
+            premios = pedido.get('premios') or {}
+            exclusao = self._exclusao(pedido, motor_sorteio.TIPO_COTAS, cotas=cotas)
+            return lambda: motor_sorteio.sortear_por_cotas(
+                tabela, cotas, self.coluna, premios, semente=semente, exclusao=exclusao
+            )
+        if modo == 'classificacao':
+            classificacao = pedido.get('classificacao')
+            if not classificacao:
+                raise ValueError("O modo classificacao exige \"classificacao\"")
+            exclusao = self._exclusao(pedido, motor_sorteio.TIPO_CLASSIFICACAO, classificacao)
+            return lambda: motor_sorteio.sortear_por_classificacao(
+                tabela, classificacao, quantidade, semente=semente, exclusao=exclusao
+            )
+        if modo == 'colocacao':
+            premios = pedido.get('premios')
+            premios = premios_da_opcao(premios, quantidade) if isinstance(premios, str) else list(premios or [])
+            exclusao = self._exclusao(pedido, motor_sorteio.TIPO_COLOCACAO)
+            return lambda: motor_sorteio.sortear_com_colocacao(
+                tabela, quantidade, self.coluna, premios, semente=semente, exclusao=exclusao
+            )
+        exclusao = self._exclusao(pedido, motor_sorteio.TIPO_SORTEIO)
+        return lambda: motor_sorteio.sortear(tabela, quantidade, self.coluna, semente=semente, exclusao=exclusao)
+
+    def _preparar_grupos(self, pedido):
+        tamanho = pedido.get('tamanho')
+        num_grupos = None if tamanho else int(pedido.get('grupos', 2))
+        semente = self._semente(pedido)
+        return lambda: motor_sorteio.formar_grupos(
+            self.tabela, num_grupos, self.coluna, semente=semente,
+            tamanho=int(tamanho) if tamanho else None, estratificado=bool(pedido.get('estratificar'))
+        )
+
+    async def executar(self, preparar, pedido):
+        async with self._trava:
+            await self._reler_historico()
+            resultados, registro = await asyncio.to_thread(preparar(pedido))
+            if 'semente' in registro:
+                registro.update(self.origem)
+            # O que outro processo gravou entre a leitura acima e esta
+            # gravação entra antes, na ordem do arquivo (None: relido inteiro,
+            # já com este registro).
+            novas = await asyncio.to_thread(self.arquivo_historico.registrar, registro)
+            await self._incorporar(novas)
+            if novas is not None:
+                self.historico.append(registro)
+                self.indice.adicionar(registro)
+
+            self.ultimo = {'evento': 'resultado', 'resultado': resultados, 'registro': registro,
+                           'texto': motor_sorteio.formatar_resultado(resultados)}
+            self.publicar(_json(self.ultimo))
+            return self.ultimo
+
+    def publicar(self, mensagem):
+        # Codificado uma vez para todos; quem não acompanha é desconectado.
+        quadro = quadro_websocket(0x1, mensagem)
+        for fila, escritor in list(self.assinantes.items()):
+            try:
+                fila.put_nowait(quadro)
+            except asyncio.QueueFull:
+                del self.assinantes[fila]
+                escritor.close()
+
+    async def atender(self, leitor, escritor):
+        try:
+            while await self._atender_requisicao(leitor, escritor):
+                pass
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            escritor.close()
+
+    async def _atender_requisicao(self, leitor, escritor):
+        """Atende uma requisição; False se a conexão deve ser fechada."""
+        linha = await leitor.readline()
+        if not linha:
+            return False
+        try:
+            metodo, alvo, versao = linha.decode('latin-1').split()
+        except ValueError:
+            await self._responder(escritor, 400, {'erro': "Requisição inválida"}, fechar=True)
+            return False
+
+        cabecalhos = {}
+        while (linha := await leitor.readline()) not in (b'\r\n', b'\n', b''):
+            nome, _, valor = linha.decode('latin-1').partition(':')
+            cabecalhos[nome.strip().lower()] = valor.strip()
+
+        endereco = urlsplit(alvo)
+        manter = versao == 'HTTP/1.1' and cabecalhos.get('connection', '').lower() != 'close'
+        try:
+            tamanho = int(cabecalhos.get('content-length', 0))
+            if tamanho > LIMITE_CORPO:
+                raise ErroRequisicao(413, "Corpo grande demais")
+            corpo = await leitor.readexactly(tamanho) if tamanho else b''
+
+            if endereco.path == '/ws' and cabecalhos.get('upgrade', '').lower() == 'websocket':
+                await self._websocket(leitor, escritor, cabecalhos)
+                return False
+            status, resposta = await self._rotear(metodo, endereco, cabecalhos, corpo)
+        except ErroRequisicao as e:
+            status, resposta = e.status, {'erro': str(e)}
+        except (ValueError, TypeError, KeyError) as e:
+            status, resposta = 400, {'erro': str(e)}
+        except Exception as e:
+            # Um erro não previsto vira 500 em vez de deixar o cliente sem resposta.
+            status, resposta = 500, {'erro': f"Erro interno: {e}"}
+
+        await self._responder(escritor, status, resposta, fechar=not manter)
+        return manter
+
+    async def _rotear(self, metodo, endereco, cabecalhos, corpo):
+        rota = endereco.path.rstrip('/') or '/'
+        if metodo == 'OPTIONS' and self.origem_cors:
+            return 204, None
+
+        if metodo == 'GET':
+            if rota == '/':
+                return 200, PAGINA
+            if rota == '/estado':
+                return 200, self.estado()
+            if rota == '/resultado':
+                return 200, self.ultimo or {}
+            if rota == '/historico':
+                await self.carregar_historico()
+                return 200, self.consultar_historico(parse_qs(endereco.query))
+        elif metodo == 'POST' and rota in ('/sortear', '/grupos'):
+            if self.token and cabecalhos.get('authorization') != f"Bearer {self.token}":
+                raise ErroRequisicao(401, "Token ausente ou inválido")
+            pedido = json.loads(corpo or b'{}')
+            if not isinstance(pedido, dict):
+                raise ValueError("O corpo deve ser um objeto JSON")
+            preparar = self._preparar_grupos if rota == '/grupos' else self._preparar_sorteio
+            return 200, await self.executar(preparar, pedido)
+
+        if rota in ('/', '/estado', '/resultado', '/historico', '/sortear', '/grupos'):
+            raise ErroRequisicao(405, f"Método {metodo} não permitido em {rota}")
+        raise ErroRequisicao(404, f"Rota desconhecida: {rota}")
+
+    async def _responder(self, escritor, status, resposta, fechar=False):
+        if isinstance(resposta, str):
+            corpo, tipo = resposta.encode('utf-8'), 'text/html; charset=utf-8'
+        else:
+            corpo, tipo = (_json(resposta) if resposta is not None else b''), 'application/json; charset=utf-8'
+        cabecalho = (
+            f"HTTP/1.1 {status} {STATUS.get(status, '')}\r\n"
+            f"Content-Type: {tipo}\r\n"
+            f"Content-Length: {len(corpo)}\r\n"
+        )
+        if self.origem_cors:
+            cabecalho += (
+                f"Access-Control-Allow-Origin: {self.origem_cors}\r\n"
+                "Access-Control-Allow-Headers: Content-Type, Authorization\r\n"
+                "Access-Control-Allow-Methods: GET, POST, OPTIONS\r\n"
+            )
+        cabecalho += f"Connection: {'close' if fechar else 'keep-alive'}\r\n\r\n"
+        escritor.write(cabecalho.encode('latin-1') + corpo)
+        await escritor.drain()
+
+    async def _websocket(self, leitor, escritor, cabecalhos):
+        chave = cabecalhos.get('sec-websocket-key', '')
+        aceite = base64.b64encode(hashlib.sha1((chave + GUID_WEBSOCKET).encode('ascii')).digest()).decode('ascii')
+        escritor.write(
+            "HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+            f"Sec-WebSocket-Accept: {aceite}\r\n\r\n".encode('latin-1')
+        )
+        fila = asyncio.Queue(FILA_ASSINANTE)
+        if self.ultimo:
+            fila.put_nowait(quadro_websocket(0x1, _json(self.ultimo)))
+        self.assinantes[fila] = escritor
+        envio = asyncio.create_task(self._enviar(escritor, fila))
+        try:
+            while not envio.done():
+                opcode, dados = await ler_quadro(leitor)
+                if opcode == 0x8:
+                    break
+                if opcode == 0x9:
+                    fila.put_nowait(quadro_websocket(0xA, dados))
+        except (asyncio.IncompleteReadError, ConnectionError, ErroRequisicao, asyncio.QueueFull):
+            pass
+        finally:
+            self.assinantes.pop(fila, None)
+            envio.cancel()
+            try:
+                escritor.write(quadro_websocket(0x8, b''))
+                await escritor.drain()
+            except ConnectionError:
+                pass
+
+    async def _enviar(self, escritor, fila):
+        while (quadro := await fila.get()) is not None:
+            escritor.write(quadro)
+            await escritor.drain()
+
+
+async def servir(servidor, host, porta):
+    await servidor.carregar_historico()
+    async with await asyncio.start_server(servidor.atender, host, porta) as tcp:
+        enderecos = ", ".join(f"http://{s.getsockname()[0]}:{s.getsockname()[1]}" for s in tcp.sockets)
+        print(f"Servindo {len(servidor.tabela)} participantes em {enderecos}", file=sys.stderr)
+        await tcp.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('arquivos', nargs='+', metavar='arquivo',
+                        help="Planilha de participantes; com várias, a lista combinada")
+    parser.add_argument('-c', '--coluna', help="Coluna com os nomes (padrão: primeira coluna com dados)")
+    parser.add_argument('-p', '--peso', help="Coluna com o peso de cada item (ex.: bilhetes)")
+    parser.add_argument('-d', '--duplicados', choices=POLITICAS_DEDUP, help="Junta nomes repetidos")
+    parser.add_argument('--todas-as-abas', action='store_true', help="Combina todas as abas dos arquivos Excel")
+    parser.add_argument('--host', default='127.0.0.1', help="Endereço de escuta (0.0.0.0 para a rede local)")
+    parser.add_argument('--porta', type=int, default=PORTA_PADRAO)
+    parser.add_argument('--token', help="Exigido (Authorization: Bearer) nos pedidos de sorteio")
+    parser.add_argument('--cors', metavar='ORIGEM',
+                        help="Origem liberada para páginas de outro endereço (* para qualquer uma); exige --token")
+    parser.add_argument('--historico', help="Pasta do histórico (padrão: a do aplicativo)")
+    args = parser.parse_args(argv)
+    if args.cors and not args.token:
+        parser.error("--cors exige --token")
+
+    try:
+        arquivos = [os.path.normpath(arquivo) for arquivo in args.arquivos]
+        if len(arquivos) > 1 or args.todas_as_abas:
+            _, coluna, tabela = carregar_conjunto(arquivos, args.todas_as_abas, args.coluna, True, args.peso,
+                                                  args.duplicados or DEDUP_PRIMEIRO)
+        else:
+            _, coluna, tabela = carregar_tabela(arquivos[0], args.coluna, True, args.peso, args.duplicados)
+        if not tabela:
+            raise ValueError(f"Nenhum item encontrado na coluna {coluna}")
+        # Os mesmos campos que o aplicativo grava, para a verificação refazer os sorteios.
+        politica = tabela.deduplicacao.politica if tabela.deduplicacao is not None else None
+        origem = origem_do_sorteio(arquivos, args.todas_as_abas, coluna, args.peso, politica)
+    except (OSError, ValueError) as e:
+        print(f"Erro: {e}", file=sys.stderr)
+        return 1
+
+    arquivo_historico = HistoricoSorteios(args.historico) if args.historico else HistoricoSorteios()
+    servidor = ServidorSorteio(tabela, coluna, origem, arquivo_historico, args.token, args.cors)
+    try:
+        asyncio.run(servir(servidor, args.host, args.porta))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
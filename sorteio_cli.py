@@ -0,0 +1,208 @@
+import argparse
+import os
+import random
+import sys
+from functools import partial
+from itertools import chain, islice
+
+import motor_sorteio
+from cache_disco import CacheDisco, hash_arquivo
+from cache_planilhas import CachePlanilhas
+from conjunto import contagem_por_fonte, fontes_dos_arquivos, ler_conjunto
+from exportacao import escrever_json, exportar
+from leitura import ler_planilha, percorrer_planilha, validar_arquivo
+from normalizacao import DEDUP_PRIMEIRO, POLITICAS_DEDUP, deduplicar, linhas_da_tabela
+
+MODOS = ('sorteio', 'colocacao', 'grupos', 'classificacao', 'cotas')
+
+
+def criar_parser():
+    parser = argparse.ArgumentParser(
+        description="Sorteios em lote, sem interface gráfica."
+    )
+    parser.add_argument('arquivos', nargs='+', metavar='arquivo',
+                        help="Planilha de participantes (.xlsx, .csv, .tsv, .parquet); "
+                             "com várias, sorteia na lista combinada")
+    parser.add_argument('--todas-as-abas', action='store_true',
+                        help="Combina todas as abas dos arquivos Excel, não só a ativa")
+    parser.add_argument('-j', '--processos', type=int,
+                        help="Processos para ler as planilhas combinadas (padrão: um por CPU)")
+    parser.add_argument('-c', '--coluna', help="Coluna com os nomes (padrão: primeira coluna com dados)")
+    parser.add_argument('-p', '--peso', help="Coluna com o peso de cada item (ex.: bilhetes); sorteia proporcionalmente")
+    parser.add_argument('-m', '--modo', choices=MODOS, default='sorteio')
+    parser.add_argument('-q', '--quantidade', type=int, default=3, help="Itens a sortear")
+    parser.add_argument('-g', '--grupos', type=int, default=2, help="Número de grupos (modo grupos)")
+    parser.add_argument('-t', '--tamanho-grupo', type=int, help="Máximo de itens por grupo, no lugar de --grupos (modo grupos)")
+    parser.add_argument('--estratificar', action='store_true',
+                        help="Distribui cada classificação proporcionalmente entre os grupos (modo grupos)")
+    parser.add_argument('--classificacao', help="Classificação a sortear (modo classificacao)")
+    parser.add_argument('--cotas', help="'classificação: quantidade' separadas por ';', com '| prêmios' opcional (modo cotas)")
+    parser.add_argument('--premios', help="'padrao' ou lista separada por vírgulas (modo colocacao)")
+    parser.add_argument('-s', '--semente', type=int, help="Semente que deriva a de cada sorteio (resultados reprodutíveis)")
+    parser.add_argument('-n', '--repeticoes', type=int, default=1, help="Quantos sorteios executar")
+    parser.add_argument('-o', '--saida', help="Arquivo de saída .xlsx, .csv, .jsonl ou .json (padrão: JSON na saída padrão)")
+    parser.add_argument('-d', '--duplicados', choices=POLITICAS_DEDUP,
+                        help="Junta nomes repetidos (sem diferenciar acentos, maiúsculas e espaços): "
+                             "primeiro, mesclar (maior peso) ou peso (cada linha soma um bilhete); "
+                             "ao combinar planilhas, o padrão é primeiro")
+    parser.add_argument('--sem-cache', action='store_true', help="Não usar nem gravar o cache em disco")
+    parser.add_argument('--fluxo', action='store_true',
+                        help="Sorteia lendo o arquivo em fluxo, sem carregá-lo na memória "
+                             "(modos sorteio e colocacao; coluna padrão A)")
+    return parser
+
+
+def carregar_tabela(arquivo, coluna=None, usar_cache=True, coluna_peso=None, politica=None):
+    validar_arquivo(arquivo)
+    if usar_cache:
+        return CachePlanilhas(disco=CacheDisco()).obter(arquivo, coluna, coluna_peso=coluna_peso, politica=politica)
+
+    colunas, coluna, tabela = ler_planilha(arquivo, coluna, coluna_peso=coluna_peso)
+    if politica:
+        tabela, _ = deduplicar(linhas_da_tabela(tabela), politica, coluna_peso is not None)
+    return colunas, coluna, tabela
+
+
+def carregar_conjunto(arquivos, todas_as_abas=False, coluna=None, usar_cache=True, coluna_peso=None,
+                      politica=DEDUP_PRIMEIRO, processos=None):
+    for arquivo in arquivos:
+        validar_arquivo(arquivo)
+    fontes = fontes_dos_arquivos(arquivos, todas_as_abas)
+    if usar_cache:
+        return CachePlanilhas(disco=CacheDisco()).obter_conjunto(
+            fontes, coluna, coluna_peso=coluna_peso, politica=politica, processos=processos
+        )
+    return ler_conjunto(fontes, coluna, coluna_peso, politica, processos)
+
+
+def origem_do_sorteio(arquivos, todas_as_abas, coluna, coluna_peso=None, politica=None):
+    """Os campos de origem que o aplicativo grava no histórico, para a
+    verificação refazer o sorteio: arquivos (caminho absoluto) e hashes,
+    coluna, coluna de peso e deduplicação.
+    """
+    if len(arquivos) > 1 or todas_as_abas:
+        origem = {'fontes': [{'arquivo': os.path.abspath(arquivo), 'aba': aba, 'hash_arquivo': hash_arquivo(arquivo)}
+                             for arquivo, aba in fontes_dos_arquivos(arquivos, todas_as_abas)]}
+    else:
+        origem = {'arquivo': os.path.abspath(arquivos[0]), 'hash_arquivo': hash_arquivo(arquivos[0])}
+    origem['coluna'] = coluna
+    if coluna_peso:
+        origem['coluna_peso'] = coluna_peso
+    if politica:
+        origem['deduplicacao'] = politica
+    return origem
+
+
+def com_registro(sorteio, origem):
+    """Os resultados com o registro que o histórico gravaria em "registro"."""
+    resultados, registro = sorteio
+    if 'semente' in registro:
+        registro.update(origem)
+    resultados['registro'] = registro
+    return resultados
+
+
+def premios_da_opcao(opcao, quantidade):
+    if not opcao:
+        return []
+    if opcao == 'padrao':
+        return motor_sorteio.premios_padrao(quantidade)
+    return [premio.strip() for premio in opcao.split(',') if premio.strip()]
+
+
+def executar(args, tabela, coluna, semente):
+    if args.modo == 'colocacao':
+        premios = premios_da_opcao(args.premios, args.quantidade)
+        return motor_sorteio.sortear_com_colocacao(tabela, args.quantidade, coluna, premios, semente=semente)
+    if args.modo == 'grupos':
+        return motor_sorteio.formar_grupos(
+            tabela, args.grupos, coluna, semente=semente,
+            tamanho=args.tamanho_grupo, estratificado=args.estratificar
+        )
+    if args.modo == 'cotas':
+        if not args.cotas:
+            raise ValueError("O modo cotas exige --cotas")
+        cotas, premios = motor_sorteio.ler_cotas(args.cotas.split(';'))
+        return motor_sorteio.sortear_por_cotas(tabela, cotas, coluna, premios, semente=semente)
+    if args.modo == 'classificacao':
+        if not args.classificacao:
+            raise ValueError("O modo classificacao exige --classificacao")
+        return motor_sorteio.sortear_por_classificacao(tabela, args.classificacao, args.quantidade, semente=semente)
+    return motor_sorteio.sortear(tabela, args.quantidade, coluna, semente=semente)
+
+
+def executar_em_fluxo(args, arquivo, coluna, semente):
+    # Cada repetição percorre o arquivo de novo, guardando só os sorteados.
+    premios = premios_da_opcao(args.premios, args.quantidade)
+    return motor_sorteio.sortear_em_fluxo(
+        percorrer_planilha(arquivo, coluna, args.peso), args.quantidade, coluna,
+        premios, args.modo == 'colocacao', bool(args.peso), semente=semente
+    )
+
+
+def main(argv=None):
+    args = criar_parser().parse_args(argv)
+
+    try:
+        arquivos = [os.path.normpath(arquivo) for arquivo in args.arquivos]
+        arquivo = arquivos[0]
+        combinar = len(arquivos) > 1 or args.todas_as_abas
+
+        if args.fluxo:
+            if combinar:
+                raise ValueError("--fluxo lê um único arquivo e não combina planilhas")
+            if args.modo not in ('sorteio', 'colocacao'):
+                raise ValueError("--fluxo só funciona nos modos sorteio e colocacao")
+            if args.duplicados:
+                raise ValueError("--duplicados precisa da tabela em memória e não funciona com --fluxo")
+            validar_arquivo(arquivo)
+            coluna = (args.coluna or 'A').upper()
+            sortear = partial(executar_em_fluxo, args, arquivo, coluna)
+            origem = origem_do_sorteio(arquivos, False, coluna, args.peso)
+        else:
+            if combinar:
+                _, coluna, tabela = carregar_conjunto(
+                    arquivos, args.todas_as_abas, args.coluna, not args.sem_cache, args.peso,
+                    args.duplicados or DEDUP_PRIMEIRO, args.processos
+                )
+                for rotulo, itens in contagem_por_fonte(tabela):
+                    print(f"{rotulo}: {itens} itens", file=sys.stderr)
+            else:
+                _, coluna, tabela = carregar_tabela(arquivo, args.coluna, not args.sem_cache, args.peso, args.duplicados)
+            if not tabela:
+                raise ValueError(f"Nenhum item encontrado na coluna {coluna}")
+            politica = None
+            if tabela.deduplicacao is not None:
+                print(tabela.deduplicacao.texto(), file=sys.stderr)
+                politica = tabela.deduplicacao.politica
+            sortear = partial(executar, args, tabela, coluna)
+            origem = origem_do_sorteio(arquivos, args.todas_as_abas, coluna, args.peso, politica)
+
+        # Gerador: cada sorteio é gravado e descartado antes do próximo. O
+        # primeiro roda antes de abrir a saída, para que um parâmetro inválido
+        # não deixe um arquivo pela metade.
+        # Com -s, cada sorteio usa uma semente derivada dela; sem -s, uma nova
+        # do sistema. Em ambos os casos ela sai no resultado, para auditoria,
+        # com o registro do histórico: a saída em .jsonl é aceita pelo
+        # verificacao.py, que refaz os sorteios --fluxo percorrendo o arquivo
+        # com o mesmo algoritmo de reservatório.
+        sementes = random.Random(args.semente) if args.semente is not None else None
+        resultados = (
+            com_registro(sortear(sementes.getrandbits(64) if sementes else None), origem)
+            for _ in range(args.repeticoes)
+        )
+        lista_resultados = chain(list(islice(resultados, 1)), resultados)
+
+        if not args.saida:
+            escrever_json(lista_resultados, sys.stdout)
+            print()
+        else:
+            exportar(lista_resultados, args.saida)
+    except (OSError, ValueError) as e:
+        print(f"Erro: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
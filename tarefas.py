@@ -0,0 +1,61 @@
+import threading
+from functools import partial
+
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from desempenho import medidor
+from leitura import OperacaoCancelada
+
+
+class CarregamentoPlanilha(QObject):
+    """Lê uma planilha (ou uma coluna dela) numa QThread, via CachePlanilhas.
+
+    Sem coluna, é um carregamento completo: descobre as colunas e usa a
+    primeira com dados. Com fontes (arquivo, aba), lê e junta todas elas
+    (CachePlanilhas.obter_conjunto) e arquivo fica None.
+    """
+
+    progresso = pyqtSignal(int, int)
+    concluido = pyqtSignal(object)
+    falhou = pyqtSignal(str)
+    finalizado = pyqtSignal()
+
+    def __init__(self, cache, arquivo, coluna=None, coluna_peso=None, politica=None, fontes=None):
+        super().__init__()
+        self.cache = cache
+        self.arquivo = arquivo
+        self.fontes = fontes
+        self.coluna = coluna
+        self.coluna_peso = coluna_peso
+        self.politica = politica
+        self.completo = coluna is None
+        self._cancelar = threading.Event()
+
+    def cancelar(self):
+        self._cancelar.set()
+
+    def executar(self):
+        etapa = 'carregar_excel' if self.completo else 'processar_dados_excel'
+        try:
+            with medidor.medir(etapa, coluna=self.coluna, peso=self.coluna_peso) as detalhes:
+                obter = partial(self.cache.obter_conjunto, self.fontes) if self.fontes else \
+                    partial(self.cache.obter, self.arquivo)
+                colunas, coluna, tabela = obter(
+                    self.coluna,
+                    progresso=self.progresso.emit,
+                    cancelar=self._cancelar.is_set,
+                    coluna_peso=self.coluna_peso,
+                    politica=self.politica
+                )
+                detalhes.update(coluna=coluna, linhas=len(tabela))
+        except OperacaoCancelada:
+            pass
+        except Exception as e:
+            self.falhou.emit(str(e))
+        else:
+            if self.completo and not colunas:
+                self.falhou.emit("Nenhuma coluna com dados encontrada")
+            else:
+                self.concluido.emit((self.arquivo, colunas, coluna, tabela))
+        finally:
+            self.finalizado.emit()
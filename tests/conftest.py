@@ -0,0 +1,49 @@
+import pytest
+from openpyxl import Workbook
+
+from benchmarks.dados_sinteticos import gerar_planilha
+from cache_planilhas import CachePlanilhas
+from sorteio_cli import origem_do_sorteio
+
+LINHAS = 300
+
+
+def escrever_xlsx(caminho, abas):
+    """Grava um Excel com as abas {título: linhas}, cabeçalho incluído."""
+    wb = Workbook()
+    wb.remove(wb.active)
+    for titulo, linhas in abas.items():
+        planilha = wb.create_sheet(titulo)
+        for linha in linhas:
+            planilha.append(linha)
+    wb.save(caminho)
+    return str(caminho)
+
+
+@pytest.fixture(scope='session')
+def planilha(tmp_path_factory):
+    """CSV sintético: nome na coluna A, classificação na B e peso na C."""
+    caminho = tmp_path_factory.mktemp('dados') / 'participantes.csv'
+    gerar_planilha(caminho, LINHAS, classificacoes=3)
+    return str(caminho)
+
+
+@pytest.fixture
+def cache():
+    return CachePlanilhas()
+
+
+@pytest.fixture
+def tabela(planilha, cache):
+    return cache.obter(planilha, 'A')[2]
+
+
+@pytest.fixture
+def origem(planilha):
+    """Os campos de origem que o histórico grava junto de cada sorteio."""
+    return origem_do_sorteio([planilha], False, 'A')
+
+
+@pytest.fixture
+def classificacoes(tabela):
+    return sorted(set(tabela.indices_por_classificacao()) - {''})
@@ -0,0 +1,129 @@
+import mmap
+import os
+import pickle
+import shutil
+from array import array
+
+import pytest
+
+import cache_planilhas
+from cache_disco import CABECALHO, CacheDisco, hash_arquivo
+from cache_planilhas import CachePlanilhas
+from participantes import TabelaParticipantes, tipo_do_array
+
+
+@pytest.fixture
+def disco(tmp_path):
+    return CacheDisco(tmp_path / 'cache')
+
+
+def tabela_exemplo(com_pesos=True):
+    tabela = TabelaParticipantes(pesos=array('d') if com_pesos else None)
+    for i in range(500):
+        tabela.adicionar(f"Participante {i} ç", f"C{i % 300}" if i % 7 else '', float(i % 5))
+    return tabela
+
+
+def iguais(tabela, outra):
+    assert list(tabela.nomes) == list(outra.nomes)
+    assert list(tabela.classificacoes) == list(outra.classificacoes)
+    assert (tabela.pesos is None) == (outra.pesos is None)
+    if tabela.pesos is not None:
+        assert list(tabela.pesos) == list(outra.pesos)
+    assert tabela.hash_conteudo() == outra.hash_conteudo()
+
+
+@pytest.mark.parametrize('com_pesos', [False, True])
+def test_retrato_salvo_e_carregado(disco, com_pesos):
+    tabela = tabela_exemplo(com_pesos)
+    peso = 'C' if com_pesos else None
+    disco.salvar('abc', ['A', 'B', 'C'], 'A', tabela, coluna_peso=peso)
+
+    colunas, coluna, carregada = disco.carregar('abc', coluna_peso=peso)
+    assert (colunas, coluna) == (['A', 'B', 'C'], 'A')
+    iguais(tabela, carregada)
+    assert tipo_do_array(carregada.codigos_classificacoes()[0]) == 'H'
+
+
+def test_colunas_sobre_o_arquivo_mapeado(disco):
+    disco.salvar('abc', ['A'], 'A', tabela_exemplo(), coluna_peso='C')
+    carregada = disco.carregar('abc', coluna_peso='C')[2]
+    for vista in (carregada.nomes.dados, carregada.codigos_classificacoes()[0], carregada.pesos):
+        assert isinstance(vista, memoryview) and isinstance(vista.obj, mmap.mmap)
+    assert carregada.tamanho_em_bytes() < tabela_exemplo().tamanho_em_bytes() * 2
+
+
+def test_tabela_mapeada_recebe_linhas_e_atravessa_o_pickle(disco):
+    disco.salvar('abc', ['A'], 'A', tabela_exemplo(), coluna_peso='C')
+    carregada = disco.carregar('abc', coluna_peso='C')[2]
+    copia = pickle.loads(pickle.dumps(carregada))
+    iguais(carregada, copia)
+
+    carregada.adicionar("Novo", "C999", 2.0)
+    assert (carregada.nomes[-1], carregada.classificacoes[-1], carregada.pesos[-1]) == ("Novo", "C999", 2.0)
+    assert len(copia) == len(carregada) - 1
+
+
+def test_faltas(disco):
+    disco.salvar('abc', ['A', 'B'], 'A', tabela_exemplo(False))
+    assert disco.carregar('outro') is None
+    assert disco.carregar('abc', 'B') is None
+    assert disco.carregar('abc', 'A', coluna_peso='C') is None
+
+
+def test_tabela_vazia(disco):
+    disco.salvar('vazio', [], 'A', TabelaParticipantes())
+    _, _, carregada = disco.carregar('vazio', 'A')
+    assert len(carregada) == 0
+
+
+def test_nul_dentro_do_nome_e_removido(disco):
+    tabela = TabelaParticipantes(["a\x00b", "c"], ["X", "Y"])
+    disco.salvar('nul', ['A'], 'A', tabela)
+    assert list(disco.carregar('nul')[2].nomes) == ["ab", "c"]
+
+
+def test_retrato_truncado_ou_de_outra_versao_e_ignorado(disco):
+    disco.salvar('abc', ['A'], 'A', tabela_exemplo())
+    retrato = disco.diretorio / 'abc_A.bin'
+    dados = retrato.read_bytes()
+
+    retrato.write_bytes(dados[:len(dados) // 2])
+    assert disco.carregar('abc') is None
+
+    retrato.write_bytes(dados[:4] + b'\xff' + dados[5:])
+    assert disco.carregar('abc') is None
+
+    retrato.write_bytes(dados[:CABECALHO.size - 1])
+    assert disco.carregar('abc') is None
+
+
+def test_poda_os_retratos_mais_antigos(tmp_path):
+    disco = CacheDisco(tmp_path / 'cache')
+    disco.salvar('um', ['A'], 'A', tabela_exemplo())
+    antigo = disco.diretorio / 'um_A.bin'
+    os.utime(antigo, (0, 0))
+    disco.limite_bytes = antigo.stat().st_size
+    disco.salvar('dois', ['A'], 'A', tabela_exemplo())
+    assert [p.name for p in disco.diretorio.glob('*.bin')] == ['dois_A.bin']
+
+
+def test_cache_planilhas_usa_o_retrato_e_invalida_pelo_conteudo(planilha, tmp_path, monkeypatch):
+    copia = tmp_path / 'participantes.csv'
+    shutil.copy(planilha, copia)
+    disco = CacheDisco(tmp_path / 'cache')
+    lidos = []
+    original = cache_planilhas.ler_planilha
+    monkeypatch.setattr(cache_planilhas, 'ler_planilha', lambda *a, **k: lidos.append(a[0]) or original(*a, **k))
+
+    primeira = CachePlanilhas(disco=disco).obter(str(copia), 'A')[2]
+    segunda = CachePlanilhas(disco=disco).obter(str(copia), 'A')[2]
+    assert len(lidos) == 1
+    iguais(primeira, segunda)
+    assert (disco.diretorio / f"{hash_arquivo(copia)}_A.bin").exists()
+
+    with open(copia, 'a', encoding='utf-8') as f:
+        f.write("Participante novo;X;1\n")
+    terceira = CachePlanilhas(disco=disco).obter(str(copia), 'A')[2]
+    assert len(lidos) == 2
+    assert len(terceira) == len(primeira) + 1
@@ -0,0 +1,163 @@
+import os
+import shutil
+
+import pytest
+
+import cache_planilhas
+from cache_planilhas import CachePlanilhas
+from normalizacao import DEDUP_PRIMEIRO
+
+
+@pytest.fixture
+def copia(planilha, tmp_path):
+    destino = tmp_path / 'participantes.csv'
+    shutil.copy(planilha, destino)
+    return str(destino)
+
+
+@pytest.fixture
+def leituras(monkeypatch):
+    """Arquivos lidos do disco por ler_planilha, na ordem."""
+    lidos = []
+    original = cache_planilhas.ler_planilha
+
+    def contar(arquivo, *args, **kwargs):
+        lidos.append(arquivo)
+        return original(arquivo, *args, **kwargs)
+
+    monkeypatch.setattr(cache_planilhas, 'ler_planilha', contar)
+    return lidos
+
+
+def test_segunda_leitura_vem_da_memoria(copia, leituras):
+    cache = CachePlanilhas()
+    colunas, coluna, tabela = cache.obter(copia)
+    assert cache.obter(copia) == (colunas, coluna, tabela)
+    assert cache.em_cache(copia)[2] is tabela
+    assert leituras == [copia]
+
+
+def test_cada_coluna_e_lida_uma_vez(copia, leituras):
+    cache = CachePlanilhas()
+    nomes = cache.obter(copia, 'A')[2]
+    outra = cache.obter(copia, 'B')[2]
+    assert cache.obter(copia, 'A')[2] is nomes
+    assert cache.obter(copia, 'B')[2] is outra
+    assert len(leituras) == 2
+    assert cache.em_cache(copia, 'C') is None
+
+
+def test_arquivo_alterado_invalida_as_colunas(copia, leituras):
+    cache = CachePlanilhas()
+    antes = cache.obter(copia, 'A')[2]
+    hash_antes = cache.hash_do_arquivo(copia)
+    with open(copia, 'a', encoding='utf-8') as f:
+        f.write("Participante novo;X;1\n")
+
+    assert cache.em_cache(copia, 'A') is None
+    depois = cache.obter(copia, 'A')[2]
+    assert len(depois) == len(antes) + 1
+    assert cache.hash_do_arquivo(copia) != hash_antes
+    assert len(leituras) == 2
+    assert cache.bytes_usados == depois.tamanho_em_bytes()
+
+
+def test_mtime_alterado_tambem_invalida(copia):
+    cache = CachePlanilhas()
+    cache.obter(copia, 'A')
+    info = os.stat(copia)
+    os.utime(copia, ns=(info.st_atime_ns, info.st_mtime_ns + 10 ** 9))
+    assert cache.em_cache(copia, 'A') is None
+
+
+def test_descarte_lru_pelo_limite_de_bytes(copia, leituras):
+    cache = CachePlanilhas()
+    a, b, c = (cache.obter(copia, coluna)[2].tamanho_em_bytes() for coluna in 'ABC')
+    # Cabem duas colunas quaisquer com A, mas não as três.
+    limite = max(a + b, a + c)
+
+    cache = CachePlanilhas(limite_bytes=limite)
+    cache.obter(copia, 'A')
+    cache.obter(copia, 'B')
+    cache.obter(copia, 'A')
+    cache.obter(copia, 'C')
+    assert cache.em_cache(copia, 'B') is None
+    assert cache.em_cache(copia, 'A') is not None
+    assert cache.em_cache(copia, 'C') is not None
+    assert cache.bytes_usados <= limite
+
+
+def test_deduplicada_derivada_da_original(copia, leituras):
+    cache = CachePlanilhas()
+    original = cache.obter(copia, 'A')[2]
+    deduplicada = cache.obter(copia, 'A', politica=DEDUP_PRIMEIRO)[2]
+    assert deduplicada is not original
+    assert deduplicada.deduplicacao.politica == DEDUP_PRIMEIRO
+    assert cache.obter(copia, 'A', politica=DEDUP_PRIMEIRO)[2] is deduplicada
+    assert leituras == [copia]
+
+
+def test_limpar(copia):
+    cache = CachePlanilhas()
+    cache.obter(copia)
+    cache.limpar()
+    assert cache.em_cache(copia) is None
+    assert cache.bytes_usados == 0
+
+
+@pytest.fixture
+def conjuntos(monkeypatch):
+    """Quantas vezes o conjunto foi lido do disco."""
+    lidos = []
+    original = cache_planilhas.ler_conjunto
+
+    def contar(fontes, *args, **kwargs):
+        lidos.append(fontes)
+        return original(fontes, *args, **kwargs)
+
+    monkeypatch.setattr(cache_planilhas, 'ler_conjunto', contar)
+    return lidos
+
+
+@pytest.fixture
+def fontes(copia, tmp_path):
+    outra = tmp_path / 'outra.csv'
+    outra.write_text("Nome;Classificação\nZeca;X\n", encoding='utf-8')
+    return [(copia, None), (str(outra), None)]
+
+
+def test_conjunto_vem_da_memoria(fontes, conjuntos):
+    cache = CachePlanilhas()
+    tabela = cache.obter_conjunto(fontes, 'A', processos=1)[2]
+    assert cache.obter_conjunto(fontes, 'A', processos=1)[2] is tabela
+    assert len(conjuntos) == 1
+
+
+def test_conjunto_sai_quando_uma_fonte_muda(fontes, conjuntos):
+    cache = CachePlanilhas()
+    antes = cache.obter_conjunto(fontes, 'A', processos=1)[2]
+    with open(fontes[1][0], 'a', encoding='utf-8') as f:
+        f.write("Yara;Y\n")
+
+    depois = cache.obter_conjunto(fontes, 'A', processos=1)[2]
+    assert len(depois) == len(antes) + 1
+    assert len(conjuntos) == 2
+    assert cache.bytes_usados == depois.tamanho_em_bytes()
+
+
+def test_conjunto_com_o_mesmo_conteudo_continua_valido(fontes, conjuntos):
+    cache = CachePlanilhas()
+    tabela = cache.obter_conjunto(fontes, 'A', processos=1)[2]
+    info = os.stat(fontes[0][0])
+    os.utime(fontes[0][0], ns=(info.st_atime_ns, info.st_mtime_ns + 10 ** 9))
+    assert cache.obter_conjunto(fontes, 'A', processos=1)[2] is tabela
+    assert len(conjuntos) == 1
+
+
+def test_arquivo_alterado_tambem_tira_o_conjunto(fontes, conjuntos):
+    cache = CachePlanilhas()
+    cache.obter_conjunto(fontes, 'A', processos=1)
+    with open(fontes[0][0], 'a', encoding='utf-8') as f:
+        f.write("Participante novo;X;1\n")
+    cache.obter(fontes[0][0], 'A')
+    assert cache.bytes_usados == cache.em_cache(fontes[0][0], 'A')[2].tamanho_em_bytes()
@@ -0,0 +1,106 @@
+import pytest
+from openpyxl import Workbook
+
+from conjunto import (abas_da_planilha, contagem_por_fonte, fontes_dos_arquivos, ler_conjunto,
+                      rotulo_fonte)
+from leitura import OperacaoCancelada
+from normalizacao import DEDUP_PESO, DEDUP_PRIMEIRO
+from tests.conftest import escrever_xlsx
+
+CABECALHO = ["Nome", "Classificação", "Bilhetes"]
+
+
+@pytest.fixture
+def arquivos(tmp_path):
+    excel = escrever_xlsx(tmp_path / "regionais.xlsx", {
+        "Norte": [CABECALHO, ["Ana", "Ouro", 1], ["Bia", "Prata", 2]],
+        "Sul": [CABECALHO, ["Caio", "Ouro", 3], ["ANA ", "Prata", 4]],
+    })
+    texto = tmp_path / "inscricoes.csv"
+    texto.write_text("Nome;Classificação;Bilhetes\nDavi;Bronze;5\nbia;;6\nEva;Ouro;7\n", encoding='utf-8')
+    return [excel, str(texto)]
+
+
+def test_fontes_sao_as_abas_visiveis(tmp_path, arquivos):
+    wb = Workbook()
+    wb.active.title = "Visível"
+    wb.create_sheet("Oculta").sheet_state = 'hidden'
+    oculta = tmp_path / "oculta.xlsx"
+    wb.save(oculta)
+
+    assert abas_da_planilha(str(oculta)) == ["Visível"]
+    assert fontes_dos_arquivos(arquivos) == [(arquivos[0], "Norte"), (arquivos[0], "Sul"), (arquivos[1], None)]
+    assert fontes_dos_arquivos(arquivos, todas_as_abas=False) == [(arquivos[0], None), (arquivos[1], None)]
+
+
+def test_rotulo_fonte():
+    assert rotulo_fonte("/dados/regionais.xlsx", "Sul") == "regionais.xlsx [Sul]"
+    assert rotulo_fonte("/dados/inscricoes.csv") == "inscricoes.csv"
+
+
+@pytest.mark.parametrize('processos', [1, 2])
+def test_concatena_na_ordem_das_fontes(arquivos, processos):
+    colunas, coluna, tabela = ler_conjunto(fontes_dos_arquivos(arquivos), coluna_peso='C', processos=processos)
+    assert (colunas, coluna) == (["A", "B", "C"], "A")
+    assert list(tabela.nomes) == ["Ana", "Bia", "Caio", "ANA", "Davi", "bia", "Eva"]
+    assert list(tabela.pesos) == [1, 2, 3, 4, 5, 6, 7]
+    assert tabela.fontes == ["regionais.xlsx [Norte]", "regionais.xlsx [Sul]", "inscricoes.csv"]
+    assert [tabela.fonte_de(i) for i in (0, 3, 6)] == tabela.fontes[:2] + tabela.fontes[2:]
+    assert contagem_por_fonte(tabela) == [("regionais.xlsx [Norte]", 2), ("regionais.xlsx [Sul]", 2),
+                                          ("inscricoes.csv", 3)]
+
+
+def test_deduplicado_guarda_a_origem_da_primeira_linha(arquivos):
+    _, _, tabela = ler_conjunto(fontes_dos_arquivos(arquivos), politica=DEDUP_PRIMEIRO, processos=1)
+    assert list(tabela.nomes) == ["Ana", "Bia", "Caio", "Davi", "Eva"]
+    assert [tabela.fonte_de(i) for i in range(len(tabela))] == [
+        "regionais.xlsx [Norte]", "regionais.xlsx [Norte]", "regionais.xlsx [Sul]",
+        "inscricoes.csv", "inscricoes.csv",
+    ]
+    assert contagem_por_fonte(tabela)[1] == ("regionais.xlsx [Sul]", 1)
+
+
+def test_deduplicado_por_peso_soma_entre_as_fontes(arquivos):
+    _, _, tabela = ler_conjunto(fontes_dos_arquivos(arquivos), coluna_peso='C', politica=DEDUP_PESO, processos=1)
+    pesos = dict(zip(tabela.nomes, tabela.pesos))
+    assert (pesos["Ana"], pesos["Bia"]) == (5, 8)
+
+
+def test_sem_coluna_relê_as_fontes_com_a_primeira_comum(tmp_path):
+    so_b = tmp_path / "so_b.csv"
+    so_b.write_text(";Nome\n;Zeca\n", encoding='utf-8')
+    completo = tmp_path / "completo.csv"
+    completo.write_text("Nome;Outro\nAna;x\n", encoding='utf-8')
+    colunas, coluna, tabela = ler_conjunto([(str(so_b), None), (str(completo), None)], processos=1)
+    assert (colunas, coluna) == (["A", "B"], "A")
+    assert list(tabela.nomes) == ["Ana"]
+
+
+@pytest.mark.parametrize('processos', [1, 2])
+def test_cache_em_disco_por_aba(arquivos, tmp_path, processos):
+    fontes = fontes_dos_arquivos(arquivos)
+    diretorio = tmp_path / "cache"
+    primeira = ler_conjunto(fontes, processos=processos, diretorio_cache=str(diretorio))[2]
+    assert len(list(diretorio.glob('*.bin'))) == len(fontes)
+    segunda = ler_conjunto(fontes, processos=processos, diretorio_cache=str(diretorio))[2]
+    assert list(segunda.nomes) == list(primeira.nomes)
+    assert contagem_por_fonte(segunda) == contagem_por_fonte(primeira)
+
+
+def test_sem_fontes_e_cancelamento(arquivos):
+    with pytest.raises(ValueError):
+        ler_conjunto([])
+    with pytest.raises(OperacaoCancelada):
+        ler_conjunto(fontes_dos_arquivos(arquivos), processos=1, cancelar=lambda: True)
+
+
+def test_origens_crescem_com_o_numero_de_fontes(tmp_path):
+    fontes = []
+    for i in range(300):
+        arquivo = tmp_path / f"f{i}.csv"
+        arquivo.write_text(f"Nome\nP{i}\n", encoding='utf-8')
+        fontes.append((str(arquivo), None))
+    _, _, tabela = ler_conjunto(fontes, processos=1)
+    assert tabela.origens.typecode == 'H'
+    assert tabela.fonte_de(299) == "f299.csv"
+    assert ler_conjunto(fontes[:2], processos=1)[2].origens.typecode == 'B'
@@ -0,0 +1,36 @@
+import tracemalloc
+
+import pytest
+
+from desempenho import Medidor
+
+
+@pytest.fixture
+def sem_tracemalloc():
+    ligado = tracemalloc.is_tracing()
+    tracemalloc.stop()
+    yield
+    if ligado:
+        tracemalloc.start()
+    else:
+        tracemalloc.stop()
+
+
+def test_captura_liga_e_desliga_o_tracemalloc(sem_tracemalloc):
+    medidor = Medidor()
+    medidor.iniciar_captura()
+    assert medidor.capturando and tracemalloc.is_tracing()
+    with medidor.medir('etapa'):
+        dados = bytearray(1 << 20)
+    assert medidor.recentes()[0]['pico_memoria'] >= len(dados)
+    medidor.parar_captura()
+    assert not medidor.capturando and not tracemalloc.is_tracing()
+    assert medidor.ultimo_perfil is not None
+
+
+def test_captura_nao_desliga_tracemalloc_de_fora(sem_tracemalloc):
+    tracemalloc.start()
+    medidor = Medidor()
+    medidor.iniciar_captura()
+    medidor.parar_captura()
+    assert tracemalloc.is_tracing()
@@ -0,0 +1,122 @@
+import pytest
+
+import motor_sorteio
+from consulta_historico import IndiceHistorico, chave_legada, chave_participante
+from exclusao import (Exclusao, escopo_exclusao, exclusao_do_historico, exclusao_gravada,
+                      exclusao_por_classificacao)
+
+
+@pytest.mark.parametrize('nome, outro', [
+    ("José da Silva", "jose da silva"),
+    ("  Ana   Maria ", "ana maria"),
+    ("MÜLLER", "muller"),
+    ("Pedro.", "pedro"),
+    ("ﬁlipe", "filipe"),
+])
+def test_chave_iguala_grafias(nome, outro):
+    assert chave_participante(nome) == chave_participante(outro)
+
+
+def test_chave_de_nome_so_com_pontuacao_nao_fica_vazia():
+    assert chave_participante("...") == "..."
+    assert chave_participante("...") != chave_participante("!!!")
+
+
+def test_chave_legada_so_ignora_caixa_e_espacos():
+    assert chave_legada(" José ") == "josé"
+    assert chave_legada("José") != chave_legada("Jose")
+
+
+def test_escopo_grava_so_os_filtros_usados():
+    assert escopo_exclusao() == {}
+    assert escopo_exclusao('20250101', tipo='Sorteio') == {'data_inicial': '20250101', 'tipo': 'Sorteio'}
+
+
+def test_exclusao_compara_pela_chave_e_junta_os_descartados():
+    exclusao = Exclusao({chave_participante("José da Silva")})
+    assert "jose da silva" in exclusao
+    assert "Maria" not in exclusao
+    assert not exclusao.descartados
+    assert exclusao.descartar("JOSÉ DA SILVA")
+    assert not exclusao.descartar("Maria")
+    assert exclusao.descartados == {"jose da silva"}
+    assert len(exclusao) == 1
+
+
+@pytest.mark.parametrize('escopo', [
+    escopo_exclusao(),
+    escopo_exclusao('20250103'),
+    escopo_exclusao(data_final='20250104'),
+    escopo_exclusao(tipo=motor_sorteio.TIPO_COLOCACAO),
+    escopo_exclusao(classificacao='X'),
+])
+def test_vencedores_mantidos_a_cada_registro(escopo):
+    indice = IndiceHistorico()
+    for dia in range(1, 8):
+        vencedores = indice.vencedores(**escopo)
+        indice.adicionar({
+            'data': f'{dia:02}/01/2025 10:00:00',
+            'tipo': motor_sorteio.TIPO_COLOCACAO if dia % 2 else motor_sorteio.TIPO_SORTEIO,
+            'itens': [f"P{dia}", f"Q{dia % 3}"], 'classificacoes': ['X', 'Y'],
+        })
+        assert indice.vencedores(**escopo) == indice.vencedores(ate=indice.total, **escopo)
+        assert vencedores == indice.vencedores(ate=indice.total - 1, **escopo)
+
+
+def test_vencedores_anteriores_nao_voltam(tabela):
+    registros = []
+    for semente in range(5):
+        exclusao = exclusao_do_historico(IndiceHistorico(registros), escopo_exclusao())
+        _, registro = motor_sorteio.sortear(tabela, 50, 'A', semente=semente, exclusao=exclusao)
+        registros.append(registro)
+        assert set(registro['descartados']) <= exclusao.chaves
+        assert registro['excluidos'] == len(exclusao.chaves)
+
+    sorteados = [nome for registro in registros for nome in registro['itens']]
+    assert len(sorteados) == len(set(sorteados)) == 250
+
+
+def test_exclusao_que_nao_deixa_itens_suficientes(tabela):
+    _, registro = motor_sorteio.sortear(tabela, len(tabela) - 2, 'A', semente=1)
+    exclusao = exclusao_do_historico(IndiceHistorico([registro]), escopo_exclusao())
+    with pytest.raises(ValueError):
+        motor_sorteio.sortear(tabela, 3, 'A', semente=2, exclusao=exclusao)
+
+
+def test_escopo_do_tipo(tabela):
+    _, colocacao = motor_sorteio.sortear_com_colocacao(tabela, 10, 'A', semente=1)
+    indice = IndiceHistorico([colocacao])
+    assert not exclusao_do_historico(indice, escopo_exclusao(tipo=motor_sorteio.TIPO_SORTEIO)).chaves
+    assert len(exclusao_do_historico(indice, escopo_exclusao(tipo=motor_sorteio.TIPO_COLOCACAO))) == 10
+
+
+def test_cotas_excluem_so_vencedores_da_propria_classificacao(tabela, classificacoes):
+    cotas = {c: 5 for c in classificacoes}
+    _, anterior = motor_sorteio.sortear_por_cotas(tabela, cotas, 'A', semente=1)
+    exclusao = exclusao_por_classificacao(
+        IndiceHistorico([anterior]), escopo_exclusao(por_classificacao=True), cotas
+    )
+    for classificacao in classificacoes:
+        vencedores = {chave_participante(nome) for nome, cls in zip(anterior['itens'], anterior['classificacoes'])
+                      if cls == classificacao}
+        assert exclusao.para(classificacao).chaves == vencedores
+
+    _, registro = motor_sorteio.sortear_por_cotas(tabela, cotas, 'A', semente=2, exclusao=exclusao)
+    assert not set(registro['itens']) & set(anterior['itens'])
+    assert registro['excluidos_por_classificacao'] == {c: 5 for c in classificacoes}
+
+
+def test_exclusao_gravada_refaz_a_do_sorteio(tabela, classificacoes):
+    _, anterior = motor_sorteio.sortear(tabela, 100, 'A', semente=1)
+    exclusao = exclusao_do_historico(IndiceHistorico([anterior]), escopo_exclusao())
+    _, registro = motor_sorteio.sortear(tabela, 20, 'A', semente=2, exclusao=exclusao)
+
+    gravada = exclusao_gravada(registro)
+    assert len(gravada) == len(exclusao) == 100
+    assert gravada.chaves == exclusao.descartados
+    _, refeito = motor_sorteio.sortear(tabela, 20, 'A', semente=2, exclusao=gravada)
+    assert refeito['hash_resultado'] == registro['hash_resultado']
+
+
+def test_registro_sem_exclusao_gravada():
+    assert exclusao_gravada({'tipo': motor_sorteio.TIPO_SORTEIO}) is None
@@ -0,0 +1,112 @@
+import csv
+import io
+import json
+
+import pytest
+from openpyxl import load_workbook
+
+from exportacao import CAMPOS_CSV, escrever_json, exportar
+from motor_sorteio import TIPO_COLOCACAO, TIPO_COTAS, TIPO_GRUPOS, TIPO_SORTEIO
+
+RESULTADOS = [
+    {'tipo': TIPO_COLOCACAO, 'data': '01/01/2025 10:00:00', 'coluna': 'A',
+     'itens': ["Ana", "Bia", "Caio"], 'premios': ["Carro", "Moto"]},
+    {'tipo': TIPO_GRUPOS, 'data': '01/01/2025 10:01:00', 'coluna': 'A',
+     'grupos': [["Ana", "Bia"], ["Caio"]]},
+    {'tipo': TIPO_COTAS, 'data': '01/01/2025 10:02:00', 'coluna': 'A',
+     'cotas': {"Ouro": ["Davi"], "Prata": ["Eva", "Fábio"]}, 'premios': {"Ouro": ["Viagem"]}},
+]
+
+
+def resultados_gerados(total, consumidos):
+    """Gerador que anota quantos resultados já foram pedidos."""
+    for i in range(total):
+        consumidos.append(i)
+        yield {'tipo': TIPO_SORTEIO, 'data': '', 'itens': [f"n{i}"]}
+
+
+@pytest.mark.parametrize('lista', [[], RESULTADOS, RESULTADOS[:1]])
+def test_json_igual_ao_json_dump(lista):
+    saida = io.StringIO()
+    escrever_json(iter(lista), saida)
+    assert saida.getvalue() == json.dumps(lista, indent=4, ensure_ascii=False)
+
+
+@pytest.mark.parametrize('extensao', ['.json', '.jsonl', '.csv', '.xlsx'])
+def test_exporta_de_um_gerador_sem_montar_a_lista(extensao, tmp_path):
+    consumidos = []
+    exportar(resultados_gerados(50, consumidos), str(tmp_path / f"saida{extensao}"))
+    assert consumidos == list(range(50))
+
+
+def test_jsonl_um_resultado_por_linha(tmp_path):
+    arquivo = tmp_path / "saida.jsonl"
+    exportar(RESULTADOS, str(arquivo))
+    linhas = arquivo.read_text(encoding='utf-8').splitlines()
+    assert [json.loads(linha) for linha in linhas] == RESULTADOS
+
+
+def test_extensao_desconhecida_sai_em_json(tmp_path):
+    arquivo = tmp_path / "saida.txt"
+    exportar(RESULTADOS, str(arquivo))
+    assert json.loads(arquivo.read_text(encoding='utf-8')) == RESULTADOS
+
+
+def test_csv_uma_linha_por_item(tmp_path):
+    arquivo = tmp_path / "saida.csv"
+    exportar(RESULTADOS, str(arquivo))
+    with open(arquivo, encoding='utf-8-sig', newline='') as f:
+        linhas = list(csv.reader(f, delimiter=';'))
+
+    assert linhas[0] == CAMPOS_CSV
+    colunas = [dict(zip(CAMPOS_CSV, linha)) for linha in linhas[1:]]
+    assert [(c['sorteio'], c['grupo'], c['posicao'], c['item'], c['premio']) for c in colunas] == [
+        ('1', '', '1', "Ana", "Carro"),
+        ('1', '', '2', "Bia", "Moto"),
+        ('1', '', '3', "Caio", ''),
+        ('2', '1', '1', "Ana", ''),
+        ('2', '1', '2', "Bia", ''),
+        ('2', '2', '1', "Caio", ''),
+        ('3', '', '1', "Davi", "Viagem"),
+        ('3', '', '1', "Eva", ''),
+        ('3', '', '2', "Fábio", ''),
+    ]
+    assert [c['classificacao'] for c in colunas[-3:]] == ["Ouro", "Prata", "Prata"]
+
+
+def test_csv_de_registros_do_historico(tmp_path):
+    # O histórico guarda só os tamanhos dos grupos e a quantidade de cada cota.
+    registros = [
+        {'tipo': TIPO_GRUPOS, 'data': '', 'itens_por_grupo': [2, 1]},
+        {'tipo': TIPO_COTAS, 'data': '', 'cotas': {"Ouro": 1, "Prata": 2}, 'itens': ["Davi", "Eva", "Fábio"]},
+    ]
+    arquivo = tmp_path / "saida.csv"
+    exportar(registros, str(arquivo))
+    with open(arquivo, encoding='utf-8-sig', newline='') as f:
+        linhas = list(csv.DictReader(f, delimiter=';'))
+    assert [(l['grupo'], l['item']) for l in linhas[:2]] == [('1', ''), ('2', '')]
+    assert [(l['classificacao'], l['item']) for l in linhas[2:]] == [
+        ("Ouro", "Davi"), ("Prata", "Eva"), ("Prata", "Fábio"),
+    ]
+
+
+def test_xlsx_uma_aba_por_sorteio_e_por_grupo(tmp_path):
+    arquivo = tmp_path / "saida.xlsx"
+    exportar(RESULTADOS, str(arquivo))
+    wb = load_workbook(arquivo, read_only=True)
+    assert wb.sheetnames == ["Sorteio 1", "Sorteio 2 - Grupo 1", "Sorteio 2 - Grupo 2", "Sorteio 3"]
+
+    colocacao = [linha for linha in wb["Sorteio 1"].iter_rows(values_only=True)]
+    assert ("1º lugar: Ana", "Prêmio: Carro") in colocacao
+    assert ("3º lugar: Caio",) in colocacao
+    grupo = [linha[:1] for linha in wb["Sorteio 2 - Grupo 2"].iter_rows(values_only=True)]
+    assert grupo[-2:] == [("Grupo 2",), ("Caio",)]
+    cotas = [linha[:1] for linha in wb["Sorteio 3"].iter_rows(values_only=True)]
+    assert ("Classificação: Prata",) in cotas and ("2º lugar: Fábio",) in cotas
+    wb.close()
+
+
+def test_xlsx_vazio_tem_uma_aba(tmp_path):
+    arquivo = tmp_path / "saida.xlsx"
+    exportar([], str(arquivo))
+    assert load_workbook(arquivo).sheetnames == ["Sorteio"]
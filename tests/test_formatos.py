@@ -0,0 +1,89 @@
+import csv
+from contextlib import contextmanager
+
+import pytest
+
+import leitura
+from leitura import ler_planilha, percorrer_planilha, registrar_leitor, validar_arquivo
+from tests.conftest import escrever_xlsx
+
+LINHAS = [
+    ["Nome", "Classificação", "Bilhetes"],
+    ["Ana Júlia", "X", 2],
+    ["Bia", "Y", 1.5],
+    ["", "X", 3],
+    ["Caio; Jr", "", 1],
+]
+ESPERADO = (["A", "B", "C"], "A", ["Ana Júlia", "Bia", "Caio; Jr"], ["X", "Y", ""], [2.0, 1.5, 1.0])
+
+
+def escrever_texto(caminho, delimitador, codificacao='utf-8'):
+    with open(caminho, 'w', newline='', encoding=codificacao) as f:
+        csv.writer(f, delimiter=delimitador).writerows(LINHAS)
+    return str(caminho)
+
+
+def escrever_parquet(caminho):
+    pa = pytest.importorskip('pyarrow')
+    import pyarrow.parquet as pq
+
+    colunas = list(zip(*LINHAS[1:]))
+    pq.write_table(pa.table({nome: list(valores) for nome, valores in zip(LINHAS[0], colunas)}), caminho)
+    return str(caminho)
+
+
+FORMATOS = {
+    'xlsx': lambda pasta: escrever_xlsx(pasta / 'p.xlsx', {'Plan': LINHAS}),
+    'csv ;': lambda pasta: escrever_texto(pasta / 'p.csv', ';'),
+    'csv ,': lambda pasta: escrever_texto(pasta / 'p.csv', ','),
+    'csv cp1252': lambda pasta: escrever_texto(pasta / 'p.csv', ';', 'cp1252'),
+    'csv bom': lambda pasta: escrever_texto(pasta / 'p.csv', '|', 'utf-8-sig'),
+    'txt': lambda pasta: escrever_texto(pasta / 'p.txt', '\t'),
+    'tsv': lambda pasta: escrever_texto(pasta / 'p.tsv', '\t'),
+    'tab': lambda pasta: escrever_texto(pasta / 'p.tab', '\t'),
+    'parquet': lambda pasta: escrever_parquet(pasta / 'p.parquet'),
+}
+
+
+@pytest.mark.parametrize('formato', FORMATOS)
+def test_todos_os_formatos_dao_a_mesma_tabela(formato, tmp_path):
+    arquivo = FORMATOS[formato](tmp_path)
+    validar_arquivo(arquivo)
+    colunas, coluna, tabela = ler_planilha(arquivo, coluna_peso='C')
+    assert (colunas, coluna, list(tabela.nomes), list(tabela.classificacoes), list(tabela.pesos)) == ESPERADO
+
+
+@pytest.mark.parametrize('formato', ['csv ;', 'tsv', 'parquet'])
+def test_mesma_tabela_do_excel(formato, tmp_path):
+    excel = ler_planilha(FORMATOS['xlsx'](tmp_path), coluna_peso='C')[2]
+    outro = ler_planilha(FORMATOS[formato](tmp_path), coluna_peso='C')[2]
+    assert outro.hash_conteudo() == excel.hash_conteudo()
+
+
+@pytest.mark.parametrize('formato', ['csv ;', 'tsv', 'parquet'])
+def test_percorrer_em_fluxo(formato, tmp_path):
+    linhas = list(percorrer_planilha(FORMATOS[formato](tmp_path), 'A', 'C'))
+    assert linhas == list(zip(*ESPERADO[2:]))
+
+
+@pytest.mark.parametrize('nome', ['falso.xlsx', 'falso.parquet', 'sem_extensao'])
+def test_assinatura_invalida(nome, tmp_path):
+    arquivo = tmp_path / nome
+    arquivo.write_text("nome;classificação\nAna;X\n", encoding='utf-8')
+    with pytest.raises(ValueError):
+        validar_arquivo(str(arquivo))
+
+
+def test_leitor_registrado(tmp_path, monkeypatch):
+    monkeypatch.setattr(leitura, 'LEITORES', dict(leitura.LEITORES))
+
+    @contextmanager
+    def abrir_linhas(arquivo):
+        with open(arquivo, encoding='utf-8') as f:
+            yield 0, ([parte] for parte in f.read().split()[1:])
+
+    registrar_leitor(['.LST'], abrir_linhas)
+    arquivo = tmp_path / 'nomes.lst'
+    arquivo.write_text("cabeçalho Ana Bia", encoding='utf-8')
+    validar_arquivo(str(arquivo))
+    assert list(ler_planilha(str(arquivo))[2].nomes) == ["Ana", "Bia"]
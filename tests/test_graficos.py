@@ -0,0 +1,132 @@
+from collections import Counter
+
+import pytest
+from matplotlib.figure import Figure
+
+from consulta_historico import IndiceHistorico
+from graficos import (GRAFICO_CLASSIFICACOES, GRAFICO_INICIAIS, GRAFICO_VAZIO, GRAFICO_VITORIAS,
+                      LIMITE_BARRAS, LIMITE_FATIAS, ROTULO_OUTROS, GraficoDistribuicao,
+                      agregado_das_vitorias, agregado_do_grafico, agrupar_excedentes)
+from participantes import TabelaParticipantes
+
+
+def tabela_de(linhas):
+    tabela = TabelaParticipantes()
+    for nome, classificacao in linhas:
+        tabela.adicionar(nome, classificacao)
+    return tabela
+
+
+def test_ate_o_limite_nada_e_agrupado():
+    contagem = Counter({'a': 1, 'b': 3, 'c': 2})
+    assert agrupar_excedentes(contagem, 3) == [('b', 3), ('c', 2), ('a', 1)]
+
+
+def test_excedentes_vao_para_outros_e_o_total_se_mantem():
+    contagem = Counter({f"c{i:02}": i + 1 for i in range(25)})
+    barras = agrupar_excedentes(contagem, 5)
+    assert barras[:4] == [('c24', 25), ('c23', 24), ('c22', 23), ('c21', 22)]
+    assert barras[-1] == (ROTULO_OUTROS, sum(range(1, 22)))
+    assert sum(quantidade for _, quantidade in barras) == sum(contagem.values())
+
+
+def test_empates_no_corte_mantem_o_tamanho():
+    barras = agrupar_excedentes(Counter({f"c{i}": 7 for i in range(12)}), LIMITE_FATIAS)
+    assert len(barras) == LIMITE_FATIAS
+    assert barras[-1] == (ROTULO_OUTROS, 7 * (12 - LIMITE_FATIAS + 1))
+
+
+def test_agregado_sem_dados():
+    assert agregado_do_grafico(TabelaParticipantes(), 'A')[0] == GRAFICO_VAZIO
+
+
+def test_agregado_por_classificacao_ignora_as_vazias():
+    tabela = tabela_de([("Ana", "X"), ("Bia", "Y"), ("Caio", "X"), ("Davi", "")])
+    tipo, fatias, titulo = agregado_do_grafico(tabela, 'B')
+    assert tipo == GRAFICO_CLASSIFICACOES
+    assert fatias == (('X', 2), ('Y', 1))
+    assert titulo.endswith("Coluna B")
+
+
+def test_agregado_por_classificacao_limita_as_fatias():
+    tabela = tabela_de([(f"n{i}", f"c{i % 40}") for i in range(400)])
+    fatias = agregado_do_grafico(tabela, 'B')[1]
+    assert len(fatias) == LIMITE_FATIAS
+    assert fatias[-1][0] == ROTULO_OUTROS
+    assert sum(quantidade for _, quantidade in fatias) == 400
+
+
+def test_agregado_por_inicial_junta_caixas_e_acentos():
+    tabela = tabela_de([("ana", ""), ("Ana", ""), ("Élio", ""), ("édson", ""), ("bia", "")])
+    tipo, barras, _ = agregado_do_grafico(tabela, 'A')
+    assert tipo == GRAFICO_INICIAIS
+    assert barras == (('A', 2), ('B', 1), ('É', 2))
+
+
+def test_agregado_por_inicial_deixa_outros_no_fim():
+    iniciais = [chr(c) for c in range(0x41, 0x5B)] + [chr(c) for c in range(0xC0, 0xD6)]
+    tabela = tabela_de([(letra + "x", "") for letra in iniciais for _ in range(2)] + [("Zed", "")])
+    barras = agregado_do_grafico(tabela, 'A')[1]
+    assert len(barras) == LIMITE_BARRAS
+    assert barras[-1][0] == ROTULO_OUTROS
+    rotulos = [rotulo for rotulo, _ in barras[:-1]]
+    assert rotulos == sorted(rotulos) and 'Z' in rotulos
+    assert sum(quantidade for _, quantidade in barras) == len(tabela)
+
+
+def test_vitorias_sem_historico():
+    assert agregado_das_vitorias(IndiceHistorico())[0] == GRAFICO_VAZIO
+
+
+def test_histograma_das_vitorias():
+    indice = IndiceHistorico([
+        {'data': '01/01/2025 10:00:00', 'itens': ["Ana", "Bia"]},
+        {'data': '02/01/2025 10:00:00', 'itens': ["Ana", "Caio"]},
+        {'data': '03/01/2025 10:00:00', 'itens': ["ana", "Caio"]},
+    ])
+    tipo, barras, titulo = agregado_das_vitorias(indice)
+    assert tipo == GRAFICO_VITORIAS
+    assert barras == (('1', 1), ('2', 1), ('3', 1))
+    assert "3 sorteios" in titulo
+
+
+def test_histograma_junta_a_cauda():
+    vezes = LIMITE_BARRAS + 5
+    indice = IndiceHistorico({'data': '', 'itens': [f"p{k}" for k in range(i + 1)]} for i in range(vezes))
+    barras = agregado_das_vitorias(indice)[1]
+    assert len(barras) == LIMITE_BARRAS
+    assert barras[-1] == (f"{LIMITE_BARRAS}+", 6)
+
+
+@pytest.fixture
+def grafico():
+    return GraficoDistribuicao(Figure())
+
+
+def test_grafico_so_redesenha_quando_o_agregado_muda(grafico):
+    agregado = (GRAFICO_INICIAIS, (('A', 2), ('B', 1)), "t")
+    assert grafico.atualizar(agregado)
+    assert not grafico.atualizar(agregado)
+    assert grafico.eixo_barras.get_visible() and not grafico.eixo_pizza.get_visible()
+
+
+def test_grafico_reaproveita_as_barras_com_os_mesmos_rotulos(grafico):
+    grafico.atualizar((GRAFICO_INICIAIS, (('A', 2), ('B', 1)), "t"))
+    barras = grafico.barras
+    grafico.atualizar((GRAFICO_INICIAIS, (('A', 5), ('B', 1)), "t"))
+    assert grafico.barras is barras
+    assert [barra.get_height() for barra in barras] == [5, 1]
+    assert grafico.rotulos_barras[0].get_text() == "5"
+
+    grafico.atualizar((GRAFICO_INICIAIS, (('A', 5), ('C', 1)), "t"))
+    assert grafico.barras is not barras
+
+
+def test_grafico_alterna_pizza_e_vazio(grafico):
+    grafico.atualizar((GRAFICO_CLASSIFICACOES, (('X', 2), ('Y', 1)), "t"))
+    assert grafico.eixo_pizza.get_visible() and not grafico.eixo_barras.get_visible()
+    assert len(grafico.eixo_pizza.patches) == 2
+
+    grafico.atualizar((GRAFICO_VAZIO, (), "vazio"))
+    assert not grafico.eixo_pizza.patches
+    assert [texto.get_text() for texto in grafico.eixo_pizza.texts] == ["Sem dados para exibir"]
@@ -0,0 +1,99 @@
+import pytest
+
+import leitura
+from leitura import (OperacaoCancelada, converter_peso, indice_da_coluna, letra_da_coluna, ler_planilha,
+                     percorrer_planilha)
+from tests.conftest import escrever_xlsx
+
+LINHAS = [
+    ["Nome", "Classificação", "Apelido", "Bilhetes"],
+    ["Ana", "X", None, 2],
+    ["Bia", "Y", "B", None],
+    [None, "X", "C", 1],
+    ["Caio", None, None, "1,5"],
+]
+
+
+@pytest.fixture
+def excel(tmp_path):
+    return escrever_xlsx(tmp_path / 'participantes.xlsx', {'Inscritos': LINHAS})
+
+
+@pytest.mark.parametrize('letra, indice', [('A', 0), ('B', 1), ('Z', 25), ('AA', 26), ('AZ', 51), ('BA', 52)])
+def test_letras_e_indices_das_colunas(letra, indice):
+    assert indice_da_coluna(letra) == indice
+    assert letra_da_coluna(indice) == letra
+
+
+def test_descobre_as_colunas_e_usa_a_primeira(excel):
+    colunas, coluna, tabela = ler_planilha(excel)
+    assert colunas == ['A', 'B', 'C', 'D']
+    assert coluna == 'A'
+    assert list(tabela.nomes) == ["Ana", "Bia", "Caio"]
+    assert list(tabela.classificacoes) == ["X", "Y", ""]
+
+
+def test_coluna_pedida_leva_a_classificacao_da_mesma_linha(excel):
+    _, coluna, tabela = ler_planilha(excel, 'C')
+    assert coluna == 'C'
+    assert list(tabela.nomes) == ["B", "C"]
+    assert list(tabela.classificacoes) == ["Y", "X"]
+
+
+def test_coluna_mais_a_esquerda_descoberta_depois(tmp_path):
+    # A coluna A só recebe valor na terceira linha: ela passa a ser a padrão.
+    arquivo = escrever_xlsx(tmp_path / 'tardia.xlsx', {'Plan': [
+        ["Nome", "Classificação", "Outro"], [None, "X", "c1"], [None, "Y", "c2"], ["a3", "Z", "c3"],
+    ]})
+    colunas, coluna, tabela = ler_planilha(arquivo)
+    assert colunas == ['A', 'B', 'C']
+    assert coluna == 'A'
+    assert list(tabela.nomes) == ["a3"]
+
+
+def test_pesos_da_coluna(excel):
+    _, _, tabela = ler_planilha(excel, 'A', coluna_peso='D')
+    assert list(tabela.pesos) == [2.0, 1.0, 1.5]
+
+
+@pytest.mark.parametrize('valor, esperado', [(None, 1.0), ('', 1.0), ('2,5', 2.5), (' 3 ', 3.0), (0, 0.0)])
+def test_converter_peso(valor, esperado):
+    assert converter_peso(valor, 2) == esperado
+
+
+@pytest.mark.parametrize('valor', ['abc', -1, float('inf'), float('nan')])
+def test_peso_invalido_indica_a_linha(valor):
+    with pytest.raises(ValueError, match="linha 7"):
+        converter_peso(valor, 7)
+
+
+def test_uma_passada_so(excel, monkeypatch):
+    validar, abrir = leitura.LEITORES['.xlsx']
+    aberturas = []
+
+    def abrir_contando(arquivo, aba=None):
+        aberturas.append(arquivo)
+        return abrir(arquivo, aba)
+
+    monkeypatch.setitem(leitura.LEITORES, '.xlsx', (validar, abrir_contando))
+    ler_planilha(excel)
+    assert aberturas == [excel]
+
+
+def test_progresso_e_cancelamento(tmp_path, monkeypatch):
+    monkeypatch.setattr(leitura, 'LINHAS_POR_AVISO', 10)
+    arquivo = escrever_xlsx(tmp_path / 'grande.xlsx', {'Plan': [["Nome"]] + [[f"P{i}"] for i in range(50)]})
+    avisos = []
+    _, _, tabela = ler_planilha(arquivo, progresso=lambda lidas, total: avisos.append((lidas, total)))
+    assert len(tabela) == 50
+    assert [lidas for lidas, _ in avisos] == [10, 20, 30, 40, 50]
+    assert all(total == 51 for _, total in avisos)
+
+    with pytest.raises(OperacaoCancelada):
+        ler_planilha(arquivo, cancelar=lambda: True)
+
+
+def test_percorrer_da_as_mesmas_linhas(excel):
+    _, _, tabela = ler_planilha(excel, 'A', coluna_peso='D')
+    linhas = list(percorrer_planilha(excel, 'A', 'D'))
+    assert linhas == list(zip(tabela.nomes, tabela.classificacoes, tabela.pesos))
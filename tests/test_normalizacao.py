@@ -0,0 +1,103 @@
+from array import array
+
+import pytest
+
+from normalizacao import (DEDUP_MESCLAR, DEDUP_PESO, DEDUP_PRIMEIRO, LIMITE_VARIANTES,
+                          chave_normalizada, deduplicar, limpar_nome, linhas_da_tabela)
+from participantes import TabelaParticipantes
+
+LINHAS = [
+    ("José da Silva", "", 1.0),
+    ("Ana", "Ouro", 2.0),
+    ("  JOSE   DA SILVA. ", "Prata", 5.0),
+    ("ana", "Prata", 1.0),
+    ("...", "Ouro", 1.0),
+    ("jose da silva", "", 3.0),
+]
+
+
+@pytest.mark.parametrize('nome, chave', [
+    ("José da Silva", "jose da silva"),
+    ("  JOSÉ   da   SILVA ", "jose da silva"),
+    ("Pedro.", "pedro"),
+    ("«Maria»", "maria"),
+    ("ﬁlipe", "filipe"),
+    ("Straße", "strasse"),
+    ("...", ""),
+    ("", ""),
+])
+def test_chave_normalizada(nome, chave):
+    assert chave_normalizada(nome) == chave
+
+
+def test_limpar_nome_preserva_acentos_e_caixa():
+    assert limpar_nome("  José   da\tSilva ") == "José da Silva"
+    assert limpar_nome("ﬁlipe") == "filipe"
+
+
+def test_primeiro_mantem_a_primeira_linha():
+    tabela, relatorio = deduplicar(LINHAS, DEDUP_PRIMEIRO)
+    assert list(tabela.nomes) == ["José da Silva", "Ana"]
+    assert list(tabela.classificacoes) == ["", "Ouro"]
+    assert tabela.pesos is None
+    assert (relatorio.lidos, relatorio.descartados, relatorio.mesclados) == (6, 1, 3)
+
+
+def test_primeiro_com_pesos_fica_com_o_peso_da_primeira():
+    tabela, _ = deduplicar(LINHAS, DEDUP_PRIMEIRO, com_pesos=True)
+    assert list(tabela.pesos) == [1.0, 2.0]
+
+
+def test_mesclar_fica_com_o_maior_peso_e_a_primeira_classificacao():
+    tabela, _ = deduplicar(LINHAS, DEDUP_MESCLAR, com_pesos=True)
+    assert list(tabela.nomes) == ["José da Silva", "Ana"]
+    assert list(tabela.classificacoes) == ["Prata", "Ouro"]
+    assert list(tabela.pesos) == [5.0, 2.0]
+
+
+def test_peso_soma_as_linhas():
+    tabela, _ = deduplicar(LINHAS, DEDUP_PESO, com_pesos=True)
+    assert list(tabela.pesos) == [9.0, 3.0]
+    assert list(tabela.classificacoes) == ["", "Ouro"]
+
+
+def test_peso_sem_coluna_conta_um_bilhete_por_linha():
+    linhas = [(nome, cls, 1.0) for nome, cls, _ in LINHAS]
+    tabela, _ = deduplicar(linhas, DEDUP_PESO)
+    assert list(tabela.pesos) == [3.0, 2.0]
+
+
+def test_politica_desconhecida():
+    with pytest.raises(ValueError):
+        deduplicar(LINHAS, 'ultimo')
+
+
+def test_relatorio_lista_as_variantes():
+    _, relatorio = deduplicar(LINHAS, DEDUP_PRIMEIRO)
+    mantido, ocorrencias, variantes = relatorio.repetidos["jose da silva"]
+    assert (mantido, ocorrencias) == ("José da Silva", 3)
+    assert variantes == ["  JOSE   DA SILVA. ", "jose da silva"]
+    texto = relatorio.texto()
+    assert "6 linhas lidas, 3 repetições juntadas em 2 nomes" in texto
+    assert "1 linhas sem nome válido descartadas" in texto
+
+
+def test_relatorio_limita_variantes_e_nomes():
+    linhas = [(f"Nome {i}{'.' * k}", "", 1.0) for i in range(30) for k in range(LIMITE_VARIANTES + 3)]
+    _, relatorio = deduplicar(linhas)
+    assert all(len(variantes) == LIMITE_VARIANTES for _, _, variantes in relatorio.repetidos.values())
+    assert relatorio.texto(limite=20).endswith("... e mais 10")
+
+
+def test_origens_das_linhas_mantidas():
+    origens = array('B', range(len(LINHAS)))
+    tabela, _ = deduplicar(LINHAS, DEDUP_MESCLAR, origens=origens)
+    assert tabela.origens == array('B', [0, 1])
+
+
+def test_deduplicar_uma_tabela():
+    tabela = TabelaParticipantes(["Ana", "ANA ", "Bia"], ["X", "Y", ""], pesos=array('d', [1, 2, 3]))
+    dedup, relatorio = deduplicar(linhas_da_tabela(tabela), DEDUP_PESO, com_pesos=True)
+    assert list(dedup.nomes) == ["Ana", "Bia"]
+    assert list(dedup.pesos) == [3.0, 3.0]
+    assert dedup.deduplicacao is relatorio
@@ -0,0 +1,138 @@
+from array import array
+
+import pytest
+
+import participantes
+from participantes import ColunaTexto, TabelaParticipantes, tipo_dos_codigos
+
+NOMES = ["Ana", "Bia", "Caio", "Duda", "Edu"]
+CLASSIFICACOES = ["X", "Y", "X", "", "Y"]
+
+
+def tabela_exemplo(pesos=None):
+    tabela = TabelaParticipantes(pesos=array('d') if pesos else None)
+    for i, (nome, classificacao) in enumerate(zip(NOMES, CLASSIFICACOES)):
+        tabela.adicionar(nome, classificacao, pesos[i] if pesos else 1.0)
+    return tabela
+
+
+def test_colunas_alinhadas_por_linha():
+    tabela = tabela_exemplo()
+    assert len(tabela) == 5
+    assert list(tabela.nomes) == NOMES
+    assert list(tabela.classificacoes) == CLASSIFICACOES
+    assert [tabela.classificacoes[i] for i in range(5)] == CLASSIFICACOES
+    assert tabela.pesos is None
+
+
+def test_construida_das_listas_igual_a_construida_por_linha():
+    tabela = TabelaParticipantes(NOMES, CLASSIFICACOES)
+    assert list(tabela.classificacoes) == list(tabela_exemplo().classificacoes)
+    assert tabela.hash_conteudo() == tabela_exemplo().hash_conteudo()
+
+
+def test_indices_e_contagens_por_classificacao():
+    tabela = tabela_exemplo()
+    assert tabela.classificacoes_unicas() == ["X", "Y"]
+    assert list(tabela.indices_da_classificacao("X")) == [0, 2]
+    assert tabela.nomes_da_classificacao("Y") == ["Bia", "Edu"]
+    assert tabela.contagem_classificacoes() == {"X": 2, "Y": 2}
+    assert tabela.contagem_iniciais() == {"A": 1, "B": 1, "C": 1, "D": 1, "E": 1}
+
+
+def test_adicionar_atualiza_o_que_ja_foi_calculado():
+    tabela = tabela_exemplo()
+    tabela.contagem_classificacoes()
+    tabela.contagem_iniciais()
+    tabela.indices_por_classificacao()
+    hash_anterior = tabela.hash_conteudo()
+
+    tabela.adicionar("alice", "Z")
+    assert tabela.contagem_classificacoes() == {"X": 2, "Y": 2, "Z": 1}
+    assert tabela.contagem_iniciais()["A"] == 2
+    assert list(tabela.indices_da_classificacao("Z")) == [5]
+    assert tabela.classificacoes_unicas() == ["X", "Y", "Z"]
+    assert tabela.hash_conteudo() != hash_anterior
+
+
+def test_hash_depende_dos_pesos():
+    com_pesos = tabela_exemplo([1.0, 2.0, 1.0, 1.0, 1.0])
+    outros = tabela_exemplo([1.0, 3.0, 1.0, 1.0, 1.0])
+    assert com_pesos.hash_conteudo() != outros.hash_conteudo() != tabela_exemplo().hash_conteudo()
+
+
+def test_concatenar_traduz_os_codigos():
+    primeira = TabelaParticipantes(["a", "b"], ["Y", "X"])
+    segunda = TabelaParticipantes(["c", "d", "e"], ["X", "Z", ""])
+    tabela = TabelaParticipantes.concatenar([primeira, segunda])
+    assert list(tabela.nomes) == ["a", "b", "c", "d", "e"]
+    assert list(tabela.classificacoes) == ["Y", "X", "X", "Z", ""]
+    assert tabela.contagem_classificacoes() == {"X": 2, "Y": 1, "Z": 1}
+
+
+@pytest.mark.parametrize('categorias, tipo', [(1, 'B'), (256, 'B'), (257, 'H'), (65536, 'H'), (65537, 'I')])
+def test_largura_dos_codigos(categorias, tipo):
+    assert tipo_dos_codigos(categorias) == tipo
+
+
+def test_codigos_alargam_quando_as_categorias_crescem():
+    tabela = TabelaParticipantes()
+    for i in range(300):
+        tabela.adicionar(f"p{i}", f"c{i}")
+    codigos, categorias = tabela.codigos_classificacoes()
+    assert codigos.typecode == 'H'
+    assert len(categorias) == 300
+    assert tabela.classificacoes[299] == "c299"
+
+
+def test_classificacoes_repetidas_ocupam_um_byte_por_linha():
+    tabela = TabelaParticipantes([f"p{i}" for i in range(1000)], ["X", "Y"] * 500)
+    codigos, categorias = tabela.codigos_classificacoes()
+    assert codigos.typecode == 'B' and codigos.itemsize == 1
+    assert categorias == ["X", "Y"]
+
+
+def test_coluna_texto_guarda_os_inicios():
+    coluna = ColunaTexto(["Ana", "José", "", "Zé"])
+    assert list(coluna.inicios) == [0, 4, 10, 11]
+    assert bytes(coluna.unidos()) == "\x00".join(["Ana", "José", "", "Zé"]).encode('utf-8')
+    assert [coluna[i] for i in range(4)] == ["Ana", "José", "", "Zé"]
+    assert coluna[-1] == "Zé"
+    assert coluna[1:3] == ["José", ""]
+
+
+def test_coluna_texto_itera_em_blocos(monkeypatch):
+    monkeypatch.setattr(participantes, 'TEXTOS_POR_BLOCO', 3)
+    textos = [f"nome {i}" for i in range(10)]
+    assert list(ColunaTexto(textos)) == textos
+
+
+def test_coluna_texto_com_nul_no_texto():
+    textos = ["a\x00b", "c"]
+    coluna = ColunaTexto(textos)
+    assert coluna.com_nul
+    assert list(coluna) == textos
+    assert coluna[0] == "a\x00b"
+
+
+def test_estender_desloca_os_inicios():
+    coluna = ColunaTexto(["a", "bb"])
+    coluna.estender(ColunaTexto(["ccc", "d\x00"]))
+    assert list(coluna) == ["a", "bb", "ccc", "d\x00"]
+    assert coluna.com_nul
+
+
+def test_dos_bytes_refaz_a_coluna():
+    textos = ["Ana", "José", "", "Zé"]
+    coluna = ColunaTexto.dos_bytes(ColunaTexto(textos).unidos(), 4)
+    assert list(coluna) == textos
+    assert list(ColunaTexto.dos_bytes(b'', 0)) == []
+    with pytest.raises(ValueError):
+        ColunaTexto.dos_bytes(b'a\x00b', 3)
+
+
+def test_inicios_passam_a_64_bits(monkeypatch):
+    monkeypatch.setattr(participantes, 'LIMITE_INICIOS_32', 8)
+    coluna = ColunaTexto(["abcd", "efgh", "ij"])
+    assert coluna.inicios.typecode == 'Q'
+    assert list(coluna) == ["abcd", "efgh", "ij"]
@@ -0,0 +1,50 @@
+import pytest
+
+import motor_sorteio
+
+
+def sortear(modo, tabela, classificacoes, semente):
+    if modo == 'sorteio':
+        return motor_sorteio.sortear(tabela, 5, 'A', semente=semente)
+    if modo == 'colocacao':
+        return motor_sorteio.sortear_com_colocacao(tabela, 3, 'A', motor_sorteio.premios_padrao(3), semente=semente)
+    if modo == 'classificacao':
+        return motor_sorteio.sortear_por_classificacao(tabela, classificacoes[0], 4, semente=semente)
+    if modo == 'cotas':
+        return motor_sorteio.sortear_por_cotas(tabela, {c: 2 for c in classificacoes}, 'A', semente=semente)
+    if modo == 'grupos':
+        return motor_sorteio.formar_grupos(tabela, 4, 'A', semente=semente)
+    return motor_sorteio.formar_grupos(tabela, 4, 'A', semente=semente, estratificado=True)
+
+
+MODOS = ['sorteio', 'colocacao', 'classificacao', 'cotas', 'grupos', 'grupos_estratificados']
+
+
+@pytest.mark.parametrize('modo', MODOS)
+def test_mesma_semente_mesmo_resultado(modo, tabela, classificacoes):
+    primeiro, registro = sortear(modo, tabela, classificacoes, 1234)
+    segundo, outro = sortear(modo, tabela, classificacoes, 1234)
+    assert primeiro.get('itens') == segundo.get('itens')
+    assert primeiro.get('grupos') == segundo.get('grupos')
+    assert registro['semente'] == outro['semente'] == 1234
+    assert registro['hash_resultado'] == outro['hash_resultado']
+
+
+@pytest.mark.parametrize('modo', MODOS)
+def test_sementes_diferentes_mudam_o_resultado(modo, tabela, classificacoes):
+    _, registro = sortear(modo, tabela, classificacoes, 1)
+    _, outro = sortear(modo, tabela, classificacoes, 2)
+    assert registro['hash_resultado'] != outro['hash_resultado']
+
+
+def test_grupos_usam_todos_os_participantes(tabela):
+    resultados, _ = motor_sorteio.formar_grupos(tabela, 4, 'A', semente=7)
+    nomes = [nome for grupo in resultados['grupos'] for nome in grupo]
+    assert sorted(nomes) == sorted(tabela.nomes)
+
+
+def test_sem_semente_uma_nova_e_gravada(tabela):
+    _, registro = motor_sorteio.sortear(tabela, 3, 'A')
+    _, outro = motor_sorteio.sortear(tabela, 3, 'A')
+    assert isinstance(registro['semente'], int)
+    assert registro['semente'] != outro['semente']
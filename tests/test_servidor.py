@@ -0,0 +1,130 @@
+import asyncio
+import json
+
+import pytest
+
+from historico import HistoricoSorteios
+from servidor import ServidorSorteio, main
+
+TOKEN = 't'
+
+
+@pytest.fixture
+def servidor(tabela, origem, tmp_path):
+    return ServidorSorteio(tabela, 'A', origem, HistoricoSorteios(tmp_path), TOKEN)
+
+
+async def _http(porta, metodo, caminho, corpo=b'', token=TOKEN, cabecalhos=None):
+    leitor, escritor = await asyncio.open_connection('127.0.0.1', porta)
+    cabecalho = f"{metodo} {caminho} HTTP/1.1\r\nHost: teste\r\nConnection: close\r\nContent-Length: {len(corpo)}\r\n"
+    if token:
+        cabecalho += f"Authorization: Bearer {token}\r\n"
+    escritor.write(cabecalho.encode() + b"\r\n" + corpo)
+    resposta = await leitor.read()
+    escritor.close()
+    linhas, _, conteudo = resposta.partition(b"\r\n\r\n")
+    if cabecalhos is not None:
+        for linha in linhas.decode('latin-1').split("\r\n")[1:]:
+            nome, _, valor = linha.partition(':')
+            cabecalhos[nome.strip().lower()] = valor.strip()
+    return int(linhas.split()[1]), json.loads(conteudo) if conteudo else None
+
+
+def requisitar(servidor, metodo, caminho, corpo=None, token=TOKEN, cabecalhos=None):
+    """(status, resposta) de uma requisição a um servidor numa porta livre.
+
+    cabecalhos, se dado, recebe os cabeçalhos da resposta.
+    """
+    if not isinstance(corpo, bytes):
+        corpo = json.dumps(corpo).encode() if corpo is not None else b''
+
+    async def rodar():
+        await servidor.carregar_historico()
+        async with await asyncio.start_server(servidor.atender, '127.0.0.1', 0) as tcp:
+            return await _http(tcp.sockets[0].getsockname()[1], metodo, caminho, corpo, token, cabecalhos)
+
+    return asyncio.run(rodar())
+
+
+def test_sorteio_valido(servidor):
+    status, resposta = requisitar(servidor, 'POST', '/sortear', {'quantidade': 3, 'semente': 11})
+    assert status == 200
+    assert resposta['registro']['semente'] == 11
+    assert len(servidor.historico) == 1
+
+
+def test_semente_gerada_no_servidor(servidor):
+    _, primeira = requisitar(servidor, 'POST', '/sortear', {'quantidade': 3})
+    _, segunda = requisitar(servidor, 'POST', '/sortear', {'quantidade': 3})
+    assert primeira['registro']['semente'] != segunda['registro']['semente']
+
+
+@pytest.mark.parametrize('corpo', [
+    b'{nada',
+    b'[1, 2]',
+    {'modo': 'inexistente'},
+    {'quantidade': 'muitos'},
+    {'quantidade': 10 ** 9},
+    {'semente': 'abc'},
+    {'semente': -1},
+    {'semente': 1.5},
+    {'excluir': []},
+    {'excluir': 'qualquer'},
+    {'excluir': {'escopo': 'outro'}},
+    {'excluir': {'dias': 'trinta'}},
+    {'excluir': {'escopo': 'classificacao'}},
+    {'modo': 'classificacao'},
+    {'modo': 'cotas'},
+    {'modo': 'cotas', 'cotas': {'Inexistente': 1}},
+])
+def test_corpo_malformado_da_400(servidor, corpo):
+    status, resposta = requisitar(servidor, 'POST', '/sortear', corpo)
+    assert status == 400
+    assert resposta['erro']
+    assert not servidor.historico
+
+
+def test_sem_token_da_401(servidor):
+    assert requisitar(servidor, 'POST', '/sortear', {}, token=None)[0] == 401
+
+
+def test_semente_do_cliente_exige_token(tabela, origem, tmp_path):
+    servidor = ServidorSorteio(tabela, 'A', origem, HistoricoSorteios(tmp_path))
+    assert requisitar(servidor, 'POST', '/sortear', {'semente': 1}, token=None)[0] == 403
+
+
+@pytest.mark.parametrize('metodo, caminho, esperado', [('GET', '/nada', 404), ('PUT', '/estado', 405)])
+def test_rotas(servidor, metodo, caminho, esperado):
+    assert requisitar(servidor, metodo, caminho)[0] == esperado
+
+
+def test_erro_inesperado_da_500(servidor, monkeypatch):
+    def falhar(pedido):
+        raise RuntimeError("falha de teste")
+
+    monkeypatch.setattr(servidor, '_preparar_sorteio', falhar)
+    status, resposta = requisitar(servidor, 'POST', '/sortear', {})
+    assert status == 500
+    assert "falha de teste" in resposta['erro']
+
+
+def test_sem_cors_por_padrao(servidor):
+    cabecalhos = {}
+    requisitar(servidor, 'GET', '/estado', cabecalhos=cabecalhos)
+    assert not any(nome.startswith('access-control-') for nome in cabecalhos)
+    assert requisitar(servidor, 'OPTIONS', '/sortear')[0] == 405
+
+
+def test_cors_liberado_para_a_origem_dada(tabela, origem, tmp_path):
+    servidor = ServidorSorteio(tabela, 'A', origem, HistoricoSorteios(tmp_path), TOKEN, 'https://painel.exemplo')
+    cabecalhos = {}
+    assert requisitar(servidor, 'OPTIONS', '/sortear', token=None, cabecalhos=cabecalhos)[0] == 204
+    assert cabecalhos['access-control-allow-origin'] == 'https://painel.exemplo'
+    assert requisitar(servidor, 'POST', '/sortear', {'quantidade': 1}, token=None)[0] == 401
+
+
+def test_cors_exige_token(tabela, origem, tmp_path, planilha):
+    with pytest.raises(ValueError):
+        ServidorSorteio(tabela, 'A', origem, HistoricoSorteios(tmp_path), None, '*')
+    with pytest.raises(SystemExit):
+        main([planilha, '--cors', '*'])
@@ -0,0 +1,125 @@
+import json
+import shutil
+
+import pytest
+
+import motor_sorteio
+import sorteio_cli
+from consulta_historico import IndiceHistorico
+from exclusao import escopo_exclusao, exclusao_do_historico, exclusao_por_classificacao
+from historico import HistoricoSorteios
+from verificacao import (ARQUIVO_ALTERADO, DIVERGENTE, NAO_VERIFICAVEL, POPULACAO_ALTERADA, VERIFICADO,
+                         exclusao_do_registro, indice_legado, ler_registros, verificar_registro)
+from tests.test_reprodutibilidade import MODOS, sortear
+
+
+def com_origem(registro, origem):
+    registro.update(origem)
+    return registro
+
+
+@pytest.mark.parametrize('modo', MODOS)
+def test_cada_modo_e_verificado(modo, tabela, classificacoes, origem, cache):
+    _, registro = sortear(modo, tabela, classificacoes, 99)
+    assert verificar_registro(com_origem(registro, origem), cache) == (VERIFICADO, "")
+
+
+def test_semente_alterada_diverge(tabela, origem, cache):
+    _, registro = motor_sorteio.sortear(tabela, 5, 'A', semente=3)
+    registro = com_origem(registro, origem)
+    registro['semente'] += 1
+    assert verificar_registro(registro, cache)[0] == DIVERGENTE
+
+
+def test_arquivo_alterado(planilha, tmp_path, cache):
+    copia = str(tmp_path / 'copia.csv')
+    shutil.copy(planilha, copia)
+    tabela = cache.obter(copia, 'A')[2]
+    _, registro = motor_sorteio.sortear(tabela, 5, 'A', semente=3)
+    registro = com_origem(registro, sorteio_cli.origem_do_sorteio([copia], False, 'A'))
+    with open(copia, 'a', encoding='utf-8') as f:
+        f.write("Mais alguém;X;1\n")
+    assert verificar_registro(registro, cache)[0] == ARQUIVO_ALTERADO
+
+
+def sortear_com_exclusao(arquivo_historico, tabela, classificacoes, origem, sorteios):
+    """Sorteios alternados com exclusão, cada um gravado antes do próximo."""
+    for semente in range(sorteios):
+        indice = IndiceHistorico(arquivo_historico.entradas())
+        if semente % 2:
+            exclusao = exclusao_por_classificacao(
+                indice, escopo_exclusao(por_classificacao=True), {c: 3 for c in classificacoes}
+            )
+            _, registro = motor_sorteio.sortear_por_cotas(
+                tabela, {c: 3 for c in classificacoes}, 'A', semente=semente, exclusao=exclusao
+            )
+        else:
+            exclusao = exclusao_do_historico(indice, escopo_exclusao())
+            _, registro = motor_sorteio.sortear(tabela, 20, 'A', semente=semente, exclusao=exclusao)
+        arquivo_historico.registrar(com_origem(registro, origem))
+
+
+def test_exclusao_verificada_depois_da_compactacao(tmp_path, tabela, classificacoes, origem, cache):
+    arquivo_historico = HistoricoSorteios(tmp_path, limite_entradas=4)
+    sortear_com_exclusao(arquivo_historico, tabela, classificacoes, origem, 10)
+    arquivo_historico.compactar()
+
+    registros = list(arquivo_historico.entradas())
+    assert len(registros) == 4
+    for id_registro, registro in enumerate(registros):
+        assert registro['excluidos'] > 0
+        exclusao = exclusao_do_registro(registro, None, id_registro)
+        assert verificar_registro(registro, cache, exclusao) == (VERIFICADO, "")
+
+
+def test_registro_antigo_refaz_a_exclusao_pelo_historico(tmp_path, tabela, classificacoes, origem, cache):
+    arquivo_historico = HistoricoSorteios(tmp_path)
+    sortear_com_exclusao(arquivo_historico, tabela, classificacoes, origem, 6)
+    # Registros gravados antes das chaves descartadas: só o histórico refaz a exclusão.
+    registros = [{campo: valor for campo, valor in registro.items() if campo != 'descartados'}
+                 for registro in arquivo_historico.entradas()]
+    indice = indice_legado(registros)
+    for id_registro, registro in enumerate(registros):
+        exclusao = exclusao_do_registro(registro, indice, id_registro)
+        assert verificar_registro(registro, cache, exclusao) == (VERIFICADO, "")
+
+
+def test_saida_jsonl_da_linha_de_comando_e_verificada(planilha, tmp_path, cache, capsys):
+    saida = tmp_path / 'sorteios.jsonl'
+    assert sorteio_cli.main([planilha, '-c', 'A', '-n', '3', '-s', '5', '--sem-cache', '-o', str(saida)]) == 0
+    registros = list(ler_registros(saida))
+    assert len(registros) == 3
+    for registro in registros:
+        assert registro['hash_populacao'] and registro['hash_arquivo']
+        assert verificar_registro(registro, cache) == (VERIFICADO, "")
+    assert json.loads(saida.read_text(encoding='utf-8').splitlines()[0])['registro'] == registros[0]
+
+
+@pytest.mark.parametrize('extras', [[], ['-p', 'C'], ['-m', 'colocacao', '--premios', 'padrao']])
+def test_sorteio_em_fluxo_e_verificado(planilha, tmp_path, cache, extras):
+    saida = tmp_path / 'fluxo.jsonl'
+    argumentos = [planilha, '-c', 'A', '-q', '3', '--fluxo', '-s', '1', '-n', '2', '-o', str(saida)] + extras
+    assert sorteio_cli.main(argumentos) == 0
+    for registro in ler_registros(saida):
+        assert registro['fluxo'] and registro['hash_populacao']
+        assert verificar_registro(registro, cache) == (VERIFICADO, "")
+
+
+def test_sorteio_em_fluxo_com_populacao_alterada(planilha, tmp_path, cache):
+    copia = str(tmp_path / 'copia.csv')
+    shutil.copy(planilha, copia)
+    saida = tmp_path / 'fluxo.jsonl'
+    assert sorteio_cli.main([copia, '-c', 'A', '--fluxo', '-s', '1', '-o', str(saida)]) == 0
+    registro = next(ler_registros(saida))
+    with open(copia, 'a', encoding='utf-8') as f:
+        f.write("Mais alguém;X;1\n")
+    registro = com_origem(registro, sorteio_cli.origem_do_sorteio([copia], False, 'A'))
+    assert verificar_registro(registro, cache)[0] == POPULACAO_ALTERADA
+
+
+def test_sorteio_em_fluxo_antigo_nao_e_verificavel(planilha, tmp_path, cache):
+    saida = tmp_path / 'fluxo.jsonl'
+    assert sorteio_cli.main([planilha, '-c', 'A', '--fluxo', '-s', '1', '-o', str(saida)]) == 0
+    registro = next(ler_registros(saida))
+    del registro['fluxo'], registro['hash_populacao']
+    assert verificar_registro(registro, cache)[0] == NAO_VERIFICAVEL
@@ -0,0 +1,268 @@
+"""Refaz sorteios do histórico a partir da semente e confere o resultado.
+
+Uso:
+    python verificacao.py [historico.jsonl] [--processos 4] [--json relatorio.json]
+
+Sem arquivo, verifica o histórico padrão do aplicativo.
+"""
+import argparse
+import json
+import os
+import sys
+from collections import Counter, defaultdict
+
+import motor_sorteio
+from cache_disco import CacheDisco
+from cache_planilhas import CachePlanilhas
+from consulta_historico import IndiceHistorico, chave_legada
+from exclusao import exclusao_do_historico, exclusao_gravada, exclusao_por_classificacao
+from historico import HistoricoSorteios
+from leitura import percorrer_planilha
+
+VERIFICADO = 'verificado'
+DIVERGENTE = 'divergente'
+SEM_SEMENTE = 'sem semente'
+ARQUIVO_AUSENTE = 'arquivo ausente'
+ARQUIVO_ALTERADO = 'arquivo alterado'
+POPULACAO_ALTERADA = 'população alterada'
+NAO_VERIFICAVEL = 'não verificável'
+ERRO = 'erro'
+
+REGISTROS_POR_TAREFA = 500
+
+
+def refazer(registro, tabela, exclusao=None):
+    """Repete o sorteio do registro sobre a tabela, com a semente gravada.
+
+    exclusao deve ser a do momento do sorteio (ver exclusao_do_registro).
+    Sorteios em fluxo não usam a tabela: o arquivo é percorrido de novo.
+    """
+    tipo = registro.get('tipo')
+    semente = registro['semente']
+    coluna = registro.get('coluna')
+
+    if registro.get('fluxo'):
+        return motor_sorteio.sortear_em_fluxo(
+            percorrer_planilha(registro['arquivo'], coluna, registro.get('coluna_peso')), registro['quantidade'],
+            coluna, colocacao=tipo == motor_sorteio.TIPO_COLOCACAO, ponderado=registro.get('ponderado', False),
+            semente=semente
+        )
+    if tipo == motor_sorteio.TIPO_GRUPOS:
+        return motor_sorteio.formar_grupos(
+            tabela, registro['num_grupos'], coluna, semente=semente, estratificado=registro.get('estratificado', False)
+        )
+    if tipo == motor_sorteio.TIPO_CLASSIFICACAO:
+        return motor_sorteio.sortear_por_classificacao(
+            tabela, registro['classificacao'], registro['quantidade'], semente=semente, exclusao=exclusao
+        )
+    if tipo == motor_sorteio.TIPO_COTAS:
+        return motor_sorteio.sortear_por_cotas(tabela, registro['cotas'], coluna, semente=semente, exclusao=exclusao)
+    if tipo == motor_sorteio.TIPO_COLOCACAO:
+        return motor_sorteio.sortear_com_colocacao(
+            tabela, registro['quantidade'], coluna, semente=semente, exclusao=exclusao
+        )
+    return motor_sorteio.sortear(tabela, registro['quantidade'], coluna, semente=semente, exclusao=exclusao)
+
+
+def exclusao_do_registro(registro, indice, id_registro):
+    """Os vencedores excluídos quando o registro id_registro foi sorteado.
+
+    Usa as chaves descartadas gravadas no registro; só registros antigos,
+    sem elas, dependem do índice do histórico, que deve vir de
+    indice_legado: esses sorteios compararam os nomes pela chave legada.
+    """
+    if 'exclusao' not in registro:
+        return None
+    gravada = exclusao_gravada(registro)
+    if gravada is not None or indice is None:
+        return gravada
+    if registro['exclusao'].get('por_classificacao'):
+        return exclusao_por_classificacao(indice, registro['exclusao'], registro.get('cotas', ()), ate=id_registro)
+    return exclusao_do_historico(indice, registro['exclusao'], ate=id_registro)
+
+
+def precisa_indice_legado(registro):
+    return 'exclusao' in registro and 'descartados' not in registro
+
+
+def indice_legado(registros):
+    """IndiceHistorico com a chave dos sorteios gravados sem as chaves descartadas."""
+    return IndiceHistorico(registros, chave=chave_legada)
+
+
+def verificar_registro(registro, cache, exclusao=None):
+    """(situação, detalhe) de um registro do histórico.
+
+    Confere, nesta ordem, o hash do arquivo de origem (de cada um, em
+    planilhas combinadas), o hash da população lida dele (coluna e coluna
+    de peso gravadas) e o hash do resultado refeito com a mesma semente.
+    """
+    fontes = registro.get('fontes') or [
+        {'arquivo': registro.get('arquivo'), 'hash_arquivo': registro.get('hash_arquivo')}
+    ]
+    if registro.get('semente') is None or not all(fonte.get('arquivo') for fonte in fontes):
+        return SEM_SEMENTE, "Registro sem semente ou sem arquivo de origem"
+    if not registro.get('hash_populacao'):
+        # Sorteios em fluxo gravados antes do campo "fluxo" não têm o hash da
+        # população nem dizem qual algoritmo os refaz.
+        return NAO_VERIFICAVEL, "Registro sem o hash da população (sorteio em fluxo antigo)"
+
+    for fonte in fontes:
+        if not os.path.exists(fonte['arquivo']):
+            return ARQUIVO_AUSENTE, fonte['arquivo']
+
+    try:
+        for fonte in fontes:
+            if cache.hash_do_arquivo(fonte['arquivo']) != fonte.get('hash_arquivo'):
+                return ARQUIVO_ALTERADO, f"{fonte['arquivo']} mudou depois do sorteio"
+
+        if registro.get('fluxo'):
+            _, refeito = refazer(registro, None)
+            if refeito['hash_populacao'] != registro['hash_populacao']:
+                return POPULACAO_ALTERADA, f"A coluna {registro.get('coluna')} não tem mais os mesmos itens"
+            return _conferir_resultado(registro, refeito)
+
+        if 'fontes' in registro:
+            # Os blocos já rodam em processos separados: as fontes são lidas neste.
+            _, _, tabela = cache.obter_conjunto(
+                [(fonte['arquivo'], fonte.get('aba')) for fonte in fontes], registro.get('coluna'),
+                coluna_peso=registro.get('coluna_peso'), politica=registro.get('deduplicacao'), processos=1
+            )
+        else:
+            _, _, tabela = cache.obter(
+                fontes[0]['arquivo'], registro.get('coluna'),
+                coluna_peso=registro.get('coluna_peso'), politica=registro.get('deduplicacao')
+            )
+        if tabela.hash_conteudo() != registro.get('hash_populacao'):
+            return POPULACAO_ALTERADA, f"A coluna {registro.get('coluna')} não tem mais os mesmos itens"
+
+        _, refeito = refazer(registro, tabela, exclusao)
+    except (OSError, ValueError, KeyError) as e:
+        return ERRO, str(e)
+    return _conferir_resultado(registro, refeito)
+
+
+def _conferir_resultado(registro, refeito):
+    if refeito['hash_resultado'] != registro.get('hash_resultado'):
+        return DIVERGENTE, "O sorteio refeito não confere com o registrado"
+    return VERIFICADO, ""
+
+
+_cache_do_processo = None
+
+
+def _verificar_bloco(bloco):
+    # Um cache por processo: a tabela e o hash do arquivo são obtidos uma vez
+    # e servem a todos os blocos da mesma população.
+    global _cache_do_processo
+    if _cache_do_processo is None:
+        _cache_do_processo = CachePlanilhas(disco=CacheDisco())
+    return [(numero, *verificar_registro(registro, _cache_do_processo, exclusao))
+            for numero, registro, exclusao in bloco]
+
+
+def _fontes_do_registro(registro):
+    return tuple((fonte.get('arquivo'), fonte.get('aba')) for fonte in registro.get('fontes') or ()) or None
+
+
+def _blocos(registros):
+    # Sorteios com exclusão gravados sem as chaves descartadas precisam dos
+    # vencedores anteriores: o índice do histórico só é montado se houver algum.
+    registros = list(registros)
+    indice = indice_legado(registros) if any(map(precisa_indice_legado, registros)) else None
+
+    grupos = defaultdict(list)
+    for numero, registro in enumerate(registros, 1):
+        chave = (registro.get('arquivo') or _fontes_do_registro(registro), registro.get('hash_arquivo'),
+                 registro.get('coluna'), registro.get('coluna_peso'), registro.get('deduplicacao'),
+                 registro.get('fluxo', False))
+        exclusao = exclusao_do_registro(registro, indice, numero - 1)
+        grupos[chave].append((numero, registro, exclusao))
+
+    for chave, lista in grupos.items():
+        for inicio in range(0, len(lista), REGISTROS_POR_TAREFA):
+            yield chave, lista[inicio:inicio + REGISTROS_POR_TAREFA]
+
+
+def verificar_lote(registros, processos=None):
+    """Gera (número, situação, detalhe), número 1 sendo o registro mais antigo.
+
+    Os registros são agrupados por população e divididos em blocos entre
+    processos. Antes, cada população é lida uma vez neste processo, o que
+    grava o retrato no CacheDisco: os processos só mapeiam o arquivo binário.
+    """
+    blocos = list(_blocos(registros))
+
+    aquecidas = set()
+    cache = CachePlanilhas(disco=CacheDisco())
+    for (arquivo, _, coluna, coluna_peso, _, fluxo), _ in blocos:
+        # Sorteios em fluxo percorrem o arquivo, sem tabela a aquecer.
+        if not arquivo or fluxo or (arquivo, coluna, coluna_peso) in aquecidas:
+            continue
+        aquecidas.add((arquivo, coluna, coluna_peso))
+        try:
+            # Planilhas combinadas: grava o retrato de cada fonte, lidas em paralelo.
+            if isinstance(arquivo, tuple):
+                cache.obter_conjunto(arquivo, coluna, coluna_peso=coluna_peso)
+            elif os.path.exists(arquivo):
+                cache.obter(arquivo, coluna, coluna_peso=coluna_peso)
+        except (OSError, ValueError):
+            pass
+    cache.limpar()
+
+    if processos == 1 or len(blocos) < 2:
+        for _, bloco in blocos:
+            yield from _verificar_bloco(bloco)
+        return
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(processos) as executor:
+        for resultado in executor.map(_verificar_bloco, [bloco for _, bloco in blocos]):
+            yield from resultado
+
+
+def ler_registros(caminho):
+    with open(caminho, encoding='utf-8') as f:
+        for linha in f:
+            try:
+                registro = json.loads(linha)
+            except json.JSONDecodeError:
+                continue
+            if isinstance(registro, dict):
+                # A saída .jsonl do sorteio_cli traz o registro dentro do resultado.
+                yield registro['registro'] if isinstance(registro.get('registro'), dict) else registro
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('historico', nargs='?', default=str(HistoricoSorteios().caminho),
+                        help="Histórico em JSON Lines (padrão: o do aplicativo)")
+    parser.add_argument('-j', '--processos', type=int, help="Processos em paralelo (padrão: um por CPU)")
+    parser.add_argument('--json', help="Grava a situação de cada registro em JSON neste arquivo")
+    args = parser.parse_args(argv)
+
+    try:
+        resultados = sorted(verificar_lote(ler_registros(args.historico), args.processos))
+    except OSError as e:
+        print(f"Erro: {e}", file=sys.stderr)
+        return 1
+
+    contagem = Counter(situacao for _, situacao, _ in resultados)
+    print(f"{len(resultados)} registros verificados:")
+    for situacao, quantidade in contagem.most_common():
+        print(f"  {situacao:<20} {quantidade}")
+    for numero, situacao, detalhe in resultados:
+        if situacao not in (VERIFICADO, SEM_SEMENTE):
+            print(f"  Nº {numero}: {situacao}{' - ' + detalhe if detalhe else ''}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump([{'numero': numero, 'situacao': situacao, 'detalhe': detalhe}
+                       for numero, situacao, detalhe in resultados], f, indent=4, ensure_ascii=False)
+
+    return 1 if contagem[DIVERGENTE] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())